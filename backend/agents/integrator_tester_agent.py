@@ -2,9 +2,21 @@ from crewai import Agent, Task
 from langchain_ollama import OllamaLLM
 from backend.config import settings
 from typing import Dict, Any, List
+from pathlib import PurePosixPath
+import asyncio
 import json
 
 from backend.utils.llm_factory import create_llm
+from backend.utils.crew_runner import run_task
+from backend.utils.model_cascade import json_output, source_output, strip_code_fence
+from backend.utils.prompts import task_prompt
+
+# Rough chars per token, as in estimate_tokens
+CHARS_PER_TOKEN = 4
+# Shown before other files when the prompt cannot hold them all
+SOURCE_SUFFIXES = {".py", ".js", ".ts", ".jsx", ".tsx", ".html"}
+# Less than this of a file is not worth showing
+MIN_FILE_CHARS = 300
 
 class IntegratorTesterAgent:
     def __init__(self):
@@ -20,13 +32,15 @@ class IntegratorTesterAgent:
             verbose=True
         )
     
-    def test_integration(self, files: Dict[str, str]) -> Dict[str, Any]:
+    async def test_integration(self, files: Dict[str, str]) -> Dict[str, Any]:
         """Test the integrated system"""
         
+        # Reading the files hits the disk (files is an ArtifactStore)
+        listing = await asyncio.to_thread(self._numbered_files, files)
+        
         task = Task(
-            description=f"""
-            Create integration tests for these files:
-            {list(files.keys())}
+            description=task_prompt("""
+            Create integration tests for the files below.
             
             Create:
             1. API endpoint tests
@@ -34,18 +48,25 @@ class IntegratorTesterAgent:
             3. Data flow tests
             4. Error handling tests
             
-            Also identify and fix any integration issues found.
+            Also identify and fix any integration issues found, in files whose
+            content is shown. Line numbers are for reference only: leave them out
+            of search text and diffs.
             
             Return JSON with:
             - test_files: dict of test filename to code
-            - fixes: dict of filename to fixed code (if any)
+            - fixes: dict of filename to the fix (if any), as a list of
+              {"search": "exact lines from the file", "replace": "new lines"} edits
+              or a unified diff; complete file content only for new files
             - test_results: list of test results
-            """,
+            """, {
+                "Files": ", ".join(sorted(files)),
+                "File contents": listing,
+            }),
             agent=self.agent,
             expected_output="JSON with tests and fixes"
         )
         
-        result = task.execute()
+        result = await run_task(self.agent, task, check=json_output(dict, ("test_files",)))
         
         try:
             test_data = json.loads(result)
@@ -54,6 +75,50 @@ class IntegratorTesterAgent:
         
         return test_data
     
+    def _numbered_files(self, files: Dict[str, str]) -> str:
+        """The files with line numbers, source first, cut to half the model's context"""
+        budget = self.llm.get_context_window_size() * CHARS_PER_TOKEN // 2
+        ordered = sorted(files, key=lambda f: (PurePosixPath(f).suffix not in SOURCE_SUFFIXES, f))
+        shown, omitted = ordered[:budget // MIN_FILE_CHARS], ordered[budget // MIN_FILE_CHARS:]
+        texts = {
+            filename: "\n".join(
+                f"{number:>4}| {line}" for number, line in enumerate(files[filename].splitlines(), 1)
+            )
+            for filename in shown
+        }
+        # Smallest first, each taking at most an even split of what is left,
+        # so one large file does not crowd out the rest
+        for index, filename in enumerate(sorted(shown, key=lambda f: len(texts[f]))):
+            share = budget // (len(shown) - index)
+            if len(texts[filename]) > share:
+                texts[filename] = texts[filename][:share].rsplit("\n", 1)[0] + "\n    ... (truncated)"
+            budget -= len(texts[filename])
+        parts = [f"--- {filename}\n{texts[filename]}" for filename in shown]
+        if omitted:
+            parts.append(f"--- not shown: {', '.join(omitted)}")
+        return "\n".join(parts)
+    
+    async def rewrite_file(self, filename: str, content: str, fix: Any, reason: str) -> str:
+        """Apply a fix that did not apply as a patch by rewriting the whole file"""
+        
+        task = Task(
+            description=f"""
+            This fix for {filename} could not be applied ({reason}):
+            {fix if isinstance(fix, str) else json.dumps(fix)}
+            
+            Current file content:
+            {content}
+            
+            Make the change the fix intended and nothing else.
+            Return the complete corrected file content as a string.
+            """,
+            agent=self.agent,
+            expected_output="Complete corrected file content"
+        )
+        
+        result = await run_task(self.agent, task, check=source_output(filename, fenced=True))
+        return strip_code_fence(result).rstrip() + "\n"
+    
     def _create_default_tests(self) -> Dict[str, Any]:
         """Create default integration tests"""
         
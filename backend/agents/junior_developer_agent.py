@@ -20,48 +20,61 @@ class JuniorDeveloperAgent:
 from crewai import Agent, Task
 from langchain_ollama import OllamaLLM
 from backend.config import settings
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
 
+from backend.utils.crew_runner import run_task
+from backend.utils.model_cascade import source_output, strip_code_fence
+from backend.utils.prompts import task_prompt
+
 class JuniorDeveloperAgent:
     def __init__(self, agent_id: int):
         self.agent_id = agent_id
         self.llm = create_llm("junior_developer")
 
-        
+        # The same persona for every pool member, so their prompts share a cached prefix
         self.agent = Agent(
-            role=f"Junior Developer {agent_id}",
+            role="Junior Developer",
             goal="Implement specific modules and helper functions",
-            backstory=f"""You are junior developer #{agent_id} specializing in implementing 
+            backstory="""You are a junior developer specializing in implementing 
             specific features and modules. You write clean, well-documented code following 
             best practices.""",
             llm=self.llm,
             verbose=True
         )
     
-    def implement_module(self, subtask: Dict[str, Any]) -> Dict[str, str]:
-        """Implement a specific module or feature"""
+    async def implement_module(self, subtask: Dict[str, Any], examples: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Implement a specific module or feature.
+
+        ``examples``: similar modules of earlier projects, ``{filename: content}``.
+        """
+        
+        inputs = {
+            f"Similar module from an earlier project ({name})": content[:settings.MODULE_EXAMPLE_MAX_CHARS]
+            for name, content in (examples or {}).items()
+        }
+        inputs["File"] = subtask.get('file', 'module.py')
+        inputs["Task"] = subtask.get('description', 'Implement module')
         
         task = Task(
-            description=f"""
-            Implement this specific module:
-            
-            File: {subtask.get('file', 'module.py')}
-            Task: {subtask.get('description', 'Implement module')}
+            description=task_prompt("""
+            Implement the module specified below.
             
             Requirements:
             1. Write complete, working code
             2. Include proper error handling
             3. Add docstrings and comments
             4. Follow Python best practices
+            5. If a similar module from an earlier project is shown, adapt it to this task
             
             Return the complete file content as a string.
-            """,
+            """, inputs),
             agent=self.agent,
             expected_output="Complete Python file content"
         )
         
-        result = task.execute()
+        filename = subtask.get('file', f'module_{self.agent_id}.py')
+        result = await run_task(self.agent, task, check=source_output(filename))
         
         # Clean up the result
         code = result.strip()
@@ -69,9 +82,33 @@ class JuniorDeveloperAgent:
             # Add a basic module docstring if missing
             code = f'"""\nModule: {subtask.get("file", "module.py")}\nDescription: {subtask.get("description", "Module implementation")}\n"""\n\n' + code
         
-        return {subtask.get('file', f'module_{self.agent_id}.py'): code}
+        return {filename: code}
+    
+    async def repair_file(self, filename: str, content: str, issues: List[Dict[str, Any]]) -> str:
+        """Fix the problems static validation found in a single file"""
+        
+        problems = "\n".join(
+            f"- line {issue.get('line') or '?'}: {issue['message']}" for issue in issues
+        )
+        
+        task = Task(
+            description=task_prompt("""
+            Fix the listed problems in the file below.
+            Change only what is needed to fix the listed problems.
+            Return the complete corrected file content as a string.
+            """, {
+                "File": filename,
+                "Problems": problems,
+                "Current file content": content,
+            }),
+            agent=self.agent,
+            expected_output="Complete corrected file content"
+        )
+        
+        result = await run_task(self.agent, task, check=source_output(filename, fenced=True))
+        return strip_code_fence(result).rstrip() + "\n"
     
-    def implement_helper_functions(self, project_type: str) -> Dict[str, str]:
+    async def implement_helper_functions(self, project_type: str) -> Dict[str, str]:
         """Implement helper functions based on project type"""
         
         helpers = {}
@@ -91,7 +128,7 @@ class JuniorDeveloperAgent:
                 expected_output="Python code with helper functions"
             )
             
-            result = task.execute()
+            result = await run_task(self.agent, task, check=source_output("ml_helpers.py"))
             helpers["ml_helpers.py"] = result
             
         elif project_type == "web_app":
@@ -109,7 +146,7 @@ class JuniorDeveloperAgent:
                 expected_output="Python code with helper functions"
             )
             
-            result = task.execute()
+            result = await run_task(self.agent, task, check=source_output("web_helpers.py"))
             helpers["web_helpers.py"] = result
         
         return helpers
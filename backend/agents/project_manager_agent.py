@@ -2,10 +2,13 @@ from crewai import Agent, Task, Crew
 from langchain_ollama import OllamaLLM
 from backend.config import settings
 from backend.models import ProjectPlan, Task as ProjectTask
+from typing import List
 import uuid
 import json
 
 from backend.utils.llm_factory import create_llm
+from backend.utils.crew_runner import run_task
+from backend.utils.model_cascade import json_output
 
 class ProjectManagerAgent:
     def __init__(self):
@@ -35,15 +38,7 @@ class ProjectManagerAgent:
             expected_output="JSON formatted project plan"
         )
 
-        # Run using Crew (without await)
-        crew = Crew(
-            agents=[self.agent],
-            tasks=[task]
-        )
-        result = crew.kickoff()  # Remove await
-
-        # Extract the raw output from CrewOutput object
-        output_text = str(result.raw) if hasattr(result, 'raw') else str(result)
+        output_text = await run_task(self.agent, task, check=json_output(dict, ("tasks",)))
 
         try:
             data = json.loads(output_text)
@@ -71,4 +66,54 @@ class ProjectManagerAgent:
             tasks=project_tasks,
             architecture=strategy["architecture"],
             tech_stack=strategy["tech_stack"]
-        )
\ No newline at end of file
+        )
+
+    async def revise_project_plan(self, strategy: dict, plan: ProjectPlan,
+                                  added: List[str], removed: List[str]) -> ProjectPlan:
+        """Update an existing plan for added and removed requirements"""
+        existing = [
+            {"title": t.title, "description": t.description, "assigned_to": t.assigned_to,
+             "dependencies": t.dependencies}
+            for t in plan.tasks
+        ]
+        task = Task(
+            description=f"""
+            Update this project plan for changed requirements:
+            Current tasks: {json.dumps(existing)}
+            Added requirements: {json.dumps(added)}
+            Removed requirements: {json.dumps(removed)}
+            Keep every task that is still needed exactly as it is (same title and description),
+            drop tasks that only served removed requirements and add tasks for the new ones.
+            Format as JSON with keys: tasks (list of title, description, assigned_to, dependencies, estimated_hours)
+            """,
+            agent=self.agent,
+            expected_output="JSON formatted project plan"
+        )
+
+        output_text = await run_task(self.agent, task, check=json_output(dict, ("tasks",)))
+
+        try:
+            tasks = json.loads(output_text)["tasks"]
+        except Exception:
+            # Keep the plan, drop tasks naming a removed requirement, add one per new requirement
+            tasks = [
+                t for t in existing
+                if not any(r.lower() in f"{t['title']} {t['description']}".lower() for r in removed)
+            ]
+            tasks += [
+                {"title": f"Implement {r}", "description": r, "assigned_to": "junior_dev", "dependencies": []}
+                for r in added
+            ]
+
+        return plan.model_copy(update={
+            "tasks": [
+                ProjectTask(
+                    id=str(uuid.uuid4()),
+                    title=t["title"],
+                    description=t["description"],
+                    assigned_to=t["assigned_to"],
+                    dependencies=t.get("dependencies", [])
+                )
+                for t in tasks
+            ]
+        })
@@ -2,10 +2,14 @@ from crewai import Agent, Task, Crew
 from langchain_ollama import OllamaLLM
 from backend.config import settings
 from backend.models import ProjectPlan, Task as ProjectTask
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
 
 from backend.utils.llm_factory import create_llm
+from backend.utils.crew_runner import run_task
+from backend.utils.template_registry import template_registry
+from backend.utils.prompts import task_prompt
+from backend.utils.model_cascade import json_output
 
 class SeniorDeveloperAgent:
     def __init__(self):
@@ -22,15 +26,17 @@ class SeniorDeveloperAgent:
             verbose=True
         )
     
-    async def implement_core_architecture(self, project_plan: Dict[str, Any]) -> Dict[str, str]:
-        """Implement core architecture and main components"""
+    async def implement_core_architecture(self, project_plan: Dict[str, Any],
+                                          provided_files: Optional[List[str]] = None,
+                                          template_params: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """Implement core architecture and main components.
+
+        ``template_params`` fill the templates the fallback structure uses.
+        """
         
         task = Task(
-            description=f"""
-            Implement the core architecture for this project:
-            
-            Tech Stack: {', '.join(project_plan['tech_stack'])}
-            Architecture: {json.dumps(project_plan['architecture'])}
+            description=task_prompt("""
+            Implement the core architecture for the project described below.
             
             Create:
             1. Main application entry point
@@ -39,62 +45,54 @@ class SeniorDeveloperAgent:
             4. Main API structure (if web app)
             5. Project structure setup
             
+            Do not generate the files listed as provided from templates.
             Return complete, production-ready code for each file.
             Format as JSON with filename as key and code as value.
-            """,
+            """, {
+                "Provided from templates": ', '.join(provided_files or []) or "none",
+                "Tech Stack": ', '.join(project_plan['tech_stack']),
+                "Architecture": json.dumps(project_plan['architecture']),
+            }),
             agent=self.agent,
             expected_output="JSON with filenames and code"
         )
         
-        # Use Crew to execute the task
-        crew = Crew(
-            agents=[self.agent],
-            tasks=[task]
-        )
-        result = crew.kickoff()  # Synchronous call
-        
-        # Extract the raw output
-        output_text = str(result.raw) if hasattr(result, 'raw') else str(result)
+        output_text = await run_task(self.agent, task, check=json_output(dict))
         
         try:
             files = json.loads(output_text)
         except:
             # Fallback implementation
-            files = self._generate_default_structure(project_plan)
+            files = self._generate_default_structure(project_plan, template_params)
         
         return files
     
-    def delegate_subtasks(self, tasks: List[ProjectTask]) -> List[Dict[str, Any]]:
+    async def delegate_subtasks(self, tasks: List[ProjectTask]) -> List[Dict[str, Any]]:
         """Break down tasks for junior developers"""
         
         subtasks = []
         for task in tasks:
             if task.assigned_to.startswith("junior_dev"):
                 subtask = Task(
-                    description=f"""
-                    Create a detailed implementation plan for:
-                    Task: {task.title}
-                    Description: {task.description}
+                    description=task_prompt("""
+                    Create a detailed implementation plan for the task below.
                     
-                    Break this into 2-3 specific coding tasks with:
+                    Break it into 2-3 specific coding tasks with:
                     - File to create/modify
                     - Functions/classes to implement
                     - Clear specifications
                     
                     Format as JSON array of subtasks.
-                    """,
+                    """, {
+                        "Task": task.title,
+                        "Description": task.description,
+                    }),
                     agent=self.agent,
                     expected_output="JSON array of subtasks"
                 )
                 
-                # Use Crew to execute
-                crew = Crew(
-                    agents=[self.agent],
-                    tasks=[subtask]
-                )
-                result = crew.kickoff()  # Synchronous call
-                
-                output_text = str(result.raw) if hasattr(result, 'raw') else str(result)
+                output_text = await run_task(self.agent, subtask, check=json_output(list))
+                start = len(subtasks)
                 
                 try:
                     task_breakdown = json.loads(output_text)
@@ -105,61 +103,24 @@ class SeniorDeveloperAgent:
                         "description": task.description,
                         "assigned_to": task.assigned_to
                     })
+                
+                # Remember the plan task behind each subtask (used by revisions)
+                for item in subtasks[start:]:
+                    if isinstance(item, dict):
+                        item.setdefault("task_id", task.id)
         
         return subtasks
     
-    def _generate_default_structure(self, project_plan: Dict[str, Any]) -> Dict[str, str]:
+    def _generate_default_structure(self, project_plan: Dict[str, Any],
+                                    template_params: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
         """Generate default project structure"""
         # Keep the existing implementation as is
         files = {}
         
-        # Main FastAPI app
-        files["main.py"] = """from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
-import uvicorn
-
-app = FastAPI(title="Generated Project")
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-class RequestModel(BaseModel):
-    data: str
-    options: Optional[dict] = {}
-
-class ResponseModel(BaseModel):
-    status: str
-    result: Optional[dict] = None
-    error: Optional[str] = None
-
-@app.get("/")
-async def root():
-    return {"message": "API is running"}
-
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
-
-@app.post("/process", response_model=ResponseModel)
-async def process_data(request: RequestModel):
-    try:
-        # Process the request
-        result = {"processed": request.data}
-        return ResponseModel(status="success", result=result)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-"""
+        # Main FastAPI app, unless an override manifest disabled its template
+        skeleton = template_registry.get("fastapi-skeleton")
+        if skeleton is not None:
+            files["main.py"] = template_registry.render(skeleton, template_params)
         
         # Keep rest of the default structure generation as is...
         # (Include all the other files like requirements.txt, index.html, etc.)
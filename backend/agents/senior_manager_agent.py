@@ -5,6 +5,11 @@ from backend.models import ProjectRequest
 import json
 
 from backend.utils.llm_factory import create_llm
+from backend.utils.crew_runner import run_task
+from backend.utils.model_cascade import json_output
+
+STRATEGY_KEYS = ("vision", "goals", "architecture", "tech_stack", "modules", "risks")
+
 
 class SeniorManagerAgent:
     def __init__(self):
@@ -34,15 +39,7 @@ class SeniorManagerAgent:
             expected_output="JSON formatted project strategy"
         )
 
-        # Create a Crew and run the task (without await - kickoff is synchronous)
-        crew = Crew(
-            agents=[self.agent],
-            tasks=[task]
-        )
-        result = crew.kickoff()  # Remove await - kickoff() is synchronous
-
-        # Extract the raw output from CrewOutput object
-        output_text = str(result.raw) if hasattr(result, 'raw') else str(result)
+        output_text = await run_task(self.agent, task, check=json_output(dict, STRATEGY_KEYS))
 
         try:
             strategy = json.loads(output_text)
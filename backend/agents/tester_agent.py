@@ -5,6 +5,8 @@ from typing import Dict, Any
 import json
 
 from backend.utils.llm_factory import create_llm
+from backend.utils.crew_runner import run_task
+from backend.utils.model_cascade import json_output
 
 class FinalTesterAgent:
     def __init__(self):
@@ -32,11 +34,20 @@ class FinalTesterAgent:
             agent=self.agent,
             expected_output="JSON with validation results"
         )
-        result = crew.kickoff() 
+        result = await run_task(self.agent, task, check=json_output(dict, ("validation_results",)))
         try:
-            return json.loads(result)
+            validation = json.loads(result)
         except:
+            validation = None
+        # The last model of a cascade is used even when its output fails the check
+        if not isinstance(validation, dict):
             return self._create_default_validation(project_type)
+        additional_tests = validation.get("additional_tests")
+        validation["additional_tests"] = {
+            filename: content for filename, content in additional_tests.items()
+            if isinstance(filename, str) and isinstance(content, str)
+        } if isinstance(additional_tests, dict) else {}
+        return validation
 
     def _create_default_validation(self, project_type: str) -> Dict[str, Any]:
         """Fallback default validation"""
@@ -1,15 +1,31 @@
 import os
-from typing import Dict
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
 class Settings(BaseSettings):
     # Ollama configuration
     OLLAMA_BASE_URL: str = "http://localhost:11434"
+    # Ollama servers to spread LLM calls over; empty means just OLLAMA_BASE_URL
+    OLLAMA_BACKENDS: List[str] = []
+    BACKEND_HEALTH_SECONDS: int = 10
+    BACKEND_EJECT_FAILURES: int = 3  # consecutive failures before a backend is ejected
+    BACKEND_READMIT_SECONDS: int = 30  # minimum time out of rotation
+    BACKEND_COLD_PENALTY: int = 2  # outstanding requests a cold model load is worth
+    # Outstanding requests worth staying on the backend whose KV cache holds
+    # the agent's prompt prefix (0 disables)
+    BACKEND_PREFIX_AFFINITY: int = 1
+
+    # Hedged requests: duplicate slow calls of these agents on a second backend
+    HEDGE_ENABLED: bool = False
+    HEDGE_AGENTS: List[str] = ["senior_manager", "project_manager"]
+    HEDGE_PERCENTILE: float = 95  # of the agent's recent call latency
+    HEDGE_MIN_DELAY_SECONDS: float = 5.0
+    HEDGE_DEFAULT_DELAY_SECONDS: float = 120.0  # until latency history exists
     
     # Model configurations with extended timeouts
-    MODEL_TIMEOUT: int = 1200  # 20 minutes default
-    MODEL_MAX_TIMEOUT: int = 1800  # 30 minutes max
+    MODEL_TIMEOUT: int = 1200  # first-token wait before any latency history exists
+    MODEL_MAX_TIMEOUT: int = 1800  # ceiling for any single LLM call
     
     # Model mappings
     MODELS: Dict[str, str] = {
@@ -18,6 +34,10 @@ class Settings(BaseSettings):
         "codellama": "ollama/codellama:7b"
     }
     
+    # Per agent, MODELS keys to try (cheapest first) before its assigned model;
+    # output failing the call's schema / static checks escalates to the next
+    MODEL_CASCADES: Dict[str, List[str]] = {}
+    
     # Agent model assignments
     AGENT_MODELS: Dict[str, str] = {
         "senior_manager": "mistral",
@@ -34,6 +54,137 @@ class Settings(BaseSettings):
     GENERATED_DIR: str = "generated"
     MAX_RETRIES: int = 3
 
+    # Package archives: "zip", "zip-store", "tar.gz" or "tar.zst" (needs zstandard)
+    PACKAGE_FORMAT: str = "zip"
+    PACKAGE_ZSTD_LEVEL: int = 3
+    PACKAGE_GZIP_LEVEL: int = 6
+
+    # Retention / disk quota for GENERATED_DIR (0 disables a limit)
+    GC_ENABLED: bool = True
+    GC_INTERVAL_SECONDS: int = 600
+    GC_MAX_AGE_HOURS: float = 168  # 7 days
+    GC_MAX_TOTAL_BYTES: int = 10 * 1024 * 1024 * 1024  # 10 GB
+    GC_KEEP_ZIP_DROP_TREE: bool = True
+    GC_TREE_RETENTION_HOURS: float = 24
+
+    # Admission control for /assign_project
+    MAX_CONCURRENT_PROJECTS: int = 2
+    MAX_QUEUED_PROJECTS: int = 8
+    MAX_LLM_BACKLOG_SECONDS: int = 4 * 3600  # 0 disables the backlog check
+    ADMISSION_DEFAULT_RUN_SECONDS: int = 1200  # prior until runs are observed
+    ADMISSION_HISTORY_SIZE: int = 50
+
+    # Weighted fair scheduling of pipeline slots and LLM calls
+    CLIENT_KEY_HEADER: str = "X-Client-Key"
+    PRIORITY_WEIGHTS: Dict[str, float] = {"low": 1, "normal": 2, "high": 4}
+    # Relative pipeline cost per project type (larger = longer run)
+    PROJECT_TYPE_COSTS: Dict[str, float] = {
+        "data_analysis": 1,
+        "web_app": 2,
+        "ai_ml": 2,
+        "full_stack": 4
+    }
+    # LLM calls in flight per healthy Ollama backend; the fair scheduler's
+    # capacity is this times the backends currently in rotation
+    MAX_CONCURRENT_LLM_CALLS: int = 1
+
+    # Seconds DELETE /project/{id} waits for the pipeline to unwind
+    CANCEL_GRACE_SECONDS: float = 5
+
+    # Static validation before the LLM test phases
+    VALIDATION_WORKERS: int = 0  # 0 = one process per CPU
+    MAX_REPAIR_FILES: int = 10
+
+    # Integration test fixes arrive as edits or diffs (see backend/utils/patching.py)
+    PATCH_FUZZ_RATIO: float = 0.9  # similarity needed to apply an edit that does not match exactly
+    PATCH_MIN_REWRITE_RATIO: float = 0.5  # shorter whole-file rewrites are treated as truncated
+    PATCH_REWRITE_FALLBACK: bool = True  # ask for the whole file when a fix does not apply
+
+    # Sandboxed execution of generated test suites. Off by default: the
+    # suites are LLM-written code (see "Running generated tests" in the README)
+    TEST_RUNNER_ENABLED: bool = False
+    # "bwrap": every test file runs under bubblewrap with no network, a
+    # read-only root and an unprivileged uid; "none": limits only, trusted hosts
+    TEST_ISOLATION: str = "bwrap"
+    TEST_SANDBOX_UID: int = 65534  # nobody
+    TEST_SANDBOX_GID: int = 65534
+    TEST_RUNNER_WORKERS: int = 0  # 0 = one per CPU
+    TEST_WARM_POOL: bool = True  # pre-forked interpreters (POSIX, TEST_ISOLATION=none only)
+    TEST_TIMEOUT_SECONDS: int = 120
+    TEST_CPU_SECONDS: int = 60
+    TEST_MEMORY_MB: int = 1024
+
+    # Shared agent pools, resized at runtime between min and max
+    AGENT_POOL_SIZES: Dict[str, Dict[str, int]] = {
+        "junior_developer": {"min": 1, "initial": 5, "max": 8},
+        "integrator": {"min": 1, "initial": 2, "max": 4},
+    }
+    INTEGRATION_PASSES: int = 2  # independent integrator reviews per project
+    AGENT_POOL_AUTOSCALE: bool = True
+    AGENT_POOL_ADJUST_SECONDS: int = 30
+    AGENT_POOL_MAX_QUEUE_DELAY: float = 10.0  # median LLM slot wait before shrinking
+    AGENT_POOL_LATENCY_TOLERANCE: float = 0.25  # growth allowed while p50 <= best * 1.25
+    LATENCY_WINDOW: int = 50  # recent samples kept per latency series
+
+    # Span traces of pipeline runs, generated/<id>.trace.jsonl (see backend/utils/tracing.py)
+    TRACING_ENABLED: bool = True
+
+    # Event-loop lag and blocking-call detection (see /metrics "event_loop")
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.25  # capture the stack once blocked this long
+    LOOP_BLOCK_INCIDENTS: int = 20
+    LOOP_BLOCK_STACK_DEPTH: int = 25
+
+    # Sampling profiles of pipeline runs (see backend/utils/profiler.py)
+    PROFILING_ENABLED: bool = False  # profile every run, not only opted-in ones
+    PROFILE_HEADER: str = "X-Profile"  # "1"/"true" on a submission profiles that run
+    PROFILE_INTERVAL_SECONDS: float = 0.01
+
+    # Hashed frontend URLs never change content, so clients may keep them this long
+    STATIC_MAX_AGE_SECONDS: int = 31536000
+
+    # Model warm-up and residency (see /ready)
+    MODEL_WARMUP_ENABLED: bool = True
+    MODEL_PROBE_SECONDS: int = 30
+    MODEL_PROBE_TIMEOUT: float = 3.0
+    MODEL_KEEP_ALIVE_BUSY: str = "30m"  # while projects are running or queued
+    MODEL_KEEP_ALIVE_IDLE: str = "5m"
+
+    # Adaptive timeouts (see backend/utils/adaptive_timeouts.py)
+    TIMEOUT_MULTIPLIER: float = 3.0  # headroom over the expected duration
+    TIMEOUT_MIN_SAMPLES: int = 5  # history needed before leaving the defaults
+    LLM_STALL_SECONDS: int = 60  # max gap between streamed tokens
+    LLM_STALL_RETRIES: int = 1
+    LLM_FIRST_TOKEN_MIN_SECONDS: int = 30
+    LLM_CALL_MIN_SECONDS: int = 120
+    PHASE_TIMEOUT_MIN_SECONDS: int = 60
+    PHASE_TIMEOUT_MAX_SECONDS: int = 3600
+    # Cold-start phase timeouts, used until a phase has enough history
+    PHASE_TIMEOUT_DEFAULTS: Dict[str, int] = {
+        "strategy": 300,
+        "planning": 300,
+        "core_development": 600,
+        "module": 400,
+        "integration": 400,
+        "repair": 400,
+        "integration_testing": 600,
+        "final_testing": 600,
+        "delivery": 300,
+    }
+
+    # Template-first generation of boilerplate files
+    TEMPLATES_ENABLED: bool = True
+    TEMPLATE_OVERRIDE_DIR: str = "templates"  # manifest.json here overrides built-ins
+
+    # Index of validated modules from earlier projects (needs numpy)
+    MODULE_INDEX_ENABLED: bool = True
+    MODULE_REUSE_SIMILARITY: float = 0.92  # reuse a past module as is from this cosine similarity
+    MODULE_EXAMPLE_SIMILARITY: float = 0.45  # show it to the junior developer as an example
+    MODULE_EXAMPLE_MAX_CHARS: int = 2400  # the example shares num_ctx with the task
+    MODULE_INDEX_MAX_ENTRIES: int = 20000  # oldest entries go first
+    MODULE_INDEX_ANN_MIN_ENTRIES: int = 5000  # approximate (LSH) search from this size
+
     # 🔹 Server config (with alias to match .env uppercase keys)
     api_host: str = Field("0.0.0.0", alias="API_HOST")
     api_port: int = Field(8000, alias="API_PORT")
@@ -1,172 +1,926 @@
 ### 11. Crew Manager (`backend/crew/crew_manager.py`)
 
 
-from crewai import Crew, Process
-from backend.agents.senior_manager_agent import SeniorManagerAgent
-from backend.agents.project_manager_agent import ProjectManagerAgent
-from backend.agents.senior_developer_agent import SeniorDeveloperAgent
-from backend.agents.junior_developer_agent import JuniorDeveloperAgent
-from backend.agents.integrator_agent import IntegratorAgent
-from backend.agents.integrator_tester_agent import IntegratorTesterAgent
-from backend.agents.tester_agent import FinalTesterAgent 
-from backend.agents.delivery_agent import DeliveryAgent
-from backend.models import ProjectRequest, ProjectResponse
+from backend.models import ProjectPlan, ProjectRequest, ProjectResponse
 from backend.utils.file_manager import FileManager
+from backend.utils.artifact_store import ArtifactStore
 from backend.utils.project_packager import ProjectPackager
-from typing import Dict, Any
+from backend.config import settings
+from backend.utils.static_validator import StaticValidator
+from backend.utils.sandbox_runner import SandboxTestRunner
+from backend.utils.template_registry import template_registry
+from backend.utils.module_index import module_index
+from backend.utils.agent_pool import AgentPool, shared_pool
+from backend.utils.adaptive_timeouts import PhaseClock, adaptive_timeouts, estimate_tokens, phase_clock
+from backend.utils.run_context import RunCancelled, RunContext, current_run
+from backend.utils.profiler import run_profiler
+from backend.utils.tracing import tracer
+from backend.utils.patching import PatchConflict, apply_fix
+from backend.utils.project_state import (
+    CORE, INTEGRATION, REPORT, TEMPLATE, TESTS, ProjectStateStore,
+    affected_tasks, diff_requests, match_tasks,
+)
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from collections import ChainMap
 import uuid
+from pathlib import PurePosixPath
 import asyncio
+import threading
+import time
 from datetime import datetime
+from functools import cached_property
 import logging
 
 logger = logging.getLogger(__name__)
 
+AGENT_ATTRIBUTES = (
+    "senior_manager", "project_manager", "senior_developer", "junior_developers",
+    "integrators", "integrator_tester", "final_tester", "delivery_agent",
+)
+
 class CrewManager:
     def __init__(self):
         self.file_manager = FileManager()
         self.project_packager = ProjectPackager()
+        self.static_validator = StaticValidator()
+        self.test_runner = SandboxTestRunner()
+        self.project_state = ProjectStateStore()
         
-        # Initialize all agents
-        self.senior_manager = SeniorManagerAgent()
-        self.project_manager = ProjectManagerAgent()
-        self.senior_developer = SeniorDeveloperAgent()
-        self.junior_developers = [JuniorDeveloperAgent(i) for i in range(1, 6)]
-        self.integrators = [IntegratorAgent(i) for i in range(1, 3)]
-        self.integrator_tester = IntegratorTesterAgent()
-        self.final_tester = FinalTesterAgent()
-        self.delivery_agent = DeliveryAgent()
-    
-    async def execute_project(self, project_request: ProjectRequest) -> ProjectResponse:
+        # Projects currently inside execute_project (protected from cleanup)
+        self.running_projects = set()
+        self.runs: Dict[str, RunContext] = {}
+        self._agents_lock = threading.Lock()
+    
+    def _build_agents(self):
+        with self._agents_lock:
+            for name in AGENT_ATTRIBUTES:
+                getattr(self, name)
+    
+    async def ensure_agents(self):
+        """Build all agents off the event loop (first call imports crewai)"""
+        await asyncio.to_thread(self._build_agents)
+    
+    # Agents (and crewai, langchain and litellm with them) are only imported
+    # and built when a project first needs them, so the API starts serving
+    # without paying for the whole agent stack
+    
+    @cached_property
+    def senior_manager(self):
+        from backend.agents.senior_manager_agent import SeniorManagerAgent
+        return SeniorManagerAgent()
+    
+    @cached_property
+    def project_manager(self):
+        from backend.agents.project_manager_agent import ProjectManagerAgent
+        return ProjectManagerAgent()
+    
+    @cached_property
+    def senior_developer(self):
+        from backend.agents.senior_developer_agent import SeniorDeveloperAgent
+        return SeniorDeveloperAgent()
+    
+    @cached_property
+    def junior_developers(self) -> AgentPool:
+        from backend.agents.junior_developer_agent import JuniorDeveloperAgent
+        return shared_pool("junior_developer", JuniorDeveloperAgent)
+    
+    @cached_property
+    def integrators(self) -> AgentPool:
+        from backend.agents.integrator_agent import IntegratorAgent
+        return shared_pool("integrator", IntegratorAgent)
+    
+    @cached_property
+    def integrator_tester(self):
+        from backend.agents.integrator_tester_agent import IntegratorTesterAgent
+        return IntegratorTesterAgent()
+    
+    @cached_property
+    def final_tester(self):
+        from backend.agents.tester_agent import FinalTesterAgent
+        return FinalTesterAgent()
+    
+    @cached_property
+    def delivery_agent(self):
+        from backend.agents.delivery_agent import DeliveryAgent
+        return DeliveryAgent()
+    
+    def _begin_run(self, project_id: str, client_key: str, priority: str, profile: bool = False) -> RunContext:
+        self.running_projects.add(project_id)
+        # Lets the LLM layer attribute every call to this client and priority,
+        # and abort it when the project is cancelled
+        run = RunContext(
+            project_id=project_id,
+            client_key=client_key,
+            priority=priority,
+            loop=asyncio.get_running_loop()
+        )
+        self.runs[project_id] = run
+        current_run.set(run)
+        run.trace = tracer.start_trace(project_id, "project", {"client.key": client_key, "project.priority": priority})
+        if run_profiler.wanted(profile):
+            run_profiler.start(run)
+        return run
+    
+    def _end_run(self, project_id: str):
+        self.running_projects.discard(project_id)
+        run = self.runs.pop(project_id, None)
+        if run is not None and run.profiled:
+            run_profiler.stop(project_id)
+        if run is not None:
+            tracer.end_trace(run.trace, "cancelled" if run.cancelled.is_set() else None)
+    
+    def _phase(self, title: str):
+        """Log the start of a pipeline phase and open its span"""
+        logger.info(title)
+        run = current_run.get()
+        tracer.phase(title, run.trace if run else None)
+    
+    async def execute_project(
+        self,
+        project_request: ProjectRequest,
+        client_key: str = "anonymous",
+        project_id: Optional[str] = None,
+        profile: bool = False
+    ) -> ProjectResponse:
         """Execute the entire project workflow"""
         
-        project_id = str(uuid.uuid4())
+        project_id = project_id or str(uuid.uuid4())
         logger.info(f"Starting project execution: {project_id}")
+        run = self._begin_run(project_id, client_key, project_request.priority.value, profile)
         
         try:
+            await self.ensure_agents()
+            
             # Phase 1: Strategy and Planning
-            logger.info("Phase 1: Strategy and Planning")
-            strategy = await self._run_with_timeout(
+            self._phase("Phase 1: Strategy and Planning")
+            strategy = await self._run_phase(
+                "strategy",
                 self.senior_manager.analyze_project(project_request),
-                timeout=300
+                size=estimate_tokens([project_request.description, project_request.requirements])
             )
             
-            project_plan = await self._run_with_timeout(
+            project_plan = await self._run_phase(
+                "planning",
                 self.project_manager.create_project_plan(strategy, project_id),
-                timeout=300
+                size=estimate_tokens(strategy)
             )
             
+            # Boilerplate that templates cover is filled locally, not generated
+            templates = self._select_templates(project_request, project_plan)
+            owned = {out: content for out, (spec, content) in templates.items() if spec.mode == "owned"}
+            template_report = {
+                "templates": [spec.describe() for spec, _ in templates.values()],
+                "skipped_subtasks": [],
+                "reused_modules": [],
+            }
+            # Which task or phase produced each file, so a revision knows what to redo
+            provenance: Dict[str, str] = {}
+            # Generated files are written as they arrive and held as handles
+            all_files = ArtifactStore(self.file_manager, project_id)
+            
             # Phase 2: Core Development
-            logger.info("Phase 2: Core Development")
-            core_files = await self._run_with_timeout(
-                self.senior_developer.implement_core_architecture(project_plan.dict()),
-                timeout=600
+            self._phase("Phase 2: Core Development")
+            await self._develop_core(project_request, project_plan, templates, owned, all_files, provenance)
+            
+            # Phase 3: Module Development (Junior Developers)
+            self._phase("Phase 3: Module Development")
+            subtasks = await self.senior_developer.delegate_subtasks(project_plan.tasks)
+            await self._develop_modules(run.client_key, subtasks, owned, template_report, all_files, provenance)
+            
+            # Phase 4: Integration
+            self._phase("Phase 4: Integration")
+            await self._integrate(project_request, all_files, owned, provenance)
+            
+            validation_cache = await self._check_and_deliver(project_id, project_request, all_files, provenance)
+            await self._index_modules(project_id, run.client_key, subtasks, all_files, validation_cache)
+            
+            # How much generation the templates and reused modules took off the LLM
+            template_report["llm_calls_saved"] = (
+                len(template_report["skipped_subtasks"]) + len(template_report["reused_modules"])
+            )
+            template_report["llm_calls_made"] = run.llm_calls
+            self.file_manager.save_json(project_id, "TEMPLATE_REPORT.json", template_report)
+            provenance["TEMPLATE_REPORT.json"] = REPORT
+            logger.info(
+                f"Templates filled {len(templates)} files and saved "
+                f"{template_report['llm_calls_saved']} LLM calls ({run.llm_calls} made)"
             )
             
-            # Save core files
-            for filename, content in core_files.items():
-                self.file_manager.save_file(project_id, filename, content)
+            # Create final package
+            self._phase("Creating final package")
+            zip_path = self.project_packager.create_package(project_id)
             
-            # Phase 3: Module Development (Junior Developers)
-            logger.info("Phase 3: Module Development")
-            subtasks = self.senior_developer.delegate_subtasks(project_plan.tasks)
-            
-            # Distribute subtasks among junior developers
-            all_module_files = {}
-            for i, subtask in enumerate(subtasks):
-                junior_dev = self.junior_developers[i % len(self.junior_developers)]
-                module_files = await self._run_with_timeout(
-                    junior_dev.implement_module(subtask),
-                    timeout=400
-                )
-                all_module_files.update(module_files)
+            self.project_state.save(project_id, {
+                "revision": 0,
+                "request": project_request.model_dump(mode="json"),
+                "strategy": strategy,
+                "plan": project_plan.model_dump(mode="json"),
+                "subtasks": subtasks,
+                "files": provenance,
+                "validation": validation_cache,
+                "updated_at": datetime.now().isoformat(),
+            })
             
-            # Save module files
-            for filename, content in all_module_files.items():
-                self.file_manager.save_file(project_id, filename, content)
+            return ProjectResponse(
+                project_id=project_id,
+                status="completed",
+                message="Project successfully generated and delivered",
+                download_url=f"/download/{project_id}",
+                created_at=datetime.now()
+            )
             
-            # Phase 4: Integration
-            logger.info("Phase 4: Integration")
-            all_files = {**core_files, **all_module_files}
-            
-            # Run both integrators in parallel
-            integration_tasks = []
-            for integrator in self.integrators:
-                task = self._run_with_timeout(
-                    integrator.integrate_components(all_files, project_request.project_type),
-                    timeout=400
+        except RunCancelled:
+            logger.info(f"Project execution cancelled: {project_id}")
+            return ProjectResponse(
+                project_id=project_id,
+                status="cancelled",
+                message="Project generation was cancelled",
+                created_at=datetime.now()
+            )
+        except Exception as e:
+            logger.error(f"Project execution failed: {str(e)}")
+            tracer.current().record_error(e)
+            return ProjectResponse(
+                project_id=project_id,
+                status="failed",
+                message=f"Project generation failed: {str(e)}",
+                created_at=datetime.now()
+            )
+        finally:
+            self._end_run(project_id)
+    
+    async def revise_project(
+        self,
+        project_id: str,
+        project_request: ProjectRequest,
+        client_key: str = "anonymous",
+        profile: bool = False
+    ) -> ProjectResponse:
+        """Regenerate only what a changed request affects.
+
+        The new request is diffed against the stored one. Requirement
+        changes revise the stored plan; a new title or description redoes
+        Phase 1. Tasks are matched to the old plan by title, and changed
+        or new tasks plus everything depending on them are regenerated;
+        the core architecture only when the strategy's architecture or tech
+        stack changed, integration only when the set of files changed.
+        Static validation reuses the stored analyses of unchanged files and
+        the LLM test phases look at the regenerated files only.
+        """
+        state = self.project_state.load(project_id)
+        if state is None:
+            raise FileNotFoundError(f"No stored state for project {project_id}")
+        changes = diff_requests(state["request"], project_request)
+        
+        if changes["project_type"]:
+            # Another project type changes templates, core and every module
+            logger.info(f"Project type changed, regenerating project {project_id}")
+            self.file_manager.delete_project(project_id)
+            return await self.execute_project(
+                project_request, client_key=client_key, project_id=project_id, profile=profile
+            )
+        
+        logger.info(f"Starting project revision: {project_id}")
+        run = self._begin_run(project_id, client_key, project_request.priority.value, profile)
+        
+        try:
+            if not any(changes.values()):
+                return ProjectResponse(
+                    project_id=project_id,
+                    status="completed",
+                    message="Nothing to revise: the request is unchanged",
+                    download_url=f"/download/{project_id}",
+                    created_at=datetime.now()
                 )
-                integration_tasks.append(task)
             
-            integration_results = await asyncio.gather(*integration_tasks)
+            await self.ensure_agents()
+            self._restore_tree(project_id)
+            provenance: Dict[str, str] = dict(state["files"])
+            all_files = ArtifactStore(self.file_manager, project_id)
+            await asyncio.to_thread(
+                all_files.adopt, [f for f, src in provenance.items() if src not in (TESTS, REPORT)]
+            )
+            before = all_files.hashes()
+            old_plan = ProjectPlan(**state["plan"])
             
-            # Merge integration files
-            for result in integration_results:
-                for filename, content in result.items():
-                    self.file_manager.save_file(project_id, filename, content)
-                    all_files[filename] = content
+            # Phase 1: Strategy and Planning, as far as the request changed
+            self._phase("Phase 1: Revising Strategy and Plan")
+            strategy = state["strategy"]
+            if changes["title"] or changes["description"]:
+                strategy = await self._run_phase(
+                    "strategy",
+                    self.senior_manager.analyze_project(project_request),
+                    size=estimate_tokens([project_request.description, project_request.requirements])
+                )
+                project_plan = await self._run_phase(
+                    "planning",
+                    self.project_manager.create_project_plan(strategy, project_id),
+                    size=estimate_tokens(strategy)
+                )
+            else:
+                project_plan = await self._run_phase(
+                    "planning",
+                    self.project_manager.revise_project_plan(
+                        strategy, old_plan, changes["added_requirements"], changes["removed_requirements"]
+                    ),
+                    size=estimate_tokens(old_plan.dict())
+                )
             
-            # Phase 5: Integration Testing
-            logger.info("Phase 5: Integration Testing")
-            test_results = await self._run_with_timeout(
-                self.integrator_tester.test_integration(all_files),
-                timeout=600
+            task_changes = match_tasks(state["plan"]["tasks"], project_plan.tasks)
+            affected = affected_tasks(project_plan.tasks, task_changes["changed"] + task_changes["added"])
+            stale = affected | set(task_changes["removed"])
+            core_changed = any(
+                strategy.get(key) != state["strategy"].get(key) for key in ("architecture", "tech_stack")
+            )
+            logger.info(
+                f"Revision affects {len(affected)} of {len(project_plan.tasks)} tasks, "
+                f"{len(task_changes['removed'])} removed, core {'changed' if core_changed else 'kept'}"
             )
             
-            # Save test files and apply fixes
-            for filename, content in test_results.get('test_files', {}).items():
-                for filename, content in test_results.get('test_files', {}).items():
-                     self.file_manager.save_file(project_id, filename, content)
+            # Files of removed and affected tasks go; affected ones are regenerated below
+            for filename, source in list(provenance.items()):
+                if source in stale or (core_changed and source == CORE):
+                    provenance.pop(filename)
+                    all_files.discard(filename)
             
-            for filename, content in test_results.get('fixes', {}).items():
-                self.file_manager.save_file(project_id, filename, content)
-                all_files[filename] = content
+            templates = self._select_templates(project_request, project_plan)
+            owned = {out: content for out, (spec, content) in templates.items() if spec.mode == "owned"}
+            template_report = {
+                "templates": [spec.describe() for spec, _ in templates.values()],
+                "skipped_subtasks": [],
+                "reused_modules": [],
+            }
             
-            # Phase 6: Final Testing
-            logger.info("Phase 6: Final Testing")
-            validation_results = await self._run_with_timeout(
-                self.final_tester.final_validation(all_files, project_request.project_type),
-                timeout=600
+            # Phase 2: Core Development
+            if core_changed:
+                self._phase("Phase 2: Core Development")
+            await self._develop_core(
+                project_request, project_plan, templates, owned, all_files, provenance, generate=core_changed
             )
             
-            # Save additional test files
-            for filename, content in validation_results.get('additional_tests', {}).items():
-                self.file_manager.save_file(project_id, filename, content)
+            # Phase 3: Module Development for the affected tasks only
+            self._phase("Phase 3: Module Development")
+            subtasks = [s for s in state["subtasks"] if not (isinstance(s, dict) and s.get("task_id") in stale)]
+            new_subtasks = await self.senior_developer.delegate_subtasks(
+                [task for task in project_plan.tasks if task.id in affected]
+            )
+            subtasks += new_subtasks
+            await self._develop_modules(run.client_key, new_subtasks, owned, template_report, all_files, provenance)
             
-            # Phase 7: Delivery
-            logger.info("Phase 7: Delivery")
-            delivery_files = await self._run_with_timeout(
-                self.delivery_agent.prepare_delivery(project_id, all_files, validation_results),
-                timeout=300
+            # Phase 4: Integration, when files came or went
+            integrated = (
+                {f for f in all_files if provenance.get(f) != INTEGRATION}
+                != {f for f in before if state["files"].get(f) != INTEGRATION}
             )
+            if integrated:
+                self._phase("Phase 4: Integration")
+                for filename, source in list(provenance.items()):
+                    if source == INTEGRATION:
+                        provenance.pop(filename)
+                        all_files.discard(filename)
+                await self._integrate(project_request, all_files, owned, provenance)
             
-            # Save delivery files
-            for filename, content in delivery_files.items():
-                self.file_manager.save_file(project_id, filename, content)
+            regenerated, removed = await asyncio.to_thread(self._sync_files, project_id, before, all_files)
+            known = {
+                filename: cached["analysis"] for filename, cached in state.get("validation", {}).items()
+                if filename in all_files and cached["sha1"] == all_files.sha1(filename)
+            }
+            validation_cache = await self._check_and_deliver(
+                project_id, project_request, all_files, provenance, scope=regenerated, known=known
+            )
+            await self._index_modules(project_id, run.client_key, new_subtasks, all_files, validation_cache)
             
-            # Create final package
-            logger.info("Creating final package")
-            zip_path = self.project_packager.create_package(project_id)
+            revision = state.get("revision", 0) + 1
+            self.file_manager.save_json(project_id, "REVISION_REPORT.json", {
+                "revision": revision,
+                "request_changes": changes,
+                "tasks": {**task_changes, "affected": sorted(affected)},
+                "core_regenerated": core_changed,
+                "integration_rerun": integrated,
+                "files_regenerated": sorted(regenerated),
+                "files_removed": sorted(removed),
+                "modules_reused": template_report["reused_modules"],
+                "llm_calls": run.llm_calls,
+            })
+            provenance["REVISION_REPORT.json"] = REPORT
+            
+            self._phase("Repackaging revised project")
+            self.project_packager.create_package(project_id)
+            
+            self.project_state.save(project_id, {
+                **state,
+                "revision": revision,
+                "request": project_request.model_dump(mode="json"),
+                "strategy": strategy,
+                "plan": project_plan.model_dump(mode="json"),
+                "subtasks": subtasks,
+                "files": provenance,
+                "validation": validation_cache,
+                "updated_at": datetime.now().isoformat(),
+            })
             
             return ProjectResponse(
                 project_id=project_id,
                 status="completed",
-                message="Project successfully generated and delivered",
+                message=(
+                    f"Project revised: {len(regenerated)} files regenerated, {len(removed)} removed "
+                    f"({run.llm_calls} LLM calls)"
+                ),
                 download_url=f"/download/{project_id}",
                 created_at=datetime.now()
             )
-            
+        
+        except RunCancelled:
+            logger.info(f"Project revision cancelled: {project_id}")
+            return ProjectResponse(
+                project_id=project_id,
+                status="cancelled",
+                message="Project revision was cancelled",
+                created_at=datetime.now()
+            )
         except Exception as e:
-            logger.error(f"Project execution failed: {str(e)}")
+            logger.error(f"Project revision failed: {str(e)}")
+            tracer.current().record_error(e)
             return ProjectResponse(
                 project_id=project_id,
                 status="failed",
-                message=f"Project generation failed: {str(e)}",
+                message=f"Project revision failed: {str(e)}",
                 created_at=datetime.now()
             )
+        finally:
+            self._end_run(project_id)
+    
+    async def _develop_core(
+        self,
+        project_request: ProjectRequest,
+        project_plan: ProjectPlan,
+        templates: Dict[str, Any],
+        owned: Dict[str, str],
+        all_files: ArtifactStore,
+        provenance: Dict[str, str],
+        generate: bool = True
+    ):
+        """Phase 2: the core architecture, plus templates for what it and the tree lack"""
+        core_files: Dict[str, str] = {}
+        if generate:
+            core_files = await self._run_phase(
+                "core_development",
+                self.senior_developer.implement_core_architecture(
+                    project_plan.dict(), sorted(owned), self._template_params(project_request)
+                ),
+                size=estimate_tokens(project_plan.dict())
+            )
+            provenance.update(dict.fromkeys(core_files, CORE))
+        for out, (spec, content) in templates.items():
+            if spec.mode == "owned" or (out not in core_files and out not in all_files):
+                core_files[out] = content
+                provenance[out] = TEMPLATE
+        await all_files.put(core_files)
+    
+    async def _develop_modules(
+        self,
+        client_key: str,
+        subtasks: List[Any],
+        owned: Dict[str, str],
+        template_report: Dict[str, Any],
+        all_files: ArtifactStore,
+        provenance: Dict[str, str]
+    ):
+        """Phase 3: implement subtasks over the shared junior developer pool"""
+        pending = []
+        for subtask in subtasks:
+            target = self._subtask_file(subtask)
+            if target in owned:
+                template_report["skipped_subtasks"].append(target)
+                continue
+            pending.append(subtask)
+        
+        # Modules the client's earlier projects got right are reused as is, or shown as examples
+        suggestions = await asyncio.to_thread(lambda: [self._suggest_module(client_key, subtask) for subtask in pending])
+        generate = []
+        reused: Dict[str, str] = {}
+        for subtask, (match, examples) in zip(pending, suggestions):
+            if match is None:
+                generate.append((subtask, {example.filename: example.content for example in examples}))
+                continue
+            reused[subtask["file"]] = match.content
+            provenance[subtask["file"]] = subtask.get("task_id", CORE)
+            template_report["reused_modules"].append({
+                "file": subtask["file"],
+                "from": match.filename,
+                "project_id": match.project_id,
+                "similarity": match.score,
+            })
+        await all_files.put(reused)
+        
+        module_results = await self._gather_all([
+            self._pooled(
+                self.junior_developers,
+                lambda dev, subtask=subtask, examples=examples: dev.implement_module(subtask, examples),
+                "module",
+                size=estimate_tokens([subtask, examples])
+            )
+            for subtask, examples in generate
+        ])
+        for (subtask, _), module_files in zip(generate, module_results):
+            await all_files.put(module_files)
+            task_id = subtask.get("task_id", CORE) if isinstance(subtask, dict) else CORE
+            provenance.update(dict.fromkeys(module_files, task_id))
+    
+    def _suggest_module(self, client_key: str, subtask: Any):
+        """``module_index.suggest`` for a subtask that names its file and describes it"""
+        if not isinstance(subtask, dict) or not module_index.enabled:
+            return None, []
+        filename, description = subtask.get("file"), subtask.get("description")
+        if not isinstance(filename, str) or not isinstance(description, str):
+            return None, []
+        return module_index.suggest(client_key, filename, description)
+    
+    async def _index_modules(
+        self,
+        project_id: str,
+        client_key: str,
+        subtasks: List[Any],
+        all_files: ArtifactStore,
+        validation_cache: Dict[str, Dict[str, Any]]
+    ):
+        """Offer the modules that passed static validation to the client's later projects.
+
+        Only files unchanged since validation count: integration test fixes
+        may have rewritten them afterwards.
+        """
+        def collect():
+            if not module_index.enabled:
+                return 0
+            modules = []
+            for subtask in subtasks:
+                if not isinstance(subtask, dict):
+                    continue
+                filename, description = subtask.get("file"), subtask.get("description")
+                cached = validation_cache.get(filename) if isinstance(filename, str) else None
+                if cached is None or not isinstance(description, str) or filename not in all_files:
+                    continue
+                if cached.get("blocking", True) or cached["sha1"] != all_files.sha1(filename):
+                    continue
+                modules.append((filename, description, all_files[filename]))
+            return module_index.add(client_key, project_id, modules)
+        
+        try:
+            added = await asyncio.to_thread(collect)
+        except Exception as e:  # the project itself is done
+            logger.warning(f"Could not index the modules of {project_id}: {str(e)}")
+            return
+        if added:
+            logger.info(f"Indexed {added} modules of {project_id} for reuse")
+    
+    async def _integrate(
+        self,
+        project_request: ProjectRequest,
+        all_files: ArtifactStore,
+        owned: Dict[str, str],
+        provenance: Dict[str, str]
+    ):
+        """Phase 4: independent integration passes, in parallel as far as the pool allows"""
+        integration_results = await self._gather_all([
+            self._pooled(
+                self.integrators,
+                lambda integrator: integrator.integrate_components(
+                    all_files, project_request.project_type, self._template_params(project_request)
+                ),
+                "integration",
+                size=estimate_tokens(all_files)
+            )
+            for _ in range(settings.INTEGRATION_PASSES)
+        ])
+        
+        # Merge integration files
+        merged: Dict[str, str] = {}
+        for result in integration_results:
+            for filename, content in result.items():
+                if filename in owned:
+                    continue
+                merged[filename] = content
+                provenance.setdefault(filename, INTEGRATION)
+        await all_files.put(merged)
+    
+    async def _check_and_deliver(
+        self,
+        project_id: str,
+        project_request: ProjectRequest,
+        all_files: ArtifactStore,
+        provenance: Dict[str, str],
+        scope: Optional[Set[str]] = None,
+        known: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Phases 4b to 7: validation, testing and the delivery report.
+
+        ``scope`` limits repairs and the LLM test phases to those files (a
+        revision's regenerated files); ``known`` holds reusable static
+        analyses. Returns the static analyses keyed by file with the hash of
+        the content they describe and whether the file still had blocking
+        problems, cross-file ones included.
+        """
+        # Phase 4b: Static validation with targeted repair, so the LLM test
+        # phases do not spend their time on files that do not even parse
+        self._phase("Phase 4b: Static Validation")
+        static_report = await self._validate_and_repair(all_files, known=known, only=scope)
+        validation_cache = {
+            filename: {
+                "sha1": all_files.sha1(filename),
+                "analysis": analysis,
+                "blocking": filename in static_report["files_needing_repair"],
+            }
+            for filename, analysis in static_report["analyses"].items() if filename in all_files
+        }
+        tested = all_files if scope is None else all_files.subset(scope)
+        
+        # Phase 5: Integration Testing
+        self._phase("Phase 5: Integration Testing")
+        test_results = await self._run_phase(
+            "integration_testing",
+            self.integrator_tester.test_integration(tested),
+            size=estimate_tokens(tested)
+        )
+        
+        # Save test files and apply fixes
+        for filename, content in test_results.get('test_files', {}).items():
+            for filename, content in test_results.get('test_files', {}).items():
+                 self.file_manager.save_file(project_id, filename, content)
+                 provenance[filename] = TESTS
+        
+        fix_report = await self._apply_fixes(test_results.get('fixes') or {}, all_files, provenance)
+        
+        # Phase 6: Final Testing
+        self._phase("Phase 6: Final Testing")
+        validation_results = await self._run_phase(
+            "final_testing",
+            self.final_tester.final_validation(tested, project_request.project_type),
+            size=estimate_tokens(tested)
+        )
+        
+        validation_results['static_validation'] = {
+            key: static_report[key] for key in ("files_checked", "issue_count", "issues")
+        }
+        validation_results['fix_application'] = fix_report
+        
+        # Save additional test files
+        for filename, content in validation_results.get('additional_tests', {}).items():
+            self.file_manager.save_file(project_id, filename, content)
+            provenance[filename] = TESTS
+        
+        # Phase 6b: Execute the generated test suites for real results
+        if settings.TEST_RUNNER_ENABLED:
+            self._phase("Phase 6b: Test Execution")
+            test_execution = await self.test_runner.run(
+                self.file_manager.create_project_directory(project_id)
+            )
+            validation_results['test_execution'] = test_execution
+            if test_execution["status"] == "failed":
+                validation_results['ready_for_deployment'] = False
+            logger.info(
+                f"Test execution {test_execution['status']}: {test_execution['totals']}"
+            )
+        
+        # Phase 7: Delivery
+        self._phase("Phase 7: Delivery")
+        delivery_report = await self._run_phase(
+            "delivery",
+            self.delivery_agent.prepare_delivery(project_id, all_files, validation_results),
+            size=estimate_tokens(validation_results)
+        )
+        
+        # Save delivery report
+        self.file_manager.save_json(project_id, "DELIVERY_REPORT.json", delivery_report)
+        provenance["DELIVERY_REPORT.json"] = REPORT
+        return validation_cache
+    
+    async def _apply_fixes(
+        self,
+        fixes: Dict[str, Any],
+        all_files: ArtifactStore,
+        provenance: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """Apply the integration tester's fixes as patches.
+
+        Files whose fix conflicts with their content are rewritten whole by
+        the tester instead (``PATCH_REWRITE_FALLBACK``), at most
+        ``MAX_REPAIR_FILES`` of them; the rest keep their content.
+        """
+        report: Dict[str, Any] = {"patched": [], "rewritten": [], "created": [], "fuzzy_edits": 0}
+        conflicts: Dict[str, str] = {}
+        if not isinstance(fixes, dict):
+            fixes = {}
+        
+        def apply_all():
+            # File reads, writes and the fuzzy matching would hold the loop
+            for filename, fix in fixes.items():
+                try:
+                    result = apply_fix(all_files.get(filename), fix)
+                except PatchConflict as e:
+                    conflicts[filename] = str(e)
+                    continue
+                all_files[filename] = result.content
+                provenance.setdefault(filename, TESTS)
+                report[{"patch": "patched", "rewrite": "rewritten", "created": "created"}[result.mode]].append(filename)
+                report["fuzzy_edits"] += result.fuzzy_edits
+        
+        await asyncio.to_thread(apply_all)
+        
+        if conflicts and settings.PATCH_REWRITE_FALLBACK:
+            # One at a time: the tester is a single agent, not a pool
+            for filename in [f for f in conflicts if f in all_files][:settings.MAX_REPAIR_FILES]:
+                logger.info(f"Fix for {filename} did not apply ({conflicts[filename]}), rewriting the file")
+                original = (await all_files.fetch([filename]))[filename]
+                try:
+                    content = await self._run_phase(
+                        "repair",
+                        self.integrator_tester.rewrite_file(
+                            filename, original, fixes[filename], conflicts[filename]
+                        ),
+                        size=estimate_tokens(original)
+                    )
+                    # The rewrite gets the same truncation check as any other fix
+                    content = (await asyncio.to_thread(apply_fix, original, content)).content
+                except RunCancelled:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Rewriting {filename} failed: {str(e)}")
+                    continue
+                await all_files.put({filename: content})
+                report["rewritten"].append(filename)
+                conflicts.pop(filename)
+        
+        report["conflicts"] = [{"file": f, "reason": reason} for f, reason in conflicts.items()]
+        return report
+    
+    def _restore_tree(self, project_id: str):
+        """Bring back a source tree the garbage collector dropped, from the package"""
+        project_dir = self.file_manager.base_path / project_id
+        if project_dir.exists():
+            return
+        package = self.project_packager.find_package(project_id)
+        if package is not None:
+            logger.info(f"Restoring source tree of {project_id} from its package")
+            self.project_packager.extract_package(package, project_dir)
+    
+    def _sync_files(self, project_id: str, before: Dict[str, str], after: ArtifactStore):
+        """Delete files that are gone; returns the changed and the removed files.
+
+        ``before`` maps the files the revision started from to their hashes;
+        changed files were already written when they were stored.
+        """
+        changed = {f for f, sha1 in after.hashes().items() if before.get(f) != sha1}
+        removed = set(before) - set(after)
+        project_dir = self.file_manager.base_path / project_id
+        for filename in removed:
+            (project_dir / filename).unlink(missing_ok=True)
+        return changed, removed
+    
+    def _select_templates(self, project_request: ProjectRequest, project_plan) -> Dict[str, Any]:
+        """Render the matching templates as {output: (spec, content)}"""
+        if not settings.TEMPLATES_ENABLED:
+            return {}
+        params = self._template_params(project_request)
+        selected = template_registry.select(project_request.project_type.value, project_plan.tech_stack)
+        return {out: (spec, template_registry.render(spec, params)) for out, spec in selected.items()}
+    
+    def _template_params(self, project_request: ProjectRequest) -> Dict[str, Any]:
+        """Placeholder values of the project's templates"""
+        return {
+            "title": project_request.title,
+            "description": project_request.description,
+            "project_type": project_request.project_type.value,
+        }
     
-    async def _run_with_timeout(self, coro, timeout: int):
-        """Run a coroutine with timeout"""
+    def _subtask_file(self, subtask: Any) -> Optional[str]:
+        """Project-relative target path of a delegated subtask, if it names one.
+
+        The whole path counts: a template owning ``config_manager.py`` says
+        nothing about ``utils/config_manager.py``.
+        """
+        if not isinstance(subtask, dict):
+            return None
+        filename = subtask.get("file") or subtask.get("filename")
+        if not isinstance(filename, str):
+            return None
+        path = PurePosixPath(filename.replace("\\", "/").lstrip("/"))
+        return path.as_posix() if path.parts else None
+    
+    async def _validate_and_repair(
+        self,
+        all_files: ArtifactStore,
+        known: Optional[Dict[str, Dict[str, Any]]] = None,
+        only: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """Run static validation and send only the broken files for repair.
+
+        ``known`` are analyses of unchanged files to reuse; ``only`` limits
+        repairs to those files.
+        """
+        report = await self.static_validator.validate(all_files, known=known)
+        to_repair = [
+            filename for filename in report["files_needing_repair"]
+            if only is None or filename in only
+        ][:settings.MAX_REPAIR_FILES]
+        
+        if not to_repair:
+            return report
+        
+        logger.info(f"Static validation found problems in {len(to_repair)} files, repairing")
+        originals = await all_files.fetch(to_repair)
+        repairs = await asyncio.gather(*[
+            self._pooled(
+                self.junior_developers,
+                lambda dev, filename=filename: dev.repair_file(
+                    filename, originals[filename], report["by_file"][filename]
+                ),
+                "repair",
+                size=all_files.handle(filename).size / 4
+            )
+            for filename in to_repair
+        ], return_exceptions=True)
+        
+        candidates = {
+            filename: repaired for filename, repaired in zip(to_repair, repairs)
+            if isinstance(repaired, str) and repaired.strip()
+        }
+        analyses = report["analyses"]
+        recheck = await self.static_validator.validate(
+            ChainMap(candidates, all_files),
+            known={f: a for f, a in analyses.items() if f not in candidates}
+        )
+        
+        # Keep a repair only if it removed the file's blocking problems
+        await all_files.put({
+            filename: repaired for filename, repaired in candidates.items()
+            if filename not in recheck["files_needing_repair"]
+        })
+        
+        return await self.static_validator.validate(
+            all_files, known={f: a for f, a in analyses.items() if f not in candidates}
+        )
+    
+    def cancel_project(self, project_id: str) -> bool:
+        """Abort in-flight and queued LLM work for a running project.
+
+        The caller is responsible for cancelling the pipeline task itself;
+        this only makes sure the LLM side lets go of its capacity promptly.
+        """
+        run = self.runs.get(project_id)
+        if run is None:
+            return False
+        logger.info(f"Cancelling project: {project_id}")
+        run.cancel()
+        return True
+    
+    async def _pooled(self, pool: AgentPool, work: Callable[[Any], Awaitable], phase: str, size: float):
+        """Lease an agent from a shared pool and run ``work(agent)`` on it.
+
+        The phase timeout covers the work only, not the wait for a free agent
+        (nor, see ``_run_phase``, the wait for LLM slots).
+        """
+        async with pool.lease() as agent:
+            return await self._run_phase(phase, work(agent), size=size)
+    
+    async def _gather_all(self, coros: List[Awaitable]) -> List[Any]:
+        """Like gather, but cancels the siblings when one of them fails"""
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
         try:
-            return await asyncio.wait_for(coro, timeout=timeout)
-        except asyncio.TimeoutError:
-            raise Exception(f"Operation timed out after {timeout} seconds")
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+    
+    async def _run_phase(self, phase: str, coro, size: float = 1.0):
+        """Run a phase step with a timeout learned from its latency history.
+
+        Time its LLM calls spend queued for a scheduler slot (other steps and
+        projects hold them) extends the deadline and is left out of the
+        duration the timeout learns from.
+        """
+        timeout = adaptive_timeouts.phase_timeout(phase, size)
+        clock = PhaseClock()
+        started = time.monotonic()
+        with tracer.span("step", {"step": phase, "size": round(size), "timeout_seconds": round(timeout)}) as span:
+            token = phase_clock.set(clock)
+            try:
+                # The task copies the context, clock included
+                task = asyncio.ensure_future(coro)
+            finally:
+                phase_clock.reset(token)
+            try:
+                while not task.done():
+                    remaining = started + timeout + clock.queued - time.monotonic()
+                    if remaining <= 0:
+                        task.cancel()
+                        await asyncio.wait({task})
+                        raise Exception(f"Phase '{phase}' timed out after {timeout:.0f} seconds")
+                    await asyncio.wait({task}, timeout=remaining)
+            except BaseException:
+                task.cancel()
+                raise
+            span.update({"llm.queue_seconds": round(clock.queued, 3)})
+            result = task.result()
+        adaptive_timeouts.record_phase(phase, time.monotonic() - started - clock.queued, size)
+        return result
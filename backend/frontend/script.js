@@ -33,6 +33,7 @@ projectForm.addEventListener('submit', async (e) => {
         title: formData.get('title'),
         description: formData.get('description'),
         project_type: formData.get('project_type'),
+        priority: formData.get('priority') || 'normal',
         requirements: requirements
     };
     
@@ -55,6 +56,12 @@ async function submitProject(projectData) {
             body: JSON.stringify(projectData)
         });
         
+        if (response.status === 429) {
+            const retryAfter = response.headers.get('Retry-After') || '60';
+            showToast(`Server is busy. Please retry in ${retryAfter} seconds.`, 'error');
+            return;
+        }
+        
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -107,6 +114,10 @@ function showStatus(project) {
         statusBadge.classList.add('failed');
         statusBadge.textContent = 'Failed';
         progressFill.style.width = '100%';
+    } else if (project.status === 'cancelled') {
+        statusBadge.classList.add('failed');
+        statusBadge.textContent = 'Cancelled';
+        progressFill.style.width = '100%';
     } else {
         statusBadge.classList.add('in-progress');
         statusBadge.textContent = 'In Progress';
@@ -156,12 +167,14 @@ function startStatusChecking() {
             // Update status display
             showStatus(project);
             
-            // Stop checking if completed or failed
-            if (project.status === 'completed' || project.status === 'failed') {
+            // Stop checking once the project reached a final state
+            if (['completed', 'failed', 'cancelled'].includes(project.status)) {
                 stopStatusChecking();
                 
                 if (project.status === 'completed') {
                     showToast('Project completed successfully!', 'success');
+                } else if (project.status === 'cancelled') {
+                    showToast('Project generation was cancelled.', 'error');
                 } else {
                     showToast('Project generation failed.', 'error');
                 }
@@ -9,11 +9,17 @@ class ProjectType(str, Enum):
     FULL_STACK = "full_stack"
     DATA_ANALYSIS = "data_analysis"
 
+class ProjectPriority(str, Enum):
+    LOW = "low"
+    NORMAL = "normal"
+    HIGH = "high"
+
 class ProjectRequest(BaseModel):
     title: str = Field(..., description="Project title")
     description: str = Field(..., description="Detailed project description")
     project_type: ProjectType = Field(..., description="Type of project")
     requirements: Optional[List[str]] = Field(default=[], description="Specific requirements")
+    priority: ProjectPriority = Field(default=ProjectPriority.NORMAL, description="Scheduling priority")
     
 class Task(BaseModel):
     id: str
@@ -0,0 +1,186 @@
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from backend.config import settings
+from backend.utils.artifact_store import ArtifactStore
+from backend.utils.latency import LatencyTracker
+import logging
+
+logger = logging.getLogger(__name__)
+
+NS = 1e9
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+class PhaseClock:
+    """Time the LLM calls of one phase step spent queued for a scheduler slot.
+
+    That wait depends on everything else running, not on the step, so the
+    step's timeout is extended by it and its recorded duration excludes it.
+    """
+
+    def __init__(self):
+        self._queued = 0.0
+        self._waiting = 0
+        self._since = 0.0
+
+    @property
+    def queued(self) -> float:
+        """Seconds with at least one call queued, including a wait still going on"""
+        return self._queued + (time.monotonic() - self._since if self._waiting else 0.0)
+
+    @contextmanager
+    def waiting(self):
+        if not self._waiting:
+            self._since = time.monotonic()
+        self._waiting += 1
+        try:
+            yield
+        finally:
+            self._waiting -= 1
+            if not self._waiting:
+                self._queued += time.monotonic() - self._since
+
+
+# Clock of the phase step the current code runs in (see CrewManager._run_phase)
+phase_clock: ContextVar[Optional[PhaseClock]] = ContextVar("phase_clock", default=None)
+
+
+def llm_slot_wait():
+    """Count the enclosed wait for an LLM slot on the current phase step's clock"""
+    clock = phase_clock.get()
+    return clock.waiting() if clock is not None else nullcontext()
+
+
+class AdaptiveTimeouts:
+    """Timeouts derived from recorded latency instead of fixed constants.
+
+    Two levels:
+
+    - LLM calls (keyed ``"<agent role>|<model>"``): the wait for the first
+      token is budgeted from the worst recent model load plus the prompt
+      size times the p95 prompt-evaluation rate Ollama reported; the whole
+      call additionally gets the expected output size (``num_predict`` or
+      the p95 of recent outputs) times the p95 generation rate. Hung calls
+      are caught earlier by token inactivity: once streaming, a call fails
+      when no token arrives for ``LLM_STALL_SECONDS``.
+    - Pipeline phases: p95 of recent durations of the phase, scaled up when
+      the input is larger than the phase's typical input.
+
+    Both are multiplied by ``TIMEOUT_MULTIPLIER`` and clamped to their
+    floor and ceiling; until ``TIMEOUT_MIN_SAMPLES`` samples exist the
+    configured cold-start defaults apply.
+    """
+
+    def __init__(self):
+        self.load_seconds = LatencyTracker()
+        self.prompt_rate = LatencyTracker()  # seconds per prompt token
+        self.generation_rate = LatencyTracker()  # seconds per output token
+        self.output_tokens = LatencyTracker()
+        self.phase_seconds = LatencyTracker()
+        self.phase_size = LatencyTracker()
+
+    # ------------------------------------------------------------------
+    # LLM calls
+    # ------------------------------------------------------------------
+    def record_call(self, key: str, stats: Dict[str, Any]):
+        """Record the timing fields of an Ollama chat response"""
+        if stats.get("load_duration") is not None:
+            self.load_seconds.record(key, stats["load_duration"] / NS)
+        if stats.get("prompt_eval_count") and stats.get("prompt_eval_duration"):
+            self.prompt_rate.record(key, stats["prompt_eval_duration"] / NS / stats["prompt_eval_count"])
+        if stats.get("eval_count"):
+            self.output_tokens.record(key, stats["eval_count"])
+            if stats.get("eval_duration"):
+                self.generation_rate.record(key, stats["eval_duration"] / NS / stats["eval_count"])
+
+    def _expected_first_token(self, key: str, prompt_tokens: float) -> float:
+        return (self.load_seconds.percentile(key, 100) or 0.0) + \
+            prompt_tokens * (self.prompt_rate.percentile(key, 95) or 0.0)
+
+    def first_token_timeout(self, key: str, prompt_tokens: float) -> float:
+        if self.prompt_rate.count(key) < settings.TIMEOUT_MIN_SAMPLES:
+            return float(settings.MODEL_TIMEOUT)
+        return _clamp(
+            self._expected_first_token(key, prompt_tokens) * settings.TIMEOUT_MULTIPLIER,
+            settings.LLM_FIRST_TOKEN_MIN_SECONDS,
+            settings.MODEL_MAX_TIMEOUT,
+        )
+
+    def call_timeout(self, key: str, prompt_tokens: float, max_output_tokens: Optional[int] = None) -> float:
+        """Wall-clock budget for a whole call"""
+        # Fully cached prompts report no prompt evaluation, so the two
+        # histories fill independently
+        if min(self.generation_rate.count(key), self.prompt_rate.count(key)) < settings.TIMEOUT_MIN_SAMPLES:
+            return float(settings.MODEL_MAX_TIMEOUT)
+        output_tokens = max_output_tokens or self.output_tokens.percentile(key, 95)
+        expected = self._expected_first_token(key, prompt_tokens) + \
+            output_tokens * self.generation_rate.percentile(key, 95)
+        return _clamp(
+            expected * settings.TIMEOUT_MULTIPLIER,
+            settings.LLM_CALL_MIN_SECONDS,
+            settings.MODEL_MAX_TIMEOUT,
+        )
+
+    # ------------------------------------------------------------------
+    # Pipeline phases
+    # ------------------------------------------------------------------
+    def record_phase(self, phase: str, seconds: float, size: float):
+        self.phase_seconds.record(phase, seconds)
+        self.phase_size.record(phase, max(size, 1.0))
+
+    def phase_timeout(self, phase: str, size: float = 1.0) -> float:
+        default = float(settings.PHASE_TIMEOUT_DEFAULTS.get(phase, settings.MODEL_TIMEOUT))
+        if self.phase_seconds.count(phase) < settings.TIMEOUT_MIN_SAMPLES:
+            return default
+        typical_size = self.phase_size.percentile(phase, 50) or 1.0
+        scale = max(1.0, size / typical_size)
+        return _clamp(
+            self.phase_seconds.percentile(phase, 95) * scale * settings.TIMEOUT_MULTIPLIER,
+            settings.PHASE_TIMEOUT_MIN_SECONDS,
+            settings.PHASE_TIMEOUT_MAX_SECONDS,
+        )
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        phases = set(settings.PHASE_TIMEOUT_DEFAULTS) | set(self.phase_seconds.metrics)
+        return {
+            "phases": {
+                phase: {
+                    "samples": self.phase_seconds.count(phase),
+                    "timeout_typical_input": round(self.phase_timeout(phase), 1),
+                }
+                for phase in sorted(phases)
+            },
+            "llm_calls": {
+                key: {
+                    "samples": self.prompt_rate.count(key),
+                    "max_load_seconds": self.load_seconds.percentile(key, 100),
+                    "p95_seconds_per_prompt_token": self.prompt_rate.percentile(key, 95),
+                    "p95_seconds_per_output_token": self.generation_rate.percentile(key, 95),
+                    "p95_output_tokens": self.output_tokens.percentile(key, 95),
+                }
+                for key in self.prompt_rate.metrics
+            },
+            "stall_seconds": settings.LLM_STALL_SECONDS,
+        }
+
+
+adaptive_timeouts = AdaptiveTimeouts()
+
+
+def estimate_tokens(value: Any) -> float:
+    """Rough token count (chars / 4) of a string, dict of files or other object"""
+    if isinstance(value, str):
+        return len(value) / 4
+    if isinstance(value, ArtifactStore):
+        return value.estimate_tokens()
+    if isinstance(value, dict):
+        return sum(estimate_tokens(k) + estimate_tokens(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(v) for v in value)
+    return len(str(value)) / 4
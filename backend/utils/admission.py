@@ -0,0 +1,138 @@
+import math
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from backend.config import settings
+from backend.utils.scheduler import FairScheduler
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a submission would overload the LLM backend"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A reserved place in the pipeline queue.
+
+    Entering the ticket waits for a free pipeline slot; leaving it releases
+    the slot and feeds the run duration back into the throughput estimate.
+    """
+
+    def __init__(self, controller: "AdmissionController", client_key: str, weight: float, cost: float):
+        self.controller = controller
+        self.client_key = client_key
+        self.weight = weight
+        self.cost = cost
+        self.started_at: Optional[float] = None
+        self._settled = False
+
+    def discard(self):
+        """Give the queue position back if the run never entered the ticket"""
+        if not self._settled:
+            self._settled = True
+            self.controller.queued -= 1
+
+    async def __aenter__(self):
+        # Leaving the queue, whether a slot is granted or the wait is cancelled
+        self._settled = True
+        try:
+            await self.controller.scheduler.acquire_async(self.client_key, self.weight, self.cost)
+        finally:
+            self.controller.queued -= 1
+        self.controller.running += 1
+        self.started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.controller.running -= 1
+        self.controller.scheduler.release()
+        self.controller._record_run(time.monotonic() - self.started_at)
+        return False
+
+
+class AdmissionController:
+    """Limits concurrent pipeline runs based on queue depth and LLM backlog"""
+
+    def __init__(self):
+        self.max_concurrent = max(1, settings.MAX_CONCURRENT_PROJECTS)
+        self.max_queued = max(0, settings.MAX_QUEUED_PROJECTS)
+        self.max_backlog_seconds = settings.MAX_LLM_BACKLOG_SECONDS
+        self.running = 0
+        self.queued = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        # Pipeline slots are handed out by weighted fair queuing per client
+        self.scheduler = FairScheduler("pipeline", self.max_concurrent)
+        self._durations = deque(maxlen=settings.ADMISSION_HISTORY_SIZE)
+
+    def _record_run(self, duration: float):
+        self._durations.append(duration)
+
+    # ------------------------------------------------------------------
+    # Estimates
+    # ------------------------------------------------------------------
+    def average_run_seconds(self) -> float:
+        """Mean observed pipeline duration, or the configured prior"""
+        if not self._durations:
+            return float(settings.ADMISSION_DEFAULT_RUN_SECONDS)
+        return sum(self._durations) / len(self._durations)
+
+    def throughput_per_second(self) -> float:
+        """Observed pipeline completions per second at full concurrency"""
+        return self.max_concurrent / max(self.average_run_seconds(), 1.0)
+
+    def estimated_backlog_seconds(self, extra: int = 0) -> float:
+        """Time to drain everything admitted so far (plus ``extra`` runs)"""
+        return (self.running + self.queued + extra) / self.throughput_per_second()
+
+    def _retry_after(self, excess_runs: int) -> int:
+        return max(1, math.ceil(excess_runs / self.throughput_per_second()))
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+    def admit(self, client_key: str = "anonymous", weight: float = 1.0, cost: float = 1.0) -> AdmissionTicket:
+        """Reserve a queue position or raise ``AdmissionRejected``"""
+        free_slots = self.max_concurrent - self.running
+        waiting_after = self.queued + 1 - max(free_slots, 0)
+
+        if waiting_after > self.max_queued:
+            self.rejected_total += 1
+            raise AdmissionRejected(
+                f"Queue is full ({self.queued} waiting, {self.running} running)",
+                self._retry_after(waiting_after - self.max_queued)
+            )
+
+        backlog = self.estimated_backlog_seconds(extra=1)
+        if self.max_backlog_seconds > 0 and backlog > self.max_backlog_seconds:
+            self.rejected_total += 1
+            excess = (backlog - self.max_backlog_seconds) * self.throughput_per_second()
+            raise AdmissionRejected(
+                f"Estimated LLM backlog of {int(backlog)}s exceeds {self.max_backlog_seconds}s",
+                self._retry_after(max(1, math.ceil(excess)))
+            )
+
+        self.queued += 1
+        self.admitted_total += 1
+        return AdmissionTicket(self, client_key, weight, cost)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "average_run_seconds": round(self.average_run_seconds(), 1),
+            "estimated_backlog_seconds": round(self.estimated_backlog_seconds(), 1),
+            "scheduler": self.scheduler.metrics,
+        }
@@ -0,0 +1,182 @@
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+from backend.config import settings
+from backend.utils.latency import llm_latency, llm_queue_delay
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPool:
+    """A resizable set of interchangeable agents of one role.
+
+    ``lease`` hands out an idle agent, builds a new one (in a worker thread)
+    while fewer than ``size`` are in use, and otherwise waits. Shrinking
+    never interrupts a lease: surplus agents are retired as they come back.
+    """
+
+    def __init__(self, name: str, factory: Callable[[int], Any], min_size: int, max_size: int, size: int):
+        self.name = name
+        self.factory = factory
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.size = min(max(size, self.min_size), self.max_size)
+        self._idle: List[Any] = []
+        self._busy = 0
+        self._ids = itertools.count(1)
+        self._cond: Optional[asyncio.Condition] = None
+        # Leases that had to wait since the autoscaler last looked
+        self.waits = 0
+        self.built_total = 0
+        self.retired_total = 0
+
+    @property
+    def cond(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    @asynccontextmanager
+    async def lease(self):
+        async with self.cond:
+            if self._busy >= self.size:
+                self.waits += 1
+            await self.cond.wait_for(lambda: self._busy < self.size)
+            self._busy += 1
+            agent = self._idle.pop() if self._idle else None
+
+        try:
+            if agent is None:
+                agent = await asyncio.to_thread(self.factory, next(self._ids))
+                self.built_total += 1
+        except BaseException:
+            await self._give_back(None)
+            raise
+
+        try:
+            yield agent
+        finally:
+            await self._give_back(agent)
+
+    async def _give_back(self, agent: Any):
+        async with self.cond:
+            self._busy -= 1
+            if agent is not None:
+                if self._busy + len(self._idle) < self.size:
+                    self._idle.append(agent)
+                else:
+                    self.retired_total += 1
+            self.cond.notify_all()
+
+    async def resize(self, size: int):
+        size = min(max(size, self.min_size), self.max_size)
+        if size == self.size:
+            return
+        logger.info(f"Resizing agent pool '{self.name}': {self.size} -> {size}")
+        async with self.cond:
+            self.size = size
+            # Drop idle agents beyond the new size straight away
+            while self._idle and self._busy + len(self._idle) > self.size:
+                self._idle.pop()
+                self.retired_total += 1
+            self.cond.notify_all()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "busy": self._busy,
+            "idle": len(self._idle),
+            "built_total": self.built_total,
+            "retired_total": self.retired_total,
+        }
+
+
+class PoolAutoscaler:
+    """Periodically resizes agent pools to what the LLM backend sustains.
+
+    A pool grows by one while its leases had to wait and its role's LLM
+    latency stays within ``AGENT_POOL_LATENCY_TOLERANCE`` of the best seen;
+    all pools shrink by one while the LLM queueing delay is above
+    ``AGENT_POOL_MAX_QUEUE_DELAY`` (more agents would only queue longer).
+    """
+
+    def __init__(self, pools: Dict[str, AgentPool]):
+        self.pools = pools
+        self._baseline: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.last_actions: Dict[str, str] = {}
+
+    async def adjust(self):
+        queue_delay = llm_queue_delay.percentile("all", 50)
+        congested = queue_delay is not None and queue_delay > settings.AGENT_POOL_MAX_QUEUE_DELAY
+
+        for name, pool in list(self.pools.items()):
+            waited, pool.waits = pool.waits, 0
+            latency = llm_latency.percentile(name, 50)
+            if latency is not None:
+                self._baseline[name] = min(self._baseline.get(name, latency), latency)
+
+            if congested:
+                action = f"shrink: LLM queue delay {queue_delay:.1f}s"
+                await pool.resize(pool.size - 1)
+            elif waited and latency is not None and \
+                    latency <= self._baseline[name] * (1 + settings.AGENT_POOL_LATENCY_TOLERANCE):
+                action = "grow: demand with flat latency"
+                await pool.resize(pool.size + 1)
+            else:
+                action = "hold"
+            self.last_actions[name] = action
+
+    def start(self):
+        """Start the periodic autoscaler on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.AGENT_POOL_ADJUST_SECONDS)
+            try:
+                await self.adjust()
+            except Exception as e:
+                logger.error(f"Agent pool autoscaling failed: {str(e)}")
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            name: {**pool.metrics, "last_action": self.last_actions.get(name)}
+            for name, pool in self.pools.items()
+        }
+
+
+# Pools are process-wide so concurrent projects share agents and capacity
+agent_pools: Dict[str, AgentPool] = {}
+pool_autoscaler = PoolAutoscaler(agent_pools)
+
+
+def shared_pool(name: str, factory: Callable[[int], Any]) -> AgentPool:
+    """Return the pool for an agent role, creating it from AGENT_POOL_SIZES"""
+    pool = agent_pools.get(name)
+    if pool is None:
+        sizes = settings.AGENT_POOL_SIZES.get(name, {})
+        pool = agent_pools[name] = AgentPool(
+            name,
+            factory,
+            min_size=sizes.get("min", 1),
+            max_size=sizes.get("max", 1),
+            size=sizes.get("initial", 1),
+        )
+    return pool
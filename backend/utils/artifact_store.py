@@ -0,0 +1,109 @@
+import asyncio
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Mapping, Optional
+from backend.utils.file_manager import FileManager
+from backend.utils.project_state import content_hash
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ArtifactHandle:
+    """Where a generated file lives and what it contains, without the content"""
+    path: Path
+    sha1: str
+    size: int
+
+
+class ArtifactStore(MutableMapping):
+    """A project's generated files as ``{filename: content}``, kept on disk.
+
+    Assigning a file writes it to the project directory and keeps only its
+    handle (path, hash, size); reading it loads the content from disk again,
+    so a running pipeline holds the bytes of the files a phase is working
+    on rather than every file it has generated. Membership, hashes, sizes
+    and ``estimate_tokens`` come from the handles and never touch the disk.
+    Item access reads and writes synchronously; on the event loop use
+    ``put`` and ``fetch``, which do the same in a worker thread.
+    """
+
+    def __init__(self, file_manager: FileManager, project_id: str,
+                 handles: Optional[Dict[str, ArtifactHandle]] = None):
+        self.file_manager = file_manager
+        self.project_id = project_id
+        self._handles: Dict[str, ArtifactHandle] = dict(handles or {})
+
+    def adopt(self, filenames: Iterable[str]):
+        """Take over files already in the project directory (a revision's tree)"""
+        project_dir = self.file_manager.base_path / self.project_id
+        for filename in filenames:
+            path = project_dir / filename
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    sha1 = content_hash(f.read())
+                self._handles[filename] = ArtifactHandle(path, sha1, path.stat().st_size)
+            except (FileNotFoundError, UnicodeDecodeError):
+                continue
+
+    def __getitem__(self, filename: str) -> str:
+        handle = self._handles[filename]
+        with open(handle.path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def __setitem__(self, filename: str, content: str):
+        path = self.file_manager.save_file(self.project_id, filename, content)
+        self._handles[filename] = ArtifactHandle(path, content_hash(content), path.stat().st_size)
+
+    async def put(self, files: Mapping[str, str]):
+        """Store files without blocking the event loop"""
+        if files:
+            await asyncio.to_thread(self.update, files)
+
+    async def fetch(self, filenames: Iterable[str]) -> Dict[str, str]:
+        """Read files without blocking the event loop"""
+        filenames = list(filenames)
+        return await asyncio.to_thread(lambda: {filename: self[filename] for filename in filenames})
+
+    def discard(self, filename: str):
+        """Forget a file if stored; unlike ``pop`` this does not read it"""
+        self._handles.pop(filename, None)
+
+    def __delitem__(self, filename: str):
+        # The file stays on disk until the run decides it is gone (see CrewManager._sync_files)
+        del self._handles[filename]
+
+    def __contains__(self, filename: object) -> bool:
+        return filename in self._handles
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._handles))
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def handle(self, filename: str) -> ArtifactHandle:
+        return self._handles[filename]
+
+    def sha1(self, filename: str) -> str:
+        return self._handles[filename].sha1
+
+    def hashes(self) -> Dict[str, str]:
+        return {filename: handle.sha1 for filename, handle in self._handles.items()}
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(handle.size for handle in self._handles.values())
+
+    def estimate_tokens(self) -> float:
+        """Same rough chars / 4 as ``estimate_tokens``, from the sizes on disk"""
+        return (self.total_bytes + sum(len(filename) for filename in self._handles)) / 4
+
+    def subset(self, filenames: Iterable[str]) -> "ArtifactStore":
+        """A store over some of the files, sharing their handles"""
+        return ArtifactStore(
+            self.file_manager, self.project_id,
+            {f: self._handles[f] for f in sorted(filenames) if f in self._handles}
+        )
@@ -0,0 +1,222 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+import httpx
+from backend.config import settings
+from backend.utils.ollama_client import OllamaClient, canonical_model_name
+from backend.utils.scheduler import llm_scheduler
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _is_client_error(error: Exception) -> bool:
+    """4xx answers (e.g. unknown model) say nothing about the backend's health"""
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code < 500
+
+
+@dataclass
+class OllamaBackend:
+    """One Ollama server and what the registry knows about it"""
+    url: str
+    client: OllamaClient
+    probe_client: OllamaClient
+    healthy: bool = True
+    outstanding: int = 0
+    consecutive_failures: int = 0  # failed chats in a row
+    probe_failures: int = 0  # failed health probes in a row
+    ejected_at: Optional[float] = None
+    last_error: Optional[str] = None
+    # None until the first successful probe: unknown, not empty
+    available: Optional[Set[str]] = None
+    loaded: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    requests_total: int = 0
+    failures_total: int = 0
+
+    def has_model(self, model: str) -> bool:
+        return self.available is None or canonical_model_name(model) in self.available
+
+    def is_loaded(self, model: str) -> bool:
+        return canonical_model_name(model) in self.loaded
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests_total": self.requests_total,
+            "failures_total": self.failures_total,
+            "consecutive_failures": self.consecutive_failures,
+            "probe_failures": self.probe_failures,
+            "last_error": self.last_error,
+            "loaded_models": sorted(self.loaded),
+        }
+
+
+class BackendRegistry:
+    """Routes LLM requests across several Ollama servers.
+
+    Backends come from ``settings.OLLAMA_BACKENDS`` (or the single
+    ``OLLAMA_BASE_URL``). For each request the registry prefers healthy
+    backends that have the model, then the fewest outstanding requests,
+    where a backend that would have to load the model first counts
+    ``BACKEND_COLD_PENALTY`` requests extra and the backend that last served
+    the same prompt prefix (and so still has it in its KV cache) counts
+    ``BACKEND_PREFIX_AFFINITY`` requests less. A backend is
+    ejected after ``BACKEND_EJECT_FAILURES`` consecutive failed chats or
+    failed health probes, counted separately so listing endpoints that still
+    answer do not hide failing chats, and re-admitted by the periodic health
+    check once it answers again, but not before ``BACKEND_READMIT_SECONDS``
+    have passed. The LLM scheduler gets
+    ``MAX_CONCURRENT_LLM_CALLS`` slots per backend in rotation, so adding a
+    server adds throughput and ejecting one takes its share away.
+    """
+
+    def __init__(self, urls: Optional[List[str]] = None):
+        urls = urls or settings.OLLAMA_BACKENDS or [settings.OLLAMA_BASE_URL]
+        self.backends: List[OllamaBackend] = [
+            OllamaBackend(
+                url=url.rstrip("/"),
+                client=OllamaClient(base_url=url),
+                probe_client=OllamaClient(base_url=url, timeout=settings.MODEL_PROBE_TIMEOUT),
+            )
+            for url in dict.fromkeys(urls)
+        ]
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        # Prompt prefix key -> URL of the backend that last evaluated it
+        self._prefix_owner: "OrderedDict[str, str]" = OrderedDict()
+        self.sync_capacity()
+
+    def sync_capacity(self):
+        """Size the LLM scheduler to the backends in rotation"""
+        healthy = sum(1 for b in self.backends if b.healthy)
+        capacity = settings.MAX_CONCURRENT_LLM_CALLS * max(healthy, 1)
+        if capacity != llm_scheduler.capacity:
+            logger.info(f"LLM capacity {llm_scheduler.capacity} -> {capacity} ({healthy} backends in rotation)")
+            llm_scheduler.resize(capacity)
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+    def pick(self, model: str, exclude: Iterable[str] = (), prefix: Optional[str] = None) -> OllamaBackend:
+        backends = [b for b in self.backends if b.url not in exclude] or self.backends
+        healthy = [b for b in backends if b.healthy]
+        # With nothing healthy, trying a possibly-recovered backend beats failing outright
+        candidates = [b for b in healthy if b.has_model(model)] or healthy or backends
+        # Rotate the starting point so ties do not always land on the first backend
+        offset = next(self._turn) % len(candidates)
+        rotated = candidates[offset:] + candidates[:offset]
+        owner = self._prefix_owner.get(prefix) if prefix else None
+
+        def load(b: OllamaBackend) -> int:
+            cost = b.outstanding + (0 if b.is_loaded(model) else settings.BACKEND_COLD_PENALTY)
+            return cost - (settings.BACKEND_PREFIX_AFFINITY if b.url == owner else 0)
+
+        return min(rotated, key=load)
+
+    def has_alternative(self, model: str, exclude: Iterable[str]) -> bool:
+        """Whether a healthy backend outside ``exclude`` serves ``model``"""
+        return any(b.healthy and b.has_model(model) and b.url not in exclude for b in self.backends)
+
+    @asynccontextmanager
+    async def route(self, model: str, exclude: Iterable[str] = (), prefix: Optional[str] = None):
+        """Reserve a backend for one request and record how it went"""
+        backend = self.pick(model, exclude, prefix)
+        backend.outstanding += 1
+        backend.requests_total += 1
+        try:
+            yield backend
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not _is_client_error(e):
+                self.record_failure(backend, e)
+            raise
+        else:
+            backend.consecutive_failures = 0
+            # The model is resident there now, whatever the last probe said
+            backend.loaded.setdefault(canonical_model_name(model), {})
+            if prefix:
+                self._prefix_owner[prefix] = backend.url
+                self._prefix_owner.move_to_end(prefix)
+                if len(self._prefix_owner) > 256:
+                    self._prefix_owner.popitem(last=False)
+        finally:
+            backend.outstanding -= 1
+
+    def record_failure(self, backend: OllamaBackend, error: Exception, probe: bool = False):
+        backend.failures_total += 1
+        if probe:
+            backend.probe_failures += 1
+        else:
+            backend.consecutive_failures += 1
+        backend.last_error = str(error) or type(error).__name__
+        failures = max(backend.consecutive_failures, backend.probe_failures)
+        if backend.healthy and failures >= settings.BACKEND_EJECT_FAILURES:
+            backend.healthy = False
+            backend.ejected_at = time.monotonic()
+            logger.warning(f"Ejected Ollama backend {backend.url}: {backend.last_error}")
+            self.sync_capacity()
+
+    # ------------------------------------------------------------------
+    # Health checks
+    # ------------------------------------------------------------------
+    async def check_backend(self, backend: OllamaBackend):
+        try:
+            available, loaded = await asyncio.gather(
+                backend.probe_client.available_models(), backend.probe_client.loaded_models()
+            )
+        except Exception as e:
+            self.record_failure(backend, e, probe=True)
+            return
+        backend.available = set(available)
+        backend.loaded = loaded
+        # Only a successful chat clears failed chats
+        backend.probe_failures = 0
+        if not backend.consecutive_failures:
+            backend.last_error = None
+        if not backend.healthy and \
+                time.monotonic() - (backend.ejected_at or 0) >= settings.BACKEND_READMIT_SECONDS:
+            backend.healthy = True
+            backend.ejected_at = None
+            # Back on probation: it is ejected again after as many failed chats
+            backend.consecutive_failures = 0
+            logger.info(f"Re-admitted Ollama backend {backend.url}")
+            self.sync_capacity()
+
+    async def check(self):
+        await asyncio.gather(*[self.check_backend(b) for b in self.backends])
+
+    def start(self):
+        """Start periodic health checks on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Backend health check failed: {str(e)}")
+            await asyncio.sleep(settings.BACKEND_HEALTH_SECONDS)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {b.url: b.metrics for b in self.backends}
+
+
+backend_registry = BackendRegistry()
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Optional
+from crewai import Agent, Crew, Task
+from backend.utils.model_cascade import OutputCheck, model_cascade
+from backend.utils.profiler import run_profiler
+from backend.utils.run_context import get_current_run
+from backend.utils.tracing import tracer
+
+
+async def run_task(agent: Agent, task: Task, check: Optional[OutputCheck] = None) -> str:
+    """Run a single-task crew off the event loop and return its raw output.
+
+    ``Crew.kickoff`` is synchronous; running it in a worker thread keeps the
+    server responsive and lets the LLM scheduler interleave calls from
+    concurrent projects. The current context (including the RunContext) is
+    copied into the thread by ``asyncio.to_thread``. ``check`` tells whether
+    an output is usable, which lets the agent's model cascade try cheaper
+    models first.
+    """
+    run = get_current_run()
+
+    def kickoff():
+        crew = Crew(
+            agents=[agent],
+            tasks=[task]
+        )
+        with run_profiler.attach_thread(run):
+            return crew.kickoff()
+
+    async def attempt() -> str:
+        result = await asyncio.to_thread(kickoff)
+        # Extract the raw output from CrewOutput object
+        return str(result.raw) if hasattr(result, 'raw') else str(result)
+
+    with tracer.span("agent.task", {"agent": agent.role}):
+        return await model_cascade.run(
+            getattr(agent.llm, "model_key", agent.role), getattr(agent.llm, "model", ""), attempt, check
+        )
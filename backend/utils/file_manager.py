@@ -3,6 +3,7 @@ import json
 from pathlib import Path
 from typing import Any, Dict, List
 from backend.config import settings
+from backend.utils.tracing import tracer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,8 +33,9 @@ class FileManager:
         
         # Write content
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            with tracer.span("file.write", {"file.path": filename, "file.bytes": len(content)}):
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
             logger.info(f"Saved file: {file_path}")
             return file_path
         except Exception as e:
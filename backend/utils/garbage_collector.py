@@ -0,0 +1,261 @@
+import asyncio
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from backend.config import settings
+from backend.utils.project_packager import ARCHIVE_FORMATS
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProjectArtifacts:
+    """Everything stored under GENERATED_DIR for a single project"""
+    project_id: str
+    tree: Optional[Path] = None
+    archives: List[Path] = field(default_factory=list)
+    # Run state, traces and profiles: deleted with the project, never a package
+    sidecars: List[Path] = field(default_factory=list)
+    tree_bytes: int = 0
+    archive_bytes: int = 0
+    sidecar_bytes: int = 0
+    created_at: float = 0.0
+    last_access: float = 0.0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.tree_bytes + self.archive_bytes + self.sidecar_bytes
+
+
+class GarbageCollector:
+    """Applies retention and disk-quota policies to the generated/ directory.
+
+    Policies (all configured through ``Settings``):
+    - ``GC_MAX_AGE_HOURS``: projects older than this are removed entirely
+    - ``GC_KEEP_ZIP_DROP_TREE``: once packaged, a project's source tree is
+      dropped after ``GC_TREE_RETENTION_HOURS`` and only the archive is kept
+    - ``GC_MAX_TOTAL_BYTES``: when exceeded, projects are evicted in order of
+      least recent download until usage is back under the quota
+
+    Projects reported by ``is_running`` are never touched.
+    """
+
+    def __init__(self, is_running: Optional[Callable[[str], bool]] = None):
+        self.base_path = Path(settings.GENERATED_DIR)
+        self.is_running = is_running or (lambda project_id: False)
+        self._task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, Any] = {
+            "runs": 0,
+            "reclaimed_bytes_total": 0,
+            "projects_deleted": 0,
+            "trees_dropped": 0,
+            "last_run_at": None,
+            "last_run_duration_seconds": 0.0,
+            "last_run_reclaimed_bytes": 0,
+            "usage_bytes": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Download bookkeeping
+    # ------------------------------------------------------------------
+    def mark_downloaded(self, archive_path: Path):
+        """Record a download by bumping the archive's access time.
+
+        The access time doubles as the least-recently-downloaded key, so the
+        ordering survives restarts without a separate state file.
+        """
+        try:
+            stat = archive_path.stat()
+            # Keep mtime (creation order) and only move atime forward
+            os.utime(archive_path, (time.time(), stat.st_mtime))
+        except OSError as e:
+            logger.warning(f"Could not record download for {archive_path}: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+    def scan(self) -> Dict[str, ProjectArtifacts]:
+        """Group everything in GENERATED_DIR by project id"""
+        projects: Dict[str, ProjectArtifacts] = {}
+
+        if not self.base_path.exists():
+            return projects
+
+        for item in self.base_path.iterdir():
+            # Dot-prefixed entries hold shared state, not project output
+            if item.name.startswith("."):
+                continue
+
+            project_id = item.name.split(".", 1)[0]
+            entry = projects.setdefault(project_id, ProjectArtifacts(project_id=project_id))
+
+            try:
+                stat = item.stat()
+            except OSError:
+                continue
+
+            if item.is_dir():
+                entry.tree = item
+                entry.tree_bytes = self._dir_size(item)
+                entry.created_at = max(entry.created_at, stat.st_mtime)
+            elif any(item.name == project_id + fmt.extension for fmt in ARCHIVE_FORMATS.values()):
+                entry.archives.append(item)
+                entry.archive_bytes += stat.st_size
+                entry.created_at = max(entry.created_at, stat.st_mtime)
+                entry.last_access = max(entry.last_access, stat.st_atime, stat.st_mtime)
+            else:
+                entry.sidecars.append(item)
+                entry.sidecar_bytes += stat.st_size
+                entry.created_at = max(entry.created_at, stat.st_mtime)
+
+        for entry in projects.values():
+            if not entry.last_access:
+                entry.last_access = entry.created_at
+
+        return projects
+
+    def _dir_size(self, path: Path) -> int:
+        total = 0
+        for file_path in path.rglob('*'):
+            try:
+                if file_path.is_file():
+                    total += file_path.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    # ------------------------------------------------------------------
+    # Collection
+    # ------------------------------------------------------------------
+    def collect(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Run one collection pass and return a summary of what was removed"""
+        started = time.time()
+        now = now or started
+        projects = self.scan()
+        reclaimed = 0
+        deleted: List[str] = []
+        dropped: List[str] = []
+
+        candidates = [p for p in projects.values() if not self.is_running(p.project_id)]
+
+        # 1. Maximum age
+        if settings.GC_MAX_AGE_HOURS > 0:
+            max_age = settings.GC_MAX_AGE_HOURS * 3600
+            for entry in list(candidates):
+                if now - entry.created_at > max_age:
+                    reclaimed += self._delete_project(entry)
+                    deleted.append(entry.project_id)
+                    candidates.remove(entry)
+                    projects.pop(entry.project_id, None)
+
+        # 2. Keep the archive, drop the tree
+        if settings.GC_KEEP_ZIP_DROP_TREE:
+            retention = settings.GC_TREE_RETENTION_HOURS * 3600
+            for entry in candidates:
+                if entry.tree and entry.archives and now - entry.created_at > retention:
+                    reclaimed += self._drop_tree(entry)
+                    dropped.append(entry.project_id)
+
+        # 3. Total byte quota, least recently downloaded first
+        usage = sum(p.total_bytes for p in projects.values())
+        if settings.GC_MAX_TOTAL_BYTES > 0 and usage > settings.GC_MAX_TOTAL_BYTES:
+            for entry in sorted(candidates, key=lambda p: p.last_access):
+                if usage <= settings.GC_MAX_TOTAL_BYTES:
+                    break
+                if entry.project_id in deleted:
+                    continue
+                freed = self._delete_project(entry)
+                usage -= freed
+                reclaimed += freed
+                deleted.append(entry.project_id)
+
+        self.metrics["runs"] += 1
+        self.metrics["reclaimed_bytes_total"] += reclaimed
+        self.metrics["projects_deleted"] += len(deleted)
+        self.metrics["trees_dropped"] += len(dropped)
+        self.metrics["last_run_at"] = started
+        self.metrics["last_run_duration_seconds"] = round(time.time() - started, 3)
+        self.metrics["last_run_reclaimed_bytes"] = reclaimed
+        self.metrics["usage_bytes"] = max(usage, 0)
+
+        if reclaimed:
+            logger.info(
+                f"Garbage collection reclaimed {reclaimed} bytes "
+                f"({len(deleted)} projects deleted, {len(dropped)} trees dropped)"
+            )
+
+        return {"reclaimed_bytes": reclaimed, "deleted": deleted, "trees_dropped": dropped}
+
+    def _drop_tree(self, entry: ProjectArtifacts) -> int:
+        if entry.tree is None:
+            return 0
+        freed = entry.tree_bytes
+        try:
+            shutil.rmtree(entry.tree)
+        except OSError as e:
+            logger.error(f"Failed to drop tree for {entry.project_id}: {str(e)}")
+            return 0
+        entry.tree = None
+        entry.tree_bytes = 0
+        logger.info(f"Dropped source tree for packaged project: {entry.project_id}")
+        return freed
+
+    def _delete_project(self, entry: ProjectArtifacts) -> int:
+        freed = self._drop_tree(entry)
+        freed += self._unlink(entry.archives)
+        entry.archive_bytes = sum(a.stat().st_size for a in entry.archives if a.exists())
+        freed += self._unlink(entry.sidecars)
+        entry.sidecar_bytes = sum(s.stat().st_size for s in entry.sidecars if s.exists())
+        logger.info(f"Deleted project artifacts: {entry.project_id}")
+        return freed
+
+    def _unlink(self, paths: List[Path]) -> int:
+        """Delete files, keeping in ``paths`` the ones that could not be; returns the bytes freed"""
+        freed = 0
+        remaining: List[Path] = []
+        for path in paths:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                freed += size
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.error(f"Failed to delete {path}: {str(e)}")
+                remaining.append(path)
+        paths[:] = remaining
+        return freed
+
+    # ------------------------------------------------------------------
+    # Background loop
+    # ------------------------------------------------------------------
+    def start(self):
+        """Start the periodic collector on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.collect)
+            except Exception as e:
+                logger.error(f"Garbage collection failed: {str(e)}")
+            await asyncio.sleep(settings.GC_INTERVAL_SECONDS)
+
+
+def running_filter(running: Iterable[str]) -> Callable[[str], bool]:
+    """Build an ``is_running`` predicate over a live collection of project ids"""
+    return lambda project_id: project_id in running
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from backend.config import settings
+from backend.utils.backend_registry import BackendRegistry, OllamaBackend, backend_registry
+from backend.utils.latency import llm_latency
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RequestHedger:
+    """Routes LLM calls and hedges the slow ones of latency-critical agents.
+
+    For agents in ``settings.HEDGE_AGENTS`` (the Phase 1 calls every later
+    phase waits on), a call still running after the ``HEDGE_PERCENTILE``
+    latency of that agent is duplicated on a different healthy backend;
+    the first successful answer wins and the other request is cancelled.
+    With a single backend, or ``HEDGE_ENABLED`` off, calls are just routed.
+    """
+
+    def __init__(self, registry: BackendRegistry = backend_registry):
+        self.registry = registry
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def enabled_for(self, model_key: str) -> bool:
+        return (
+            settings.HEDGE_ENABLED
+            and model_key in settings.HEDGE_AGENTS
+            and len(self.registry.backends) > 1
+        )
+
+    def delay(self, model_key: str) -> float:
+        """Seconds to wait for the first request before hedging"""
+        if llm_latency.count(model_key) < settings.TIMEOUT_MIN_SAMPLES:
+            return float(settings.HEDGE_DEFAULT_DELAY_SECONDS)
+        return max(
+            float(settings.HEDGE_MIN_DELAY_SECONDS),
+            llm_latency.percentile(model_key, settings.HEDGE_PERCENTILE),
+        )
+
+    async def run(self, model_key: str, model: str, call: Callable[[OllamaBackend], Awaitable[Any]],
+                  prefix: Optional[str] = None) -> Any:
+        """Run ``call`` on a routed backend, hedged when enabled for the agent"""
+        if not self.enabled_for(model_key):
+            async with self.registry.route(model, prefix=prefix) as backend:
+                return await call(backend)
+
+        stats = self.stats.setdefault(model_key, {"calls": 0, "hedged": 0, "hedge_wins": 0})
+        stats["calls"] += 1
+        used: List[str] = []
+
+        async def routed():
+            async with self.registry.route(model, exclude=used, prefix=prefix) as backend:
+                used.append(backend.url)
+                return await call(backend)
+
+        primary = asyncio.ensure_future(routed())
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.delay(model_key))
+            if done or not self.registry.has_alternative(model, used):
+                return await primary
+
+            stats["hedged"] += 1
+            logger.info(f"Hedging slow {model_key} call on another backend")
+            hedge = asyncio.ensure_future(routed())
+            try:
+                pending = {primary, hedge}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if task is hedge:
+                                stats["hedge_wins"] += 1
+                            return task.result()
+                # Both failed: report the original request's error
+                return primary.result()
+            finally:
+                await self._cancel(hedge)
+        finally:
+            await self._cancel(primary)
+
+    @staticmethod
+    async def _cancel(task: asyncio.Future):
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.HEDGE_ENABLED and len(self.registry.backends) > 1,
+            "agents": {
+                key: {
+                    **stats,
+                    "hedge_rate": round(stats["hedged"] / stats["calls"], 3) if stats["calls"] else 0.0,
+                    "hedge_win_rate": round(stats["hedge_wins"] / stats["hedged"], 3) if stats["hedged"] else 0.0,
+                    "delay_seconds": round(self.delay(key), 2),
+                }
+                for key, stats in self.stats.items()
+            },
+        }
+
+
+request_hedger = RequestHedger()
@@ -0,0 +1,57 @@
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from backend.config import settings
+
+
+class LatencyTracker:
+    """Rolling windows of recent durations (seconds), one per key.
+
+    Keys are free-form: the LLM layer records per agent role and under
+    ``"all"``. Only the last ``settings.LATENCY_WINDOW`` samples of a key
+    count, so percentiles follow the current load rather than history.
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window or settings.LATENCY_WINDOW
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        rank = min(len(samples) - 1, max(0, math.ceil(pct / 100 * len(samples)) - 1))
+        return samples[rank]
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            key: {
+                "samples": self.count(key),
+                "p50": self.percentile(key, 50),
+                "p95": self.percentile(key, 95),
+            }
+            for key in keys
+        }
+
+
+# Time spent generating (per agent role) and waiting for an LLM slot
+llm_latency = LatencyTracker()
+llm_queue_delay = LatencyTracker()
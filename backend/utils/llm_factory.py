@@ -1,46 +1,156 @@
-import os
-from langchain_ollama import OllamaLLM
+import asyncio
+import concurrent.futures
+import time
+from typing import Any, Dict, List, Union
+import httpx
+from crewai import BaseLLM
 from backend.config import settings
+from backend.utils.adaptive_timeouts import adaptive_timeouts, llm_slot_wait
+from backend.utils.latency import llm_latency, llm_queue_delay
+from backend.utils.model_cascade import cascade_model
+from backend.utils.hedging import request_hedger
+from backend.utils.ollama_client import LLMStalled, native_model_name
+from backend.utils.prompts import prefix_key
+from backend.utils.run_context import RunCancelled, get_current_run
+from backend.utils.scheduler import llm_scheduler
+from backend.utils.tracing import KIND_CLIENT, tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LocalLLM(BaseLLM):
+    """crewai LLM that sends each call to Ollama through the fair scheduler.
+
+    crewai converts foreign LLM objects (e.g. langchain's ``OllamaLLM``) into
+    its own litellm wrapper, which leaves nowhere to hook individual calls.
+    ``BaseLLM`` subclasses are used as-is, so this is the single place every
+    agent generation passes through.
+    """
+
+    def __init__(self, model_key: str):
+        model = settings.MODELS[settings.AGENT_MODELS[model_key]]
+        super().__init__(model=model, temperature=0.7)
+        self.model_key = model_key
+        self.options: Dict[str, Any] = {
+            "num_ctx": 2048,  # Smaller context for faster processing
+            "num_batch": 128,
+            "temperature": 0.7,
+        }
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        **kwargs
+    ) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+
+        options = dict(self.options)
+        if self.stop:
+            options["stop"] = list(self.stop)
+        # A cheaper model while the agent's cascade tries one
+        model = cascade_model.get() or self.model
+
+        run = get_current_run()
+        if run is None or run.loop is None:
+            # Outside a pipeline run (scripts, REPL): nothing to cancel
+            return asyncio.run(self._scheduled_chat(messages, options, "anonymous", 1.0, model))
+
+        run.raise_if_cancelled()
+        run.count_llm_call()
+        future = asyncio.run_coroutine_threadsafe(
+            self._scheduled_chat(messages, options, run.client_key, run.weight, model),
+            run.loop
+        )
+        run.track(future)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            raise RunCancelled(f"Project {run.project_id} was cancelled")
+
+    async def _scheduled_chat(self, messages, options, client_key: str, weight: float, model: str) -> str:
+        """Wait for a fair LLM slot, then generate.
+
+        Runs on the server loop: cancelling it either drops the queued slot
+        request or aborts the in-flight HTTP request to Ollama.
+        """
+        # Cost is the prompt size in (roughly estimated) tokens
+        cost = sum(len(m.get("content") or "") for m in messages) / 4
+
+        key = f"{self.model_key}|{native_model_name(model)}"
+        with tracer.span("llm.chat", {"agent": self.model_key, "gen_ai.request.model": model}) as span:
+            queued_at = time.monotonic()
+            with llm_slot_wait():
+                await llm_scheduler.acquire_async(client_key, weight, cost)
+            started = time.monotonic()
+            llm_queue_delay.record("all", started - queued_at)
+            try:
+                response = await self._chat_with_stall_retry(key, model, messages, options, prompt_tokens=cost)
+                elapsed = time.monotonic() - started
+                llm_latency.record(self.model_key, elapsed)
+                llm_latency.record("all", elapsed)
+                adaptive_timeouts.record_call(key, response)
+            finally:
+                llm_scheduler.release()
+            span.update({
+                "llm.queue_ms": round((started - queued_at) * 1000),
+                "gen_ai.usage.input_tokens": response.get("prompt_eval_count"),
+                "gen_ai.usage.output_tokens": response.get("eval_count"),
+                "llm.load_ms": round(response.get("load_duration", 0) / 1e6),
+                # The model was already resident on the backend: a warm load takes milliseconds
+                "llm.cache_hit": response.get("load_duration", 0) < 100_000_000,
+                "llm.output_bytes": len(response.get("message", {}).get("content") or ""),
+                # Shrinks when Ollama reuses the KV cache of a shared prompt prefix
+                "llm.prompt_eval_ms": round(response.get("prompt_eval_duration", 0) / 1e6),
+            })
+
+        return response.get("message", {}).get("content", "")
+
+    async def _chat_with_stall_retry(self, key: str, model: str, messages, options,
+                                     prompt_tokens: float) -> Dict[str, Any]:
+        """Chat with adaptive time limits; a stalled or failed connection is retried"""
+        first_token = adaptive_timeouts.first_token_timeout(key, prompt_tokens)
+        budget = adaptive_timeouts.call_timeout(key, prompt_tokens, options.get("num_predict"))
+        # Calls of the same agent go where its prompt prefix is already cached
+        prefix = prefix_key(model, messages)
+
+        async def chat_on(backend):
+            # One span per attempt, so retries and hedges show up side by side
+            with tracer.span("llm.request", {"server.address": backend.url}, kind=KIND_CLIENT):
+                return await asyncio.wait_for(
+                    backend.client.chat(
+                        model, messages, options,
+                        keep_alive=settings.MODEL_KEEP_ALIVE_BUSY,
+                        first_token_timeout=first_token,
+                        stall_timeout=settings.LLM_STALL_SECONDS,
+                    ),
+                    timeout=budget
+                )
+
+        for attempt in range(settings.LLM_STALL_RETRIES + 1):
+            try:
+                # Every attempt is routed afresh, so a retry can land on another backend
+                return await request_hedger.run(self.model_key, model, chat_on, prefix=prefix)
+            except (LLMStalled, asyncio.TimeoutError, httpx.TransportError) as e:
+                reason = str(e) or f"call exceeded {budget:.0f}s"
+                if attempt == settings.LLM_STALL_RETRIES:
+                    raise LLMStalled(f"{key}: {reason}")
+                logger.warning(f"{key}: {reason}, retrying")
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return self.options["num_ctx"]
 
-# Force set LiteLLM environment variables
-os.environ['LITELLM_REQUEST_TIMEOUT'] = "1800"
-os.environ['LITELLM_TIMEOUT'] = "1800"
-os.environ['OLLAMA_REQUEST_TIMEOUT'] = "1800"
-os.environ['OPENAI_TIMEOUT'] = "1800"
-os.environ['DEFAULT_TIMEOUT'] = "1800"
-
-# Monkey patch litellm timeout
-try:
-    import litellm
-    litellm.request_timeout = 1800
-    litellm.timeout = 1800
-    litellm.max_timeout = 1800
-    # Override the default timeout in litellm config
-    if hasattr(litellm, 'DEFAULT_TIMEOUT'):
-        litellm.DEFAULT_TIMEOUT = 1800
-except:
-    pass
 
 def create_llm(model_key: str):
-    """Create an LLM instance with proper timeout configuration"""
-    
-    model = settings.MODELS[settings.AGENT_MODELS[model_key]]
-    
-    # Create the LLM with all timeout parameters
-    llm = OllamaLLM(
-        model=model,
-        base_url=settings.OLLAMA_BASE_URL,
-        timeout=1800,  # Hardcode to 30 minutes
-        request_timeout=1800,
-        num_ctx=2048,  # Smaller context for faster processing
-        num_batch=128,
-        temperature=0.7,
-        keep_alive="30m"  # Keep model loaded for 30 minutes
-    )
-    
-    # Try to override internal timeout if accessible
-    if hasattr(llm, '_client'):
-        if hasattr(llm._client, 'timeout'):
-            llm._client.timeout = 1800
-    
-    return llm
\ No newline at end of file
+    """Create an LLM instance for the agent role ``model_key``"""
+    return LocalLLM(model_key)
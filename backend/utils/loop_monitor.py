@@ -0,0 +1,191 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from backend.config import settings
+from backend.utils.latency import LatencyTracker
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Frames below these are the loop's own machinery, not the blocking code
+LOOP_INTERNALS = ("asyncio/base_events.py", "asyncio/events.py", "asyncio/runners.py", "uvicorn/")
+
+
+class LoopBlocked(AssertionError):
+    """The event loop was blocked inside ``assert_no_blocking``"""
+
+
+@dataclass
+class BlockingIncident:
+    """One stretch of time in which the loop did not get to run"""
+    started_at: float
+    duration: float
+    stack: List[str] = field(default_factory=list)
+    where: str = ""
+    ongoing: bool = True
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "duration_seconds": round(self.duration, 3),
+            "where": self.where,
+            "ongoing": self.ongoing,
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    """Measures event-loop lag and catches callbacks that block the loop.
+
+    A task on the loop sleeps ``LOOP_MONITOR_INTERVAL_SECONDS`` at a time;
+    how late each wake-up comes is the loop lag. A watchdog thread checks
+    that those wake-ups keep coming: once the loop has been unresponsive
+    for ``LOOP_BLOCK_THRESHOLD_SECONDS`` it records the loop thread's stack
+    right then, which is the code doing the blocking (a synchronous crewai
+    call, file I/O, JSON on a large payload). The last
+    ``LOOP_BLOCK_INCIDENTS`` incidents are kept for ``/metrics``.
+    """
+
+    def __init__(self, interval: Optional[float] = None, threshold: Optional[float] = None):
+        self.interval = interval or settings.LOOP_MONITOR_INTERVAL_SECONDS
+        self.threshold = threshold or settings.LOOP_BLOCK_THRESHOLD_SECONDS
+        # About the last minute of wake-ups
+        self.lag = LatencyTracker(window=max(int(60 / self.interval), 1))
+        self.incidents: Deque[BlockingIncident] = deque(maxlen=settings.LOOP_BLOCK_INCIDENTS)
+        self.blocked_total = 0
+        self.blocked_seconds_total = 0.0
+        self._current: Optional[BlockingIncident] = None
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start monitoring the running event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag.record("loop", max(0.0, now - expected))
+            with self._lock:
+                self._beat = now
+                incident, self._current = self._current, None
+            if incident is not None:
+                self._close(incident, now - expected)
+
+    def _watch(self):
+        while not self._stopped.wait(min(self.interval, self.threshold) / 2):
+            with self._lock:
+                silent = time.monotonic() - self._beat - self.interval
+                if silent < self.threshold:
+                    continue
+                if self._current is not None:
+                    self._current.duration = silent
+                    continue
+                self._current = incident = BlockingIncident(started_at=time.time() - silent, duration=silent)
+            # Outside the lock: walking the stack may take a moment
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                incident.stack, incident.where = self._blocking_stack(frame)
+            logger.warning(
+                f"Event loop blocked for {silent:.2f}s+ in {incident.where or 'unknown code'}\n"
+                + "\n".join(incident.stack)
+            )
+
+    @staticmethod
+    def _blocking_stack(frame) -> Tuple[List[str], str]:
+        """The stack above the loop's callback dispatch, and its innermost frame"""
+        summaries = traceback.extract_stack(frame)
+        internal = [
+            i for i, summary in enumerate(summaries)
+            if any(part in summary.filename.replace("\\", "/") for part in LOOP_INTERNALS)
+        ]
+        if internal and internal[-1] + 1 < len(summaries):
+            summaries = summaries[internal[-1] + 1:]
+        summaries = summaries[-settings.LOOP_BLOCK_STACK_DEPTH:]
+        stack = [line.rstrip() for line in traceback.format_list(summaries)]
+        top = summaries[-1]
+        path = top.filename.replace("\\", "/")
+        return stack, f"{top.name} ({'/'.join(path.split('/')[-2:])}:{top.lineno})"
+
+    def _close(self, incident: BlockingIncident, duration: float):
+        incident.duration = max(incident.duration, duration)
+        incident.ongoing = False
+        self.incidents.append(incident)
+        self.blocked_total += 1
+        self.blocked_seconds_total += incident.duration
+        logger.info(f"Event loop was blocked for {incident.duration:.2f}s in {incident.where or 'unknown code'}")
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        def ms(pct: float) -> Optional[float]:
+            value = self.lag.percentile("loop", pct)
+            return None if value is None else round(value * 1000, 1)
+
+        incidents = list(self.incidents)
+        if self._current is not None:
+            incidents.append(self._current)
+        return {
+            "lag_ms": {"p50": ms(50), "p95": ms(95), "p99": ms(99), "max": ms(100)},
+            "block_threshold_seconds": self.threshold,
+            "blocked_total": self.blocked_total,
+            "blocked_seconds_total": round(self.blocked_seconds_total, 3),
+            "incidents": [incident.describe() for incident in reversed(incidents)],
+        }
+
+
+@asynccontextmanager
+async def assert_no_blocking(threshold: Optional[float] = None):
+    """Fail with ``LoopBlocked`` if the loop blocks inside the block (for tests).
+
+        async with assert_no_blocking(threshold=0.1):
+            await crew_manager.execute_project(request)
+    """
+    monitor = LoopMonitor(threshold=threshold)
+    monitor.start()
+    try:
+        yield monitor
+        # Let a block at the very end finish and be recorded
+        await asyncio.sleep(monitor.interval * 2)
+    finally:
+        await monitor.stop()
+    if monitor.incidents:
+        worst = max(monitor.incidents, key=lambda incident: incident.duration)
+        raise LoopBlocked(
+            f"Event loop blocked {len(monitor.incidents)} time(s), longest {worst.duration:.2f}s "
+            f"in {worst.where or 'unknown code'}:\n" + "\n".join(worst.stack)
+        )
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from backend.config import settings
+from backend.utils.run_context import RunCancelled
+from backend.utils.static_validator import BLOCKING_KINDS, analyze_file
+from backend.utils.tracing import tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Model the current attempt's LLM calls go to instead of the agent's own
+cascade_model: ContextVar[Optional[str]] = ContextVar("cascade_model", default=None)
+
+OutputCheck = Callable[[str], bool]
+
+
+def json_output(kind: type = dict, keys: tuple = ()) -> OutputCheck:
+    """Output parses as JSON of ``kind``, with ``keys`` present for an object"""
+    def check(output: str) -> bool:
+        try:
+            data = json.loads(output)
+        except (TypeError, ValueError):
+            return False
+        return isinstance(data, kind) and (kind is not dict or all(key in data for key in keys))
+    return check
+
+
+def strip_code_fence(output: str) -> str:
+    """Drop a surrounding markdown code fence if the model added one"""
+    code = output.strip()
+    if code.startswith("```"):
+        code = code.split("\n", 1)[1] if "\n" in code else ""
+        if code.rstrip().endswith("```"):
+            code = code.rstrip()[:-3]
+    return code
+
+
+def source_output(filename: str, fenced: bool = False) -> OutputCheck:
+    """Output is ``filename``'s content without problems static validation blocks on.
+
+    ``fenced``: the caller strips a code fence before using the output.
+    """
+    def check(output: str) -> bool:
+        content = strip_code_fence(output) if fenced else output.strip()
+        if not content:
+            return False
+        issues = analyze_file(filename, content)["issues"]
+        return not any(issue["kind"] in BLOCKING_KINDS for issue in issues)
+    return check
+
+
+class ModelCascade:
+    """Sends an agent's calls to cheaper models first.
+
+    ``MODEL_CASCADES`` lists, per agent, ``MODELS`` keys to try before the
+    agent's assigned model, cheapest first. Each attempt's output goes
+    through the call's check (the JSON shape its parser expects, or static
+    validation of generated code); output that fails it, or an attempt that
+    errors, escalates to the next model, and the assigned model's output is
+    used whatever it looks like. Calls without a check go straight to the
+    assigned model. Acceptance per agent and model is kept for ``/metrics``,
+    for tuning the cascades.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+    def tiers(self, model_key: str) -> List[Optional[str]]:
+        """Models to try in order; ``None`` is the agent's assigned model"""
+        cheaper = [settings.MODELS[key] for key in settings.MODEL_CASCADES.get(model_key, []) if key in settings.MODELS]
+        return cheaper + [None]
+
+    def record(self, model_key: str, model: str, accepted: bool):
+        stats = self.stats.setdefault(model_key, {}).setdefault(model, {"attempts": 0, "accepted": 0})
+        stats["attempts"] += 1
+        stats["accepted"] += int(accepted)
+
+    async def run(
+        self,
+        model_key: str,
+        assigned: str,
+        attempt: Callable[[], Awaitable[str]],
+        check: Optional[OutputCheck] = None
+    ) -> str:
+        """Run ``attempt`` per tier until its output passes ``check``"""
+        tiers = self.tiers(model_key) if check is not None else [None]
+        span = tracer.current()
+        for index, model in enumerate(tiers):
+            last = index == len(tiers) - 1
+            name = model or assigned
+            token = cascade_model.set(model)
+            try:
+                output = await attempt()
+            except RunCancelled:
+                raise
+            except Exception as e:
+                if last:
+                    raise
+                self.record(model_key, name, False)
+                logger.warning(f"{model_key}: {name} failed ({str(e)}), escalating")
+                continue
+            finally:
+                cascade_model.reset(token)
+
+            accepted = check is None or await self._passes(check, output)
+            if check is not None:
+                self.record(model_key, name, accepted)
+            if accepted or last:
+                span.update({"cascade.model": name, "cascade.escalations": index})
+                return output
+            logger.info(f"{model_key}: output of {name} failed its checks, escalating")
+
+    @staticmethod
+    async def _passes(check: OutputCheck, output: str) -> bool:
+        try:
+            # Checks may parse a whole generated file: keep that off the loop
+            return bool(await asyncio.to_thread(check, output))
+        except Exception as e:  # a broken check must not fail the call
+            logger.warning(f"Output check failed: {str(e)}")
+            return False
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "cascades": settings.MODEL_CASCADES,
+            "agents": {
+                model_key: {
+                    model: {
+                        **stats,
+                        "success_rate": round(stats["accepted"] / stats["attempts"], 3) if stats["attempts"] else 0.0,
+                    }
+                    for model, stats in models.items()
+                }
+                for model_key, models in self.stats.items()
+            },
+        }
+
+
+model_cascade = ModelCascade()
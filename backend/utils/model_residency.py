@@ -0,0 +1,163 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from backend.config import settings
+from backend.utils.backend_registry import BackendRegistry, OllamaBackend, backend_registry
+from backend.utils.ollama_client import canonical_model_name
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ModelResidencyManager:
+    """Keeps the configured models loaded in Ollama and reports readiness.
+
+    On start every model in ``settings.MODELS`` is loaded in the background
+    on each backend that has it, one at a time per backend in the order the
+    pipeline first needs them, so the first project does not pay the cold
+    loads mid-run; if no backend is reachable yet, warm-up waits for the
+    first probe that finds one. A periodic probe tracks reachability and
+    residency, and ``readiness`` reports what it last saw; while ``pending_work`` reports
+    running or queued projects, resident models get their ``keep_alive``
+    extended, and once the server goes idle it is shortened again.
+    """
+
+    def __init__(self, pending_work: Callable[[], int] = lambda: 0,
+                 registry: BackendRegistry = backend_registry):
+        self.pending_work = pending_work
+        self.registry = registry
+        self._task: Optional[asyncio.Task] = None
+        self._busy = False
+        self.warmup_status = "pending"
+        self.reachable = False
+        self.last_error: Optional[str] = None
+        self.last_probe_at: Optional[float] = None
+        self.available: Set[str] = set()
+        self.loaded: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def models(self) -> List[str]:
+        """Configured models in order of first use by the agents"""
+        order = list(dict.fromkeys(settings.AGENT_MODELS.values()))
+        order += [key for key in settings.MODELS if key not in order]
+        return [settings.MODELS[key] for key in order if key in settings.MODELS]
+
+    async def probe(self):
+        """Refresh reachability, available models and loaded models"""
+        await self.registry.check()
+        healthy = [b for b in self.registry.backends if b.healthy]
+        self.reachable = bool(healthy)
+        self.available = set().union(*[b.available or () for b in healthy])
+        self.loaded = {}
+        for backend in healthy:
+            self.loaded.update(backend.loaded)
+        errors = [f"{b.url}: {b.last_error}" for b in self.registry.backends if b.last_error]
+        self.last_error = "; ".join(errors) or None
+        self.last_probe_at = time.time()
+
+    async def _warm_backend(self, backend: OllamaBackend) -> List[str]:
+        failed = []
+        for model in self.models:
+            if not backend.has_model(model):
+                continue
+            started = time.monotonic()
+            try:
+                await backend.client.load(model, keep_alive=settings.MODEL_KEEP_ALIVE_BUSY)
+                logger.info(f"Preloaded {model} on {backend.url} in {time.monotonic() - started:.1f}s")
+            except Exception as e:
+                failed.append(model)
+                logger.warning(f"Could not preload {model} on {backend.url}: {str(e)}")
+        return failed
+
+    async def warm_up(self):
+        # Backends that have answered a probe: one never reached only looks healthy
+        healthy = [b for b in self.registry.backends if b.healthy and b.available is not None]
+        if not healthy:
+            return  # still pending: retried once a backend answers
+        self.warmup_status = "running"
+        try:
+            # Backends load in parallel, each one model at a time
+            results = await asyncio.gather(*[self._warm_backend(b) for b in healthy])
+        except BaseException:
+            self.warmup_status = "pending"
+            raise
+        self.warmup_status = "failed" if any(results) else "done"
+        await self.probe()
+
+    async def refresh_residency(self):
+        """Extend keep_alive while work is pending; shorten it once idle"""
+        busy = self.pending_work() > 0
+        if not busy and not self._busy:
+            return
+        keep_alive = settings.MODEL_KEEP_ALIVE_BUSY if busy else settings.MODEL_KEEP_ALIVE_IDLE
+        # Only resident models: loading evicted ones could push out the
+        # model the running pipeline is using right now
+        for backend in self.registry.backends:
+            if not backend.healthy:
+                continue
+            for model in self.models:
+                if backend.is_loaded(model):
+                    try:
+                        await backend.client.load(model, keep_alive=keep_alive)
+                    except Exception as e:
+                        logger.warning(f"Could not refresh keep_alive for {model} on {backend.url}: {str(e)}")
+        self._busy = busy
+
+    def readiness(self) -> Dict[str, Any]:
+        models = {}
+        for model in self.models:
+            name = canonical_model_name(model)
+            resident = self.loaded.get(name)
+            models[name] = {
+                "available": name in self.available,
+                "loaded": resident is not None,
+                "expires_at": resident.get("expires_at") if resident else None,
+            }
+        ready = (
+            self.reachable
+            and self.warmup_status in ("done", "failed")
+            and all(m["available"] for m in models.values())
+        )
+        return {
+            "ready": ready,
+            "backends": {
+                b.url: {
+                    "healthy": b.healthy,
+                    "error": b.last_error,
+                    "loaded_models": sorted(b.loaded),
+                }
+                for b in self.registry.backends
+            },
+            "reachable": self.reachable,
+            "warmup": self.warmup_status,
+            "models": models,
+            "probed_at": self.last_probe_at,
+        }
+
+    def start(self):
+        """Start warm-up and the periodic probe on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        if not settings.MODEL_WARMUP_ENABLED:
+            self.warmup_status = "done"
+        while True:
+            try:
+                await self.probe()
+                if self.warmup_status == "pending":
+                    await self.warm_up()
+                elif self.reachable:
+                    await self.refresh_residency()
+            except Exception as e:
+                logger.error(f"Model residency check failed: {str(e)}")
+            await asyncio.sleep(settings.MODEL_PROBE_SECONDS)
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from backend.config import settings
+from backend.utils.project_state import content_hash
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 1024
+# Approximate search: random-hyperplane LSH, a row is a candidate if it
+# shares the query's bucket in any table
+LSH_TABLES = 16
+LSH_BITS = 8
+STOPWORDS = {
+    "a", "an", "and", "as", "be", "by", "for", "from", "in", "into", "is", "it", "of",
+    "on", "or", "that", "the", "this", "to", "with", "module", "implement", "file", "py",
+}
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """numpy, imported on first use rather than at startup; None if missing"""
+    try:
+        import numpy
+    except ImportError:
+        logger.warning("numpy is not installed, the module index is disabled")
+        return None
+    return numpy
+
+
+def _words(text: str) -> List[str]:
+    words = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in STOPWORDS:
+            continue
+        # A crude plural fold: "users" and "user" are the same feature
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def subtask_text(filename: str, description: str) -> str:
+    """What a subtask is indexed and searched by: the file's stem and the description"""
+    return f"{PurePosixPath(filename).stem.replace('_', ' ')} {description}"
+
+
+def embed(text: str):
+    """Feature-hashed counts of the words and word pairs of ``text``, L2-normalised.
+
+    Computed locally and instantly; near-identical subtask descriptions
+    share most of their words and word pairs, which is what reuse needs.
+    """
+    np = _numpy()
+    words = _words(text)
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        # The top bit signs the feature, so collisions cancel out on average
+        vector[digest % DIMENSIONS] += 1.0 if digest >> 63 else -1.0
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class ModuleMatch:
+    """An indexed module close to a subtask"""
+    score: float
+    filename: str
+    description: str
+    project_id: str
+    sha1: str
+    content: Optional[str] = None
+
+
+class ModuleIndex:
+    """Validated modules of earlier projects, searchable by subtask.
+
+    Every module that passed static validation is indexed under its
+    subtask's file name and description and the client key of the project
+    it came from; searches only return the same client's modules, so code
+    never crosses tenants. The embeddings as one NumPy
+    matrix (``vectors.npy``), their metadata in ``entries.json`` and each
+    distinct content once under ``modules/<sha1>``, all in
+    ``GENERATED_DIR/.module_index`` (the garbage collector skips dot
+    entries). Search is a cosine over the whole matrix; from
+    ``MODULE_INDEX_ANN_MIN_ENTRIES`` entries only the rows sharing an LSH
+    bucket with the query are scored. The oldest entries go once there are
+    more than ``MODULE_INDEX_MAX_ENTRIES``.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or Path(settings.GENERATED_DIR) / ".module_index")
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._vectors = None
+        self._entries: List[Dict[str, Any]] = []
+        self._keys = set()
+        self._lsh = None
+        self.searches = 0
+        self.added = 0
+        self.reused = 0
+        self.examples = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.MODULE_INDEX_ENABLED and _numpy() is not None
+
+    @staticmethod
+    def _key(entry: Dict[str, Any]) -> Tuple[str, str, str]:
+        return entry.get("client_key", ""), entry["sha1"], " ".join(entry["description"].lower().split())
+
+    def _load(self):
+        """Read the index from disk on first use (under the lock)"""
+        if self._loaded:
+            return
+        np = _numpy()
+        self._loaded = True
+        self._vectors = np.zeros((0, DIMENSIONS), dtype=np.float32)
+        try:
+            with open(self.path / "entries.json", "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            with open(self.path / "vectors.npy", "rb") as f:
+                vectors = np.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read the module index: {str(e)}")
+            return
+        if vectors.shape != (len(entries), DIMENSIONS):
+            # Interrupted between writing the two files
+            logger.warning("Module index files do not match, starting a new index")
+            return
+        self._entries, self._vectors = entries, vectors.astype(np.float32, copy=False)
+        self._keys = {self._key(entry) for entry in entries}
+
+    def _save(self):
+        np = _numpy()
+        self.path.mkdir(parents=True, exist_ok=True)
+        for name, write in (
+            ("vectors.npy", lambda f: np.save(f, self._vectors)),
+            ("entries.json", lambda f: f.write(json.dumps(self._entries).encode("utf-8"))),
+        ):
+            path = self.path / name
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+
+    def add(self, client_key: str, project_id: str, modules: Iterable[Tuple[str, str, str]]) -> int:
+        """Index a project's validated ``(filename, description, content)`` modules"""
+        if not self.enabled:
+            return 0
+        np = _numpy()
+        with self._lock:
+            self._load()
+            entries, rows = [], []
+            for filename, description, content in modules:
+                entry = {
+                    "filename": filename,
+                    "description": description,
+                    "project_id": project_id,
+                    "client_key": client_key,
+                    "sha1": content_hash(content),
+                    "added_at": time.time(),
+                }
+                if not content.strip() or self._key(entry) in self._keys:
+                    continue
+                stored = self.path / "modules" / entry["sha1"]
+                if not stored.exists():
+                    stored.parent.mkdir(parents=True, exist_ok=True)
+                    with open(stored, "w", encoding="utf-8") as f:
+                        f.write(content)
+                self._keys.add(self._key(entry))
+                entries.append(entry)
+                rows.append(embed(subtask_text(filename, description)))
+            if not entries:
+                return 0
+
+            # New objects rather than in-place changes: searches hold the old ones
+            self._entries = self._entries + entries
+            self._vectors = np.vstack([self._vectors, np.stack(rows)])
+            self._evict()
+            self._lsh = None
+            self._save()
+        self.added += len(entries)
+        return len(entries)
+
+    def _evict(self):
+        excess = len(self._entries) - settings.MODULE_INDEX_MAX_ENTRIES
+        if excess <= 0:
+            return
+        dropped, self._entries = self._entries[:excess], self._entries[excess:]
+        self._vectors = self._vectors[excess:]
+        self._keys = {self._key(entry) for entry in self._entries}
+        kept = {entry["sha1"] for entry in self._entries}
+        for entry in dropped:
+            if entry["sha1"] not in kept:
+                (self.path / "modules" / entry["sha1"]).unlink(missing_ok=True)
+
+    def search(self, client_key: str, filename: str, description: str,
+               k: int = 3, min_score: float = 0.0) -> List[ModuleMatch]:
+        """The ``k`` most similar modules of ``client_key`` with the same file type"""
+        if not self.enabled:
+            return []
+        np = _numpy()
+        query = embed(subtask_text(filename, description))
+        if not query.any():
+            return []
+        with self._lock:
+            self._load()
+            self.searches += 1
+            vectors, entries = self._vectors, self._entries
+            rows = self._candidates(query) if len(entries) >= settings.MODULE_INDEX_ANN_MIN_ENTRIES else None
+        if rows is None:
+            rows = np.arange(len(entries))
+        scores = vectors[rows] @ query
+
+        suffix = PurePosixPath(filename).suffix
+        matches: List[ModuleMatch] = []
+        for i in np.argsort(-scores, kind="stable"):
+            if scores[i] < min_score or len(matches) == k:
+                break
+            entry = entries[rows[i]]
+            # Entries from before client keys were stored belong to nobody
+            if entry.get("client_key") != client_key or PurePosixPath(entry["filename"]).suffix != suffix:
+                continue
+            matches.append(ModuleMatch(
+                score=round(float(scores[i]), 4), filename=entry["filename"],
+                description=entry["description"], project_id=entry["project_id"], sha1=entry["sha1"]
+            ))
+        return matches
+
+    def _candidates(self, query):
+        """Rows sharing an LSH bucket with ``query`` (under the lock)"""
+        np = _numpy()
+        if self._lsh is None:
+            self._lsh = self._build_lsh()
+        planes, tables = self._lsh
+        codes = self._codes(query[None, :], planes)[0]
+        buckets = [table[code] for table, code in zip(tables, codes.tolist()) if code in table]
+        return np.unique(np.concatenate(buckets)) if buckets else np.zeros(0, dtype=np.int64)
+
+    def _build_lsh(self):
+        np = _numpy()
+        # A fixed seed: the buckets only live in memory, but stay comparable between rebuilds
+        planes = np.random.default_rng(0).standard_normal((LSH_TABLES * LSH_BITS, DIMENSIONS)).astype(np.float32)
+        codes = self._codes(self._vectors, planes)
+        tables = []
+        for column in codes.T:
+            order = np.argsort(column, kind="stable")
+            values, starts = np.unique(column[order], return_index=True)
+            tables.append(dict(zip(values.tolist(), np.split(order, starts[1:]))))
+        return planes, tables
+
+    @staticmethod
+    def _codes(vectors, planes):
+        """Per row, one ``LSH_BITS``-bit bucket code per table"""
+        np = _numpy()
+        bits = (vectors @ planes.T > 0).reshape(len(vectors), LSH_TABLES, LSH_BITS)
+        return bits.astype(np.int64) @ (1 << np.arange(LSH_BITS, dtype=np.int64))
+
+    def content(self, sha1: str) -> Optional[str]:
+        try:
+            with open(self.path / "modules" / sha1, "r", encoding="utf-8") as f:
+                return f.read()
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+
+    def suggest(self, client_key: str, filename: str, description: str) -> Tuple[Optional[ModuleMatch], List[ModuleMatch]]:
+        """A module of the client's to reuse as is for the subtask, or else ones to show as examples"""
+        matches = self.search(client_key, filename, description, k=1, min_score=settings.MODULE_EXAMPLE_SIMILARITY)
+        for match in matches:
+            match.content = self.content(match.sha1)
+        matches = [match for match in matches if match.content]
+        if matches and matches[0].score >= settings.MODULE_REUSE_SIMILARITY:
+            self.reused += 1
+            return matches[0], []
+        self.examples += len(matches)
+        return None, matches
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.MODULE_INDEX_ENABLED,
+            "entries": len(self._entries),
+            "approximate": len(self._entries) >= settings.MODULE_INDEX_ANN_MIN_ENTRIES,
+            "searches": self.searches,
+            "added": self.added,
+            "reused": self.reused,
+            "examples_offered": self.examples,
+        }
+
+
+module_index = ModuleIndex()
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import httpx
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def native_model_name(model: str) -> str:
+    """Strip the litellm provider prefix ("ollama/mistral" -> "mistral")"""
+    return model.split("/", 1)[1] if model.startswith("ollama/") else model
+
+
+def canonical_model_name(model: str) -> str:
+    """Name as Ollama reports it in /api/tags and /api/ps ("mistral" -> "mistral:latest")"""
+    name = native_model_name(model)
+    return name if ":" in name else f"{name}:latest"
+
+
+class LLMStalled(Exception):
+    """The model stopped producing tokens (or never started) within the allowed gap"""
+
+
+class OllamaClient:
+    """Minimal async client for the Ollama HTTP API.
+
+    Requests are plain asyncio tasks, so cancelling the awaiting task closes
+    the HTTP connection and Ollama stops generating for it.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None):
+        self.base_url = (base_url or settings.OLLAMA_BASE_URL).rstrip("/")
+        self.timeout = timeout or settings.MODEL_MAX_TIMEOUT
+
+    async def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: str = "30m",
+        first_token_timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Run a chat completion and return it in Ollama's non-streaming shape.
+
+        The response is streamed so a hung generation is noticed by token
+        inactivity: ``first_token_timeout`` bounds the wait for the first
+        chunk (model load and prompt evaluation), ``stall_timeout`` every
+        later gap. Either raises ``LLMStalled``.
+        """
+        payload = {
+            "model": native_model_name(model),
+            "messages": messages,
+            "stream": True,
+            "options": options or {},
+            "keep_alive": keep_alive,
+        }
+        parts: List[str] = []
+        final: Dict[str, Any] = {}
+        wait = first_token_timeout or self.timeout
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=httpx.Timeout(self.timeout, read=None)) as client:
+            async with client.stream("POST", "/api/chat", json=payload) as response:
+                response.raise_for_status()
+                lines = response.aiter_lines()
+                while True:
+                    try:
+                        line = await asyncio.wait_for(lines.__anext__(), timeout=wait)
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        stage = "first token" if not parts else "next token"
+                        raise LLMStalled(f"{model} produced no {stage} for {wait:.0f}s")
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(f"Ollama error: {chunk['error']}")
+                    parts.append(chunk.get("message", {}).get("content", ""))
+                    wait = stall_timeout or self.timeout
+                    if chunk.get("done"):
+                        final = chunk
+                        break
+        final["message"] = {"role": "assistant", "content": "".join(parts)}
+        return final
+
+    async def load(self, model: str, keep_alive: str = "30m") -> Dict[str, Any]:
+        """Load a model into memory (or extend its residency) without generating"""
+        payload = {"model": native_model_name(model), "keep_alive": keep_alive}
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout) as client:
+            response = await client.post("/api/generate", json=payload)
+            response.raise_for_status()
+            return response.json()
+
+    async def loaded_models(self) -> Dict[str, Dict[str, Any]]:
+        """Models currently in memory, by name (GET /api/ps)"""
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout) as client:
+            response = await client.get("/api/ps")
+            response.raise_for_status()
+            return {m["name"]: m for m in response.json().get("models", [])}
+
+    async def available_models(self) -> Dict[str, Dict[str, Any]]:
+        """Models pulled on the server, by name (GET /api/tags)"""
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout) as client:
+            response = await client.get("/api/tags")
+            response.raise_for_status()
+            return {m["name"]: m for m in response.json().get("models", [])}
@@ -0,0 +1,172 @@
+import difflib
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+from backend.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+SEARCH_REPLACE_BLOCK = re.compile(
+    r"^<{5,9} ?SEARCH[^\n]*\n(.*?)^={5,9}[^\n]*\n(.*?)^>{5,9} ?REPLACE[^\n]*$", re.S | re.M
+)
+
+
+class PatchConflict(Exception):
+    """A fix does not apply cleanly to the current file content"""
+
+
+@dataclass
+class Edit:
+    search: List[str]
+    replace: List[str]
+    # 0-based line where a diff hunk expected the match, used to break ties
+    hint: Optional[int] = None
+
+
+@dataclass
+class PatchResult:
+    content: str
+    mode: str  # "patch", "rewrite" or "created"
+    fuzzy_edits: int = 0
+
+
+def _lines(text: str) -> List[str]:
+    return text.splitlines() if text else []
+
+
+def is_unified_diff(text: str) -> bool:
+    return any(HUNK_HEADER.match(line) for line in text.splitlines())
+
+
+def parse_unified_diff(text: str) -> List[Edit]:
+    edits: List[Edit] = []
+    current: Optional[Edit] = None
+    for line in text.splitlines():
+        header = HUNK_HEADER.match(line)
+        if header:
+            current = Edit([], [], hint=max(int(header.group(1)) - 1, 0))
+            edits.append(current)
+        elif current is None or line.startswith("\\"):
+            continue  # file headers, "\ No newline at end of file"
+        elif line.startswith("-"):
+            current.search.append(line[1:])
+        elif line.startswith("+"):
+            current.replace.append(line[1:])
+        else:
+            # Context; models often drop the leading space of blank lines
+            context = line[1:] if line.startswith(" ") else line
+            current.search.append(context)
+            current.replace.append(context)
+    return edits
+
+
+def parse_search_replace(text: str) -> List[Edit]:
+    return [
+        Edit(_lines(search), _lines(replace))
+        for search, replace in SEARCH_REPLACE_BLOCK.findall(text)
+    ]
+
+
+def _stripped(lines: List[str]) -> List[str]:
+    return [line.strip() for line in lines]
+
+
+def _pick(matches: List[int], edit: Edit) -> int:
+    if len(matches) == 1:
+        return matches[0]
+    if edit.hint is None:
+        raise PatchConflict(f"edit is ambiguous, it matches {len(matches)} places")
+    return min(matches, key=lambda i: abs(i - edit.hint))
+
+
+def _locate(lines: List[str], edit: Edit, fuzz: float) -> Tuple[int, bool]:
+    """Start line of ``edit.search`` in ``lines`` and whether it matched exactly"""
+    size = len(edit.search)
+    if size == 0:
+        return (len(lines) if edit.hint is None else min(edit.hint, len(lines))), True
+    starts = range(len(lines) - size + 1)
+
+    exact = [i for i in starts if lines[i:i + size] == edit.search]
+    if exact:
+        return _pick(exact, edit), True
+
+    # Models routinely get indentation and trailing whitespace wrong
+    target = _stripped(edit.search)
+    loose = [i for i in starts if _stripped(lines[i:i + size]) == target]
+    if loose:
+        return _pick(loose, edit), False
+
+    wanted = "\n".join(target)
+    scored = sorted(
+        ((difflib.SequenceMatcher(None, "\n".join(_stripped(lines[i:i + size])), wanted).ratio(), i)
+         for i in starts),
+        reverse=True
+    )
+    if scored and scored[0][0] >= fuzz:
+        if len(scored) > 1 and scored[1][0] >= fuzz and edit.hint is None:
+            raise PatchConflict("edit is ambiguous, it resembles several places")
+        return _pick([i for ratio, i in scored if ratio >= fuzz], edit), False
+    raise PatchConflict(f"edit does not match the file: {edit.search[0].strip()[:60]!r}")
+
+
+def apply_edits(original: str, edits: List[Edit], fuzz: float) -> Tuple[str, int]:
+    """Apply edits located against the original; overlapping edits conflict"""
+    lines = original.splitlines()
+    spans = []
+    fuzzy = 0
+    for edit in edits:
+        start, exact = _locate(lines, edit, fuzz)
+        fuzzy += not exact
+        spans.append((start, start + len(edit.search), edit))
+    spans.sort(key=lambda span: (span[0], span[1]))
+    for (_, end, _), (start, _, _) in zip(spans, spans[1:]):
+        if start < end:
+            raise PatchConflict(f"edits overlap at line {start + 1}")
+    for start, end, edit in reversed(spans):
+        lines[start:end] = edit.replace
+    return "\n".join(lines) + "\n", fuzzy
+
+
+def apply_fix(original: Optional[str], fix: Any, fuzz: Optional[float] = None) -> PatchResult:
+    """Apply one entry of a ``fixes`` mapping to a file's current content.
+
+    A fix may be a list of ``{"search": ..., "replace": ...}`` edits, a
+    unified diff, SEARCH/REPLACE blocks, or complete file content (for new
+    files, or as a whole-file rewrite). ``original`` is None for files that
+    do not exist yet. Raises ``PatchConflict`` when it does not apply.
+    """
+    fuzz = settings.PATCH_FUZZ_RATIO if fuzz is None else fuzz
+    if isinstance(fix, dict):
+        fix = fix.get("edits", fix.get("diff", fix.get("content", [fix])))
+
+    if isinstance(fix, list):
+        edits = [
+            Edit(_lines(str(e.get("search", ""))), _lines(str(e.get("replace", ""))))
+            for e in fix if isinstance(e, dict)
+        ]
+    elif isinstance(fix, str):
+        if is_unified_diff(fix):
+            edits = parse_unified_diff(fix)
+        elif SEARCH_REPLACE_BLOCK.search(fix):
+            edits = parse_search_replace(fix)
+        elif original is None:
+            return PatchResult(fix, "created")
+        elif len(fix.strip()) < len(original.strip()) * settings.PATCH_MIN_REWRITE_RATIO:
+            # Far shorter than the file it replaces: most likely cut off
+            raise PatchConflict("whole-file rewrite looks truncated")
+        else:
+            return PatchResult(fix, "rewrite")
+    else:
+        raise PatchConflict(f"unsupported fix of type {type(fix).__name__}")
+
+    if not edits:
+        raise PatchConflict("fix contains no edits")
+    if original is None:
+        if any(edit.search for edit in edits):
+            raise PatchConflict("fix edits a file that does not exist")
+        return PatchResult("\n".join(line for edit in edits for line in edit.replace) + "\n", "created")
+
+    content, fuzzy = apply_edits(original, edits, fuzz)
+    return PatchResult(content, "patch", fuzzy)
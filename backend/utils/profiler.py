@@ -0,0 +1,237 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+from backend.utils.run_context import RunContext, current_run
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = str(Path(__file__).resolve().parent.parent.parent)
+
+
+@dataclass
+class ProfileSession:
+    """Samples collected for one project run"""
+    project_id: str
+    loop: asyncio.AbstractEventLoop
+    loop_thread: int
+    started: float = field(default_factory=time.time)
+    stacks: Counter = field(default_factory=Counter)
+    samples: int = 0
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(REPO_ROOT):
+        filename = os.path.relpath(filename, REPO_ROOT)
+    else:
+        # Library frames: keep the path below site-packages / the stdlib dir
+        for marker in ("site-packages" + os.sep, "lib" + os.sep + "python"):
+            index = filename.rfind(marker)
+            if index >= 0:
+                filename = filename[index + len(marker):]
+                break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _folded(frame, root: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(root)
+    return ";".join(reversed(labels))
+
+
+class RunProfiler:
+    """Opt-in wall-clock sampling profiler for pipeline runs.
+
+    One daemon thread samples every thread's stack each
+    ``PROFILE_INTERVAL_SECONDS`` and credits a sample to a run when the
+    thread is one of its crew kickoff workers (see ``attach_thread``), or is
+    the event loop while a task of that run is executing (tasks are tagged
+    by a task factory). Waiting on the LLM therefore shows up under the
+    worker frames that wait, and JSON handling or file I/O done on the loop
+    under ``loop``. The result is written next to the project artifacts as
+    ``<project_id>.profile.folded``, collapsed stacks that flamegraph.pl,
+    speedscope or inferno read as-is.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, ProfileSession] = {}
+        self.base_path = Path(settings.GENERATED_DIR)
+        self._thread_owner: Dict[int, str] = {}
+        self._task_owner: "weakref.WeakKeyDictionary[asyncio.Task, str]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+
+    def wanted(self, requested: bool = False) -> bool:
+        return settings.PROFILING_ENABLED or requested
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+    def start(self, run: RunContext):
+        """Profile ``run`` until ``stop``; call from the task running it"""
+        loop = run.loop or asyncio.get_running_loop()
+        self._install_task_factory(loop)
+        with self._lock:
+            self.sessions[run.project_id] = ProfileSession(run.project_id, loop, threading.get_ident())
+            self._task_owner[asyncio.current_task()] = run.project_id
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._sample_loop, name="run-profiler", daemon=True)
+                self._sampler.start()
+        run.profiled = True
+        logger.info(f"Profiling project {run.project_id}")
+
+    def stop(self, project_id: str) -> Optional[Path]:
+        """End the session and write its profile"""
+        with self._lock:
+            session = self.sessions.pop(project_id, None)
+            for ident in [i for i, owner in self._thread_owner.items() if owner == project_id]:
+                self._thread_owner.pop(ident, None)
+        if session is None:
+            return None
+        try:
+            return self._write(session)
+        except OSError as e:
+            logger.error(f"Could not write profile of {project_id}: {str(e)}")
+            return None
+
+    @contextmanager
+    def attach_thread(self, run: Optional[RunContext]):
+        """Credit samples of the calling (worker) thread to ``run``"""
+        if run is None or not run.profiled:
+            yield
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            self._thread_owner[ident] = run.project_id
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._thread_owner.get(ident) == run.project_id:
+                    del self._thread_owner[ident]
+
+    def _install_task_factory(self, loop: asyncio.AbstractEventLoop):
+        previous = loop.get_task_factory()
+        if getattr(previous, "_tags_runs", False):
+            return
+
+        def factory(loop, coro, **kwargs):
+            # name, context and eager_start (3.12+) pass through untouched
+            if previous is not None:
+                task = previous(loop, coro, **kwargs)
+            else:
+                task = asyncio.Task(coro, loop=loop, **kwargs)
+            context = kwargs.get("context")
+            run = context.get(current_run) if context is not None else current_run.get()
+            if run is not None and run.profiled:
+                self._task_owner[task] = run.project_id
+            return task
+
+        factory._tags_runs = True
+        loop.set_task_factory(factory)
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+    def _sample_loop(self):
+        while True:
+            with self._lock:
+                if not self.sessions:
+                    self._sampler = None
+                    return
+                sessions = list(self.sessions.values())
+                thread_owner = dict(self._thread_owner)
+            try:
+                self._sample(sessions, thread_owner)
+            except Exception as e:  # never let a bad frame kill the sampler
+                logger.debug(f"Profiler sample failed: {str(e)}")
+            time.sleep(settings.PROFILE_INTERVAL_SECONDS)
+
+    def _sample(self, sessions: List[ProfileSession], thread_owner: Dict[int, str]):
+        frames = sys._current_frames()
+        by_id = {s.project_id: s for s in sessions}
+        for session in sessions:
+            task = asyncio.current_task(session.loop)
+            frame = frames.get(session.loop_thread)
+            if task is not None and frame is not None and self._task_owner.get(task) == session.project_id:
+                session.stacks[_folded(frame, "loop")] += 1
+                session.samples += 1
+        for ident, project_id in thread_owner.items():
+            session = by_id.get(project_id)
+            frame = frames.get(ident)
+            if session is not None and frame is not None:
+                session.stacks[_folded(frame, "worker")] += 1
+                session.samples += 1
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def path(self, project_id: str) -> Path:
+        return self.base_path / f"{project_id}.profile.folded"
+
+    def _write(self, session: ProfileSession) -> Path:
+        path = self.path(session.project_id)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for stack, count in session.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+        duration = time.time() - session.started
+        logger.info(
+            f"Wrote profile of {session.project_id}: {session.samples} samples over {duration:.0f}s to {path}"
+        )
+        return path
+
+    def summary(self, project_id: str, top: int = 25) -> Optional[Dict[str, Any]]:
+        """Self and inclusive time per function from a saved profile"""
+        try:
+            with open(self.path(project_id), "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        roots: Counter = Counter()
+        total = 0
+        for line in lines:
+            stack, _, count = line.rpartition(" ")
+            count = int(count)
+            frames = stack.split(";")
+            total += count
+            roots[frames[0]] += count
+            own[frames[-1]] += count
+            for frame in set(frames[1:]):
+                inclusive[frame] += count
+
+        def table(counter: Counter) -> List[Dict[str, Any]]:
+            return [
+                {"function": name, "samples": n, "share": round(n / total, 3)}
+                for name, n in counter.most_common(top)
+            ]
+
+        return {
+            "project_id": project_id,
+            "samples": total,
+            "interval_seconds": settings.PROFILE_INTERVAL_SECONDS,
+            "threads": dict(roots),
+            "self": table(own),
+            "inclusive": table(inclusive),
+        }
+
+
+run_profiler = RunProfiler()
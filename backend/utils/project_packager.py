@@ -1,90 +1,321 @@
-import zipfile
+import gzip
+import io
 import os
+import tarfile
+import tempfile
+import zipfile
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from backend.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    import zstandard
+except ImportError:  # tar.zst unavailable
+    zstandard = None
+
+
+class ArchiveFormat:
+    """How one kind of package is written, listed, checked and extracted"""
+    name = ""
+    extension = ""
+    media_type = "application/octet-stream"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def write(self, project_path: Path, output_path: Path):
+        raise NotImplementedError
+
+    def members(self, archive_path: Path) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def validate(self, archive_path: Path) -> bool:
+        raise NotImplementedError
+
+    def extract(self, archive_path: Path, extract_to: Path):
+        raise NotImplementedError
+
+
+def _project_files(project_path: Path):
+    for file_path in sorted(project_path.rglob('*')):
+        if file_path.is_file():
+            yield file_path, file_path.relative_to(project_path).as_posix()
+
+
+class ZipFormat(ArchiveFormat):
+    def __init__(self, name: str, extension: str, compression: int):
+        self.name = name
+        self.extension = extension
+        self.media_type = "application/zip"
+        self.compression = compression
+
+    def write(self, project_path: Path, output_path: Path):
+        with zipfile.ZipFile(output_path, 'w', self.compression) as zipf:
+            for file_path, arcname in _project_files(project_path):
+                zipf.write(file_path, arcname)
+                logger.debug(f"Added to archive: {arcname}")
+
+    def members(self, archive_path: Path) -> List[Dict[str, Any]]:
+        with zipfile.ZipFile(archive_path, 'r') as zipf:
+            return [
+                {"filename": info.filename, "size": info.file_size, "compressed_size": info.compress_size}
+                for info in zipf.infolist()
+            ]
+
+    def validate(self, archive_path: Path) -> bool:
+        with zipfile.ZipFile(archive_path, 'r') as zipf:
+            return zipf.testzip() is None
+
+    def extract(self, archive_path: Path, extract_to: Path):
+        with zipfile.ZipFile(archive_path, 'r') as zipf:
+            zipf.extractall(extract_to)
+
+
+class TarFormat(ArchiveFormat):
+    """A tarball streamed through a single compressor (solid compression).
+
+    Compressing the whole stream rather than each file lets similar
+    generated sources share one dictionary; the price is that members have
+    no individual compressed size.
+    """
+
+    def __init__(self, name: str, extension: str, media_type: str):
+        self.name = name
+        self.extension = extension
+        self.media_type = media_type
+
+    def _compressor(self, raw) -> io.RawIOBase:
+        raise NotImplementedError
+
+    def _decompressor(self, raw) -> io.RawIOBase:
+        raise NotImplementedError
+
+    def write(self, project_path: Path, output_path: Path):
+        with open(output_path, 'wb') as raw, self._compressor(raw) as stream:
+            with tarfile.open(fileobj=stream, mode='w|') as tar:
+                for file_path, arcname in _project_files(project_path):
+                    tar.add(file_path, arcname, recursive=False)
+                    logger.debug(f"Added to archive: {arcname}")
+
+    def _open(self, raw) -> tarfile.TarFile:
+        return tarfile.open(fileobj=self._decompressor(raw), mode='r|')
+
+    def members(self, archive_path: Path) -> List[Dict[str, Any]]:
+        with open(archive_path, 'rb') as raw, self._open(raw) as tar:
+            return [
+                {"filename": member.name, "size": member.size, "compressed_size": None}
+                for member in tar if member.isfile()
+            ]
+
+    def validate(self, archive_path: Path) -> bool:
+        # A stream has no index to check: decompress every member to the end
+        with open(archive_path, 'rb') as raw, self._open(raw) as tar:
+            for member in tar:
+                if member.isfile():
+                    data = tar.extractfile(member)
+                    while data.read(1024 * 1024):
+                        pass
+        return True
+
+    def extract(self, archive_path: Path, extract_to: Path):
+        with open(archive_path, 'rb') as raw, self._open(raw) as tar:
+            tar.extractall(extract_to, filter='data')
+
+
+class TarGzFormat(TarFormat):
+    def __init__(self):
+        super().__init__("tar.gz", ".tar.gz", "application/gzip")
+
+    def _compressor(self, raw):
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=settings.PACKAGE_GZIP_LEVEL, mtime=0)
+
+    def _decompressor(self, raw):
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+
+
+class TarZstFormat(TarFormat):
+    def __init__(self):
+        super().__init__("tar.zst", ".tar.zst", "application/zstd")
+
+    @property
+    def available(self) -> bool:
+        return zstandard is not None
+
+    def _compressor(self, raw):
+        # threads=-1 compresses on every core
+        compressor = zstandard.ZstdCompressor(level=settings.PACKAGE_ZSTD_LEVEL, threads=-1)
+        return compressor.stream_writer(raw, closefd=False)
+
+    def _decompressor(self, raw):
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+
+
+# Checked in order when recognising a file, so longer extensions come first
+ARCHIVE_FORMATS: Dict[str, ArchiveFormat] = {
+    "zip-store": ZipFormat("zip-store", ".store.zip", zipfile.ZIP_STORED),
+    "tar.zst": TarZstFormat(),
+    "tar.gz": TarGzFormat(),
+    "zip": ZipFormat("zip", ".zip", zipfile.ZIP_DEFLATED),
+}
+
+
 class ProjectPackager:
+    """Builds project packages in any of ``ARCHIVE_FORMATS``.
+
+    The pipeline packages each project in ``settings.PACKAGE_FORMAT``;
+    other formats are built on first request (from the source tree, or
+    from the primary package once the tree has been dropped) and cached
+    next to it as ``<project_id><extension>``.
+    """
+
     def __init__(self):
         self.base_path = Path(settings.GENERATED_DIR)
-    
-    def create_package(self, project_id: str, output_name: Optional[str] = None) -> Path:
-        """Create a ZIP package of the project"""
+
+    @staticmethod
+    def available_formats() -> List[str]:
+        return [name for name, fmt in ARCHIVE_FORMATS.items() if fmt.available]
+
+    @staticmethod
+    def get_format(name: Optional[str] = None) -> ArchiveFormat:
+        """Format by name (default ``settings.PACKAGE_FORMAT``); ValueError if unusable"""
+        name = name or settings.PACKAGE_FORMAT
+        fmt = ARCHIVE_FORMATS.get(name)
+        if fmt is None or not fmt.available:
+            raise ValueError(
+                f"Unsupported package format: {name} "
+                f"(available: {', '.join(ProjectPackager.available_formats())})"
+            )
+        return fmt
+
+    @staticmethod
+    def format_of(archive_path: Path) -> ArchiveFormat:
+        for fmt in ARCHIVE_FORMATS.values():
+            if archive_path.name.endswith(fmt.extension):
+                return fmt
+        raise ValueError(f"Unknown package format: {archive_path.name}")
+
+    def package_path(self, project_id: str, format_name: Optional[str] = None) -> Path:
+        return self.base_path / f"{project_id}{self.get_format(format_name).extension}"
+
+    def find_package(self, project_id: str) -> Optional[Path]:
+        """Any existing package of the project, the primary format first"""
+        names = [settings.PACKAGE_FORMAT] + [n for n in self.available_formats() if n != settings.PACKAGE_FORMAT]
+        for name in names:
+            try:
+                path = self.package_path(project_id, name)
+            except ValueError:
+                continue
+            if path.exists():
+                return path
+        return None
+
+    def create_package(self, project_id: str, output_name: Optional[str] = None,
+                       format_name: Optional[str] = None) -> Path:
+        """Package the project tree; other-format packages are now stale and removed"""
         project_path = self.base_path / project_id
-        
+
         if not project_path.exists():
             raise FileNotFoundError(f"Project not found: {project_id}")
-        
-        # Determine output filename
+
+        fmt = self.get_format(format_name)
+        output_path = self.base_path / (output_name or f"{project_id}{fmt.extension}")
+        self._write(fmt, project_path, output_path)
+
         if output_name is None:
-            output_name = f"{project_id}.zip"
-        
-        output_path = self.base_path / output_name
-        
-        # Create ZIP file
-        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Walk through all files in the project directory
-            for file_path in project_path.rglob('*'):
-                if file_path.is_file():
-                    # Get relative path for the archive
-                    arcname = file_path.relative_to(project_path)
-                    zipf.write(file_path, arcname)
-                    logger.debug(f"Added to archive: {arcname}")
-        
+            self.delete_packages(project_id, keep=output_path)
+
         logger.info(f"Created package: {output_path}")
         return output_path
-    
+
+    def ensure_package(self, project_id: str, format_name: Optional[str] = None) -> Path:
+        """Path of the project's package in a format, building it if needed"""
+        fmt = self.get_format(format_name)
+        output_path = self.package_path(project_id, fmt.name)
+        if output_path.exists():
+            return output_path
+
+        # Only packaged (finished) projects get other formats
+        source = self.find_package(project_id)
+        if source is None:
+            raise FileNotFoundError(f"Project package not found: {project_id}")
+
+        project_path = self.base_path / project_id
+        if project_path.exists():
+            self._write(fmt, project_path, output_path)
+        else:
+            # The tree was dropped: repack from the package we still have
+            with tempfile.TemporaryDirectory(dir=self.base_path, prefix=".repack-") as tmp:
+                self.format_of(source).extract(source, Path(tmp))
+                self._write(fmt, Path(tmp), output_path)
+
+        logger.info(f"Created {fmt.name} package: {output_path}")
+        return output_path
+
+    def _write(self, fmt: ArchiveFormat, project_path: Path, output_path: Path):
+        # Build under a temporary name so a download never sees half an archive
+        fd, tmp_name = tempfile.mkstemp(dir=self.base_path, prefix=f".{output_path.name}.")
+        os.close(fd)
+        tmp = Path(tmp_name)
+        try:
+            fmt.write(project_path, tmp)
+            os.replace(tmp, output_path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    def delete_packages(self, project_id: str, keep: Optional[Path] = None):
+        for fmt in ARCHIVE_FORMATS.values():
+            path = self.base_path / f"{project_id}{fmt.extension}"
+            if path != keep and path.exists():
+                path.unlink()
+
     def extract_package(self, zip_path: Path, extract_to: Optional[Path] = None) -> Path:
-        """Extract a ZIP package"""
+        """Extract a package of any format"""
         if not zip_path.exists():
-            raise FileNotFoundError(f"ZIP file not found: {zip_path}")
-        
+            raise FileNotFoundError(f"Package not found: {zip_path}")
+
+        fmt = self.format_of(zip_path)
+
         # Determine extraction path
         if extract_to is None:
-            extract_to = self.base_path / zip_path.stem
-        
+            extract_to = self.base_path / zip_path.name[:-len(fmt.extension)]
+
         # Create extraction directory
         extract_to.mkdir(parents=True, exist_ok=True)
-        
-        # Extract ZIP file
-        with zipfile.ZipFile(zip_path, 'r') as zipf:
-            zipf.extractall(extract_to)
-        
+
+        fmt.extract(zip_path, extract_to)
+
         logger.info(f"Extracted package to: {extract_to}")
         return extract_to
-    
+
     def get_package_info(self, zip_path: Path) -> dict:
-        """Get information about a ZIP package"""
+        """Get information about a package"""
         if not zip_path.exists():
-            raise FileNotFoundError(f"ZIP file not found: {zip_path}")
-        
-        info = {
+            raise FileNotFoundError(f"Package not found: {zip_path}")
+
+        fmt = self.format_of(zip_path)
+        size = zip_path.stat().st_size
+        files = fmt.members(zip_path)
+        uncompressed = sum(f["size"] for f in files)
+
+        return {
             "filename": zip_path.name,
-            "size_bytes": zip_path.stat().st_size,
-            "size_mb": round(zip_path.stat().st_size / (1024 * 1024), 2),
-            "files": []
+            "format": fmt.name,
+            "size_bytes": size,
+            "size_mb": round(size / (1024 * 1024), 2),
+            "uncompressed_bytes": uncompressed,
+            "compression_ratio": round(uncompressed / size, 2) if size else 0.0,
+            "files": files
         }
-        
-        with zipfile.ZipFile(zip_path, 'r') as zipf:
-            for file_info in zipf.filelist:
-                info["files"].append({
-                    "filename": file_info.filename,
-                    "size": file_info.file_size,
-                    "compressed_size": file_info.compress_size
-                })
-        
-        return info
-    
+
     def validate_package(self, zip_path: Path) -> bool:
-        """Validate that a ZIP package is not corrupted"""
+        """Validate that a package is not corrupted"""
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zipf:
-                # Test the ZIP file
-                result = zipf.testzip()
-                return result is None
+            return self.format_of(zip_path).validate(zip_path)
         except Exception as e:
             logger.error(f"Package validation failed: {str(e)}")
             return False
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+from backend.config import settings
+from backend.models import ProjectRequest, Task
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Provenance of files that do not come from a plan task (those record the task id)
+CORE = "core"
+TEMPLATE = "template"
+INTEGRATION = "integration"
+TESTS = "tests"
+REPORT = "report"
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def normalize_title(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(title).lower()).strip()
+
+
+class ProjectStateStore:
+    """What a finished run knew about a project, so it can be revised later.
+
+    Holds the request, strategy, plan, delegated subtasks, which task (or
+    phase) produced each file and the static analysis of each file. Stored
+    as ``<project_id>.state.json`` next to the package, so the garbage
+    collector removes it together with the project.
+    """
+
+    def __init__(self):
+        self.base_path = Path(settings.GENERATED_DIR)
+
+    def path(self, project_id: str) -> Path:
+        return self.base_path / f"{project_id}.state.json"
+
+    def exists(self, project_id: str) -> bool:
+        return self.path(project_id).exists()
+
+    def load(self, project_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(project_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read state of project {project_id}: {str(e)}")
+            return None
+
+    def save(self, project_id: str, state: Dict[str, Any]):
+        path = self.path(project_id)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+
+def diff_requests(old: Dict[str, Any], new: ProjectRequest) -> Dict[str, Any]:
+    """What changed between a stored request and a new one (priority aside)"""
+    old_requirements = old.get("requirements") or []
+    new_requirements = new.requirements or []
+    return {
+        "title": old.get("title") != new.title,
+        "description": old.get("description") != new.description,
+        "project_type": old.get("project_type") != new.project_type.value,
+        "added_requirements": [r for r in new_requirements if r not in old_requirements],
+        "removed_requirements": [r for r in old_requirements if r not in new_requirements],
+    }
+
+
+def match_tasks(old_tasks: List[Dict[str, Any]], new_tasks: List[Task]) -> Dict[str, List[str]]:
+    """Carry task ids over by title and classify the new plan's tasks.
+
+    Matched tasks get their old id back, so files recorded against them
+    stay attributed. Returns ids of unchanged, changed, added and removed
+    tasks.
+    """
+    old_by_title = {normalize_title(t["title"]): t for t in old_tasks}
+    result: Dict[str, List[str]] = {"unchanged": [], "changed": [], "added": [], "removed": []}
+    for task in new_tasks:
+        old = old_by_title.pop(normalize_title(task.title), None)
+        if old is None:
+            result["added"].append(task.id)
+            continue
+        task.id = old["id"]
+        same = (
+            task.description == old.get("description")
+            and task.assigned_to == old.get("assigned_to")
+            and sorted(task.dependencies) == sorted(old.get("dependencies") or [])
+        )
+        result["unchanged" if same else "changed"].append(task.id)
+    result["removed"] = [t["id"] for t in old_by_title.values()]
+    return result
+
+
+def affected_tasks(tasks: List[Task], dirty: Iterable[str]) -> Set[str]:
+    """``dirty`` plus every task that depends on one of them, transitively.
+
+    Plans name dependencies by task id or title.
+    """
+    refs = {}
+    for task in tasks:
+        refs[task.id] = task.id
+        refs.setdefault(normalize_title(task.title), task.id)
+    dependents: Dict[str, Set[str]] = {}
+    for task in tasks:
+        for dependency in task.dependencies:
+            target = refs.get(dependency) or refs.get(normalize_title(dependency))
+            if target and target != task.id:
+                dependents.setdefault(target, set()).add(task.id)
+
+    affected = set(dirty)
+    stack = list(affected)
+    while stack:
+        for dependent in dependents.get(stack.pop(), ()):
+            if dependent not in affected:
+                affected.add(dependent)
+                stack.append(dependent)
+    return affected
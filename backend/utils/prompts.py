@@ -0,0 +1,28 @@
+import hashlib
+import textwrap
+from typing import Any, Dict, List, Optional
+
+
+def task_prompt(instructions: str, inputs: Dict[str, Any]) -> str:
+    """A task description laid out for Ollama's prompt cache.
+
+    Ollama skips evaluating the longest prefix a prompt shares with one it
+    evaluated before for the same model. crewai puts the agent's role, goal
+    and backstory in the system message, then the task description, so the
+    instructions (the same on every call of an agent method) go first and
+    the ``inputs`` that change from call to call (names, task text, file
+    content) after them, in order from the least to the most variable.
+    """
+    parts = [textwrap.dedent(instructions).strip(), ""]
+    for label, value in inputs.items():
+        text = "" if value is None else str(value).strip()
+        parts.append(f"{label}:\n{text}" if "\n" in text else f"{label}: {text}")
+    return "\n".join(parts)
+
+
+def prefix_key(model: str, messages: List[Dict[str, str]]) -> Optional[str]:
+    """Identifies the cacheable prefix of a chat: the model and the agent's system message"""
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), None)
+    if system is None:
+        return None
+    return hashlib.sha1(f"{model}\n{system}".encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional, Set
+from backend.config import settings
+
+
+class RunCancelled(Exception):
+    """Raised inside agent/LLM code once the owning project has been cancelled"""
+
+
+@dataclass
+class RunContext:
+    """Per-project state that follows a pipeline run into agent and LLM calls.
+
+    It travels through a ``ContextVar`` so that code deep inside crewai (which
+    we do not control) can still find out which project and client it is
+    working for. ``asyncio.to_thread`` copies the context, so the value is
+    also visible in the worker threads that run crew kickoffs.
+    """
+    project_id: str
+    client_key: str = "anonymous"
+    priority: str = "normal"
+    # Loop that owns the pipeline; LLM requests are executed on it so they
+    # can be cancelled like any other task
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    llm_calls: int = 0
+    # Set while RunProfiler samples this run
+    profiled: bool = False
+    # Root span of the run's trace (backend.utils.tracing.Span), if tracing
+    trace: Any = None
+    _inflight: Set[Future] = field(default_factory=set)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def weight(self) -> float:
+        return float(settings.PRIORITY_WEIGHTS.get(self.priority, 1))
+
+    def raise_if_cancelled(self):
+        if self.cancelled.is_set():
+            raise RunCancelled(f"Project {self.project_id} was cancelled")
+
+    def count_llm_call(self):
+        with self._lock:
+            self.llm_calls += 1
+
+    def track(self, future: Future):
+        """Register an in-flight LLM request so ``cancel`` can abort it"""
+        with self._lock:
+            if self.cancelled.is_set():
+                future.cancel()
+                return
+            self._inflight.add(future)
+        future.add_done_callback(self._untrack)
+
+    def _untrack(self, future: Future):
+        with self._lock:
+            self._inflight.discard(future)
+
+    def cancel(self):
+        """Flag the run as cancelled and abort every in-flight LLM request"""
+        with self._lock:
+            self.cancelled.set()
+            inflight = list(self._inflight)
+        for future in inflight:
+            future.cancel()
+
+
+current_run: ContextVar[Optional[RunContext]] = ContextVar("current_run", default=None)
+
+
+def get_current_run() -> Optional[RunContext]:
+    """Return the RunContext of the pipeline executing the caller, if any"""
+    return current_run.get()
@@ -0,0 +1,402 @@
+import asyncio
+import importlib.util
+import json
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = Path(__file__).with_name("sandbox_worker.py")
+
+# Directories that never contain the project's own tests
+SKIP_DIRS = {"node_modules", ".venv", "venv", "__pycache__", ".git", "site-packages"}
+
+
+class WarmInterpreterPool:
+    """Pre-started interpreters with pytest already imported.
+
+    Each worker forks a fresh child per job (see ``sandbox_worker.py``), so a
+    run is isolated from the next one while skipping interpreter start-up and
+    the pytest import. Only available where ``os.fork`` exists.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: "queue.Queue[subprocess.Popen]" = queue.Queue()
+        self._workers: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self.has_pytest = False
+
+    @staticmethod
+    def supported() -> bool:
+        return hasattr(os, "fork")
+
+    def _spawn(self) -> Optional[subprocess.Popen]:
+        proc = subprocess.Popen(
+            [sys.executable, "-u", str(WORKER_SCRIPT)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=_sandbox_env(Path(tempfile.gettempdir())),
+            text=True,
+            bufsize=1,
+        )
+        hello = proc.stdout.readline()
+        try:
+            self.has_pytest = bool(json.loads(hello).get("pytest"))
+        except (ValueError, AttributeError):
+            proc.kill()
+            return None
+        with self._lock:
+            self._workers.append(proc)
+        return proc
+
+    def start(self):
+        """Spawn the workers; blocking, call from a thread"""
+        with self._start_lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                proc = self._spawn()
+                if proc is not None:
+                    self._idle.put(proc)
+            self._started = True
+        logger.info(f"Warm test interpreter pool ready ({self._idle.qsize()} workers)")
+
+    def run(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run one job on an idle worker; None if no worker became free in time"""
+        self.start()
+        with self._lock:
+            alive = bool(self._workers)
+        if not alive:
+            # Every worker failed to spawn or died without a replacement
+            return None
+        try:
+            # A busy worker is done within the test timeout
+            proc = self._idle.get(timeout=job.get("timeout", settings.TEST_TIMEOUT_SECONDS) + 10)
+        except queue.Empty:
+            return None
+        try:
+            proc.stdin.write(json.dumps(job) + "\n")
+            proc.stdin.flush()
+            reply = proc.stdout.readline()
+            if not reply:
+                raise BrokenPipeError("worker exited")
+            return json.loads(reply)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Test worker failed, replacing it: {str(e)}")
+            proc.kill()
+            with self._lock:
+                if proc in self._workers:
+                    self._workers.remove(proc)
+            proc = self._spawn()
+            return {"returncode": 99, "timed_out": False, "duration": 0, "error": str(e)}
+        finally:
+            if proc is not None:
+                self._idle.put(proc)
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for proc in workers:
+            try:
+                proc.stdin.close()
+                proc.wait(timeout=2)
+            except Exception:
+                proc.kill()
+        self._idle = queue.Queue()
+        self._started = False
+
+
+def _limit_resources():
+    """preexec_fn for cold runs on POSIX (in a session of their own)"""
+    import resource
+    cpu = settings.TEST_CPU_SECONDS
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 5))
+    limit = settings.TEST_MEMORY_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if _isolated() and os.geteuid() == 0:
+        # Never start bubblewrap as root: outside its namespaces the tests
+        # would still be root
+        os.setgroups([])
+        os.setgid(settings.TEST_SANDBOX_GID)
+        os.setuid(settings.TEST_SANDBOX_UID)
+
+
+def _isolated() -> bool:
+    return settings.TEST_ISOLATION != "none"
+
+
+def _bubblewrap(command: List[str], writable: List[Path]) -> List[str]:
+    """``command`` under bubblewrap: new user, network, PID and IPC namespaces,
+    the sandbox uid, a read-only root of only the system and Python install
+    directories, and write access to ``writable`` alone"""
+    args = [
+        "bwrap", "--unshare-all", "--unshare-user", "--die-with-parent",
+        "--uid", str(settings.TEST_SANDBOX_UID), "--gid", str(settings.TEST_SANDBOX_GID),
+    ]
+    for path in dict.fromkeys(["/usr", "/bin", "/sbin", "/lib", "/lib32", "/lib64", "/etc",
+                               sys.base_prefix, sys.prefix]):
+        args += ["--ro-bind-try", path, path]
+    args += ["--dev", "/dev", "--proc", "/proc", "--tmpfs", "/tmp"]
+    for path in writable:
+        args += ["--bind", str(path), str(path)]
+    return args + ["--chdir", str(writable[0]), "--"] + command
+
+
+def _sandbox_env(home: Path) -> Dict[str, str]:
+    """The tests' environment: none of the server's variables (API keys, URLs)"""
+    env = {"PATH": os.defpath, "HOME": str(home), "PYTHONDONTWRITEBYTECODE": "1"}
+    for key in ("LANG", "LC_ALL", "TZ", "SYSTEMROOT"):
+        if key in os.environ:
+            env[key] = os.environ[key]
+    return env
+
+
+def _hand_over(path: Path):
+    """Make a directory tree writable by the sandbox uid when running as root"""
+    if not _isolated() or os.name != "posix" or os.geteuid() != 0:
+        return
+    for root, dirs, files in os.walk(path):
+        for name in [root] + [os.path.join(root, n) for n in dirs + files]:
+            os.lchown(name, settings.TEST_SANDBOX_UID, settings.TEST_SANDBOX_GID)
+
+
+class SandboxTestRunner:
+    """Executes a generated project's pytest suites in sandboxed subprocesses.
+
+    The project is copied to a throwaway directory, every test file runs in
+    its own process with CPU, memory and wall-clock limits, and files run in
+    parallel across cores. With ``TEST_ISOLATION=bwrap`` (the default) each
+    process runs under bubblewrap as an unprivileged uid, without network,
+    over a read-only root, and with only its copy and report directory
+    writable; without bubblewrap nothing runs. Results come from pytest's
+    JUnit XML, so the pass/fail numbers are real rather than LLM-described.
+    """
+
+    _pool: Optional[WarmInterpreterPool] = None
+
+    def __init__(self):
+        self.workers = settings.TEST_RUNNER_WORKERS or os.cpu_count() or 2
+
+    @classmethod
+    def pool(cls) -> Optional[WarmInterpreterPool]:
+        # Warm workers fork the jobs themselves, outside any isolation
+        if _isolated() or not settings.TEST_WARM_POOL or not WarmInterpreterPool.supported():
+            return None
+        if cls._pool is None:
+            workers = settings.TEST_RUNNER_WORKERS or os.cpu_count() or 2
+            cls._pool = WarmInterpreterPool(workers)
+        return cls._pool
+
+    @classmethod
+    def shutdown(cls):
+        if cls._pool is not None:
+            cls._pool.shutdown()
+            cls._pool = None
+
+    @staticmethod
+    def isolation_error() -> Optional[str]:
+        """Why generated tests cannot run isolated here; None if they can"""
+        if not _isolated():
+            return None
+        if settings.TEST_ISOLATION != "bwrap":
+            return f"unknown TEST_ISOLATION {settings.TEST_ISOLATION!r}"
+        if os.name != "posix" or shutil.which("bwrap") is None:
+            return "bubblewrap (bwrap) is not installed; TEST_ISOLATION=none is for trusted hosts only"
+        return None
+
+    def discover(self, project_dir: Path) -> List[str]:
+        tests = []
+        for path in project_dir.rglob("*.py"):
+            rel = path.relative_to(project_dir)
+            if any(part in SKIP_DIRS for part in rel.parts):
+                continue
+            if path.name.startswith("test_") or path.stem.endswith("_test"):
+                tests.append(rel.as_posix())
+        return sorted(tests)
+
+    async def run(self, project_dir: Path) -> Dict[str, Any]:
+        """Run every test file of a project and return aggregated results"""
+        started = time.monotonic()
+        test_files = self.discover(project_dir)
+        if not test_files:
+            return {"status": "no_tests", "files": [], "totals": self._totals([]), "duration": 0.0}
+        reason = self.isolation_error()
+        if reason:
+            return {"status": "unavailable", "reason": reason, "files": [], "totals": self._totals([]), "duration": 0.0}
+        if not await asyncio.to_thread(self._pytest_available):
+            return {
+                "status": "unavailable",
+                "reason": "pytest is not installed on the server",
+                "files": [],
+                "totals": self._totals([]),
+                "duration": 0.0,
+            }
+
+        sandbox = Path(tempfile.mkdtemp(prefix="apm-tests-"))
+        try:
+            await asyncio.to_thread(shutil.copytree, project_dir, sandbox, dirs_exist_ok=True)
+            await asyncio.to_thread(_hand_over, sandbox)
+            limit = asyncio.Semaphore(self.workers)
+
+            async def run_one(test_file: str) -> Dict[str, Any]:
+                async with limit:
+                    return await asyncio.to_thread(self._run_file, sandbox, test_file)
+
+            files = await asyncio.gather(*[run_one(f) for f in test_files])
+        finally:
+            shutil.rmtree(sandbox, ignore_errors=True)
+
+        totals = self._totals(files)
+        if totals["tests"] == 0 and totals["errors"] == 0:
+            status = "no_tests"
+        elif totals["failures"] or totals["errors"] or totals["timed_out"]:
+            status = "failed"
+        else:
+            status = "passed"
+
+        return {
+            "status": status,
+            "files": files,
+            "totals": totals,
+            "duration": round(time.monotonic() - started, 3),
+        }
+
+    def _pytest_available(self) -> bool:
+        pool = self.pool()
+        if pool is not None:
+            pool.start()
+            return pool.has_pytest
+        return importlib.util.find_spec("pytest") is not None
+
+    def _run_file(self, sandbox: Path, test_file: str) -> Dict[str, Any]:
+        report_dir = Path(tempfile.mkdtemp(prefix="apm-report-"))
+        junit = report_dir / "junit.xml"
+        log = report_dir / "output.log"
+        args = [test_file, "-q", "-p", "no:cacheprovider", f"--junitxml={junit}"]
+
+        try:
+            _hand_over(report_dir)
+            pool = self.pool()
+            outcome = None
+            if pool is not None:
+                outcome = pool.run({
+                    "cwd": str(sandbox),
+                    "args": args,
+                    "log": str(log),
+                    "timeout": settings.TEST_TIMEOUT_SECONDS,
+                    "cpu_seconds": settings.TEST_CPU_SECONDS,
+                    "memory_mb": settings.TEST_MEMORY_MB,
+                })
+                if outcome is None:
+                    logger.warning(f"No warm test worker available, running {test_file} cold")
+            if outcome is None:
+                outcome = self._run_cold(sandbox, args, log, report_dir)
+
+            result = {"file": test_file, **outcome, **self._parse_junit(junit)}
+            result["output_tail"] = self._tail(log)
+            return result
+        finally:
+            shutil.rmtree(report_dir, ignore_errors=True)
+
+    def _run_cold(self, sandbox: Path, args: List[str], log: Path, report_dir: Path) -> Dict[str, Any]:
+        """Fresh interpreter per file (isolated runs, Windows, or warm pool disabled)"""
+        started = time.monotonic()
+        command = [sys.executable, "-m", "pytest", *args]
+        if _isolated():
+            command = _bubblewrap(command, [sandbox, report_dir])
+        with open(log, "w", encoding="utf-8") as out:
+            proc = subprocess.Popen(
+                command,
+                cwd=sandbox,
+                env=_sandbox_env(sandbox),
+                stdin=subprocess.DEVNULL,
+                stdout=out,
+                stderr=subprocess.STDOUT,
+                preexec_fn=_limit_resources if os.name == "posix" else None,
+                # Its own process group, so servers and forks the tests start go with it
+                start_new_session=os.name == "posix",
+            )
+            try:
+                returncode = proc.wait(timeout=settings.TEST_TIMEOUT_SECONDS)
+                timed_out = False
+            except subprocess.TimeoutExpired:
+                self._kill_group(proc)
+                returncode = proc.wait()
+                timed_out = True
+            else:
+                # Whatever the tests left running in the background
+                self._kill_group(proc)
+        return {
+            "returncode": returncode,
+            "timed_out": timed_out,
+            "duration": round(time.monotonic() - started, 3),
+        }
+
+    @staticmethod
+    def _kill_group(proc: subprocess.Popen):
+        if os.name != "posix":
+            proc.kill()
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:  # the group is already gone
+            pass
+
+    def _parse_junit(self, junit: Path) -> Dict[str, Any]:
+        counts = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0, "failed_tests": []}
+        if not junit.exists():
+            return counts
+        try:
+            root = ET.parse(junit).getroot()
+        except ET.ParseError:
+            return counts
+
+        suites = [root] if root.tag == "testsuite" else root.findall("testsuite")
+        for suite in suites:
+            for key in ("tests", "failures", "errors", "skipped"):
+                counts[key] += int(suite.get(key, 0))
+            for case in suite.iter("testcase"):
+                problem = case.find("failure")
+                if problem is None:
+                    problem = case.find("error")
+                if problem is not None:
+                    counts["failed_tests"].append({
+                        "name": f"{case.get('classname', '')}::{case.get('name', '')}",
+                        "message": (problem.get("message") or "")[:300],
+                    })
+        return counts
+
+    def _tail(self, log: Path, lines: int = 20) -> str:
+        try:
+            return "\n".join(log.read_text(encoding="utf-8", errors="replace").splitlines()[-lines:])
+        except OSError:
+            return ""
+
+    def _totals(self, files: List[Dict[str, Any]]) -> Dict[str, int]:
+        totals = {"files": len(files), "tests": 0, "failures": 0, "errors": 0, "skipped": 0, "timed_out": 0}
+        for result in files:
+            for key in ("tests", "failures", "errors", "skipped"):
+                totals[key] += result.get(key, 0)
+            totals["timed_out"] += int(bool(result.get("timed_out")))
+            # A file that crashed before producing a report still counts
+            if result.get("tests", 0) == 0 and result.get("returncode") not in (0, 5):
+                totals["errors"] += 1
+        totals["passed"] = totals["tests"] - totals["failures"] - totals["errors"] - totals["skipped"]
+        totals["passed"] = max(totals["passed"], 0)
+        return totals
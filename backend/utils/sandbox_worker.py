@@ -0,0 +1,129 @@
+"""
+Warm interpreter for running generated test suites.
+
+Started by ``SandboxTestRunner`` as ``python sandbox_worker.py``; deliberately has
+no imports from ``backend`` so it starts fast and does not need the app on
+``sys.path``. pytest is imported once up front, then every job is run in a
+forked child that inherits the warm imports, applies resource limits and
+gets its own process group so the whole test process tree can be killed.
+The forked children are not isolated beyond that, which is why the runner
+only uses this pool with ``TEST_ISOLATION=none``.
+
+Protocol (one JSON object per line):
+    stdout -> {"ready": true, "pytest": <bool>}            once, at startup
+    stdin  <- {"cwd", "args", "log", "timeout", "cpu_seconds", "memory_mb"}
+    stdout -> {"returncode", "timed_out", "duration"}       once per job
+"""
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _apply_limits(job):
+    if resource is None:
+        return
+    cpu = job.get("cpu_seconds")
+    if cpu:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 5))
+    memory_mb = job.get("memory_mb")
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_child(job):
+    """Body of the forked child; never returns"""
+    code = 99
+    try:
+        os.setsid()
+        log_fd = os.open(job["log"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        null_fd = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null_fd, 0)
+        os.dup2(log_fd, 1)
+        os.dup2(log_fd, 2)
+        _apply_limits(job)
+        os.chdir(job["cwd"])
+        sys.path.insert(0, job["cwd"])
+        code = int(pytest.main(job["args"]))
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _run_job(job):
+    started = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        _run_child(job)
+
+    deadline = started + job.get("timeout", 120)
+    timed_out = False
+    while True:
+        waited, status = os.waitpid(pid, os.WNOHANG)
+        if waited:
+            break
+        if time.monotonic() > deadline:
+            timed_out = True
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+            _, status = os.waitpid(pid, 0)
+            break
+        time.sleep(0.02)
+    if not timed_out:
+        # Servers or forks the tests left running in the child's session
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    if os.WIFEXITED(status):
+        returncode = os.WEXITSTATUS(status)
+    else:
+        returncode = -os.WTERMSIG(status)
+
+    return {
+        "returncode": returncode,
+        "timed_out": timed_out,
+        "duration": round(time.monotonic() - started, 3),
+    }
+
+
+def main():
+    out = sys.stdout
+    out.write(json.dumps({"ready": True, "pytest": pytest is not None}) + "\n")
+    out.flush()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            reply = _run_job(json.loads(line))
+        except Exception as e:
+            reply = {"returncode": 99, "timed_out": False, "duration": 0, "error": str(e)}
+        out.write(json.dumps(reply) + "\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import asyncio
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(order=True)
+class _Waiter:
+    finish_tag: float
+    seq: int
+    start_tag: float = field(compare=False)
+    client_key: str = field(compare=False)
+    wake: Any = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+    granted: bool = field(default=False, compare=False)
+
+
+class FairScheduler:
+    """Weighted fair queuing over a fixed number of slots.
+
+    Every request is tagged with a virtual finish time of
+    ``max(virtual_time, last_finish[client]) + cost / weight``; free slots go
+    to the smallest tag. Cheap requests therefore overtake expensive ones,
+    a client with a burst of submissions cannot starve other clients, and a
+    higher weight (priority) shortens a request's tag proportionally.
+
+    The same scheduler can be used from coroutines (``acquire_async``) and
+    from worker threads (``acquire``), which is how pipeline slots and the
+    synchronous LLM calls made inside crewai share one implementation.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.in_use = 0
+        self.virtual_time = 0.0
+        self._lock = threading.Lock()
+        self._queue: List[_Waiter] = []
+        self._last_finish: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self.granted_total = 0
+        self.granted_by_client: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Tagging
+    # ------------------------------------------------------------------
+    def _tag(self, client_key: str, weight: float, cost: float):
+        start = max(self.virtual_time, self._last_finish.get(client_key, 0.0))
+        finish = start + max(cost, 0.0) / max(weight, 1e-6)
+        self._last_finish[client_key] = finish
+        return start, finish
+
+    def _grant(self, waiter: _Waiter):
+        waiter.granted = True
+        self.in_use += 1
+        self.virtual_time = max(self.virtual_time, waiter.start_tag)
+        self.granted_total += 1
+        self.granted_by_client[waiter.client_key] = self.granted_by_client.get(waiter.client_key, 0) + 1
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        while self._queue:
+            waiter = heapq.heappop(self._queue)
+            if not waiter.cancelled:
+                return waiter
+        return None
+
+    # ------------------------------------------------------------------
+    # Acquire / release
+    # ------------------------------------------------------------------
+    def _enqueue(self, client_key: str, weight: float, cost: float, wake) -> Optional[_Waiter]:
+        """Grant immediately (returns None) or queue a waiter"""
+        start, finish = self._tag(client_key, weight, cost)
+        waiter = _Waiter(finish, next(self._seq), start, client_key, wake)
+        # Waiters only exist while every slot is taken, so a free slot can be
+        # granted straight away without jumping anyone
+        if self.in_use < self.capacity:
+            self._grant(waiter)
+            return None
+        heapq.heappush(self._queue, waiter)
+        return waiter
+
+    def acquire(self, client_key: str = "anonymous", weight: float = 1.0, cost: float = 1.0,
+                timeout: Optional[float] = None) -> bool:
+        """Blocking acquire for worker threads"""
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(client_key, weight, cost, event.set)
+        if waiter is None:
+            return True
+        if event.wait(timeout):
+            return True
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.cancelled = True
+        return False
+
+    async def acquire_async(self, client_key: str = "anonymous", weight: float = 1.0, cost: float = 1.0):
+        """Coroutine acquire for the event loop"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+
+        with self._lock:
+            waiter = self._enqueue(client_key, weight, cost, wake)
+        if waiter is None:
+            return
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    # Slot was granted while we were being cancelled
+                    self._release_locked()
+                else:
+                    waiter.cancelled = True
+            raise
+
+    def _release_locked(self):
+        self.in_use -= 1
+        # After a shrink, slots still held above the new capacity are not handed on
+        if self.in_use >= self.capacity:
+            return
+        waiter = self._next_waiter()
+        if waiter is not None:
+            self._grant(waiter)
+            waiter.wake()
+
+    def release(self):
+        with self._lock:
+            self._release_locked()
+
+    def resize(self, capacity: int):
+        """Change the number of slots, waking waiters if it grew"""
+        with self._lock:
+            self.capacity = max(1, capacity)
+            while self.in_use < self.capacity:
+                waiter = self._next_waiter()
+                if waiter is None:
+                    break
+                self._grant(waiter)
+                waiter.wake()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._queue if not w.cancelled)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "queued": self.queued,
+            "granted_total": self.granted_total,
+            "granted_by_client": dict(self.granted_by_client),
+        }
+
+
+# Every LLM call made by any agent of any project competes for these slots;
+# the backend registry sizes them to the healthy Ollama backends
+llm_scheduler = FairScheduler("llm", settings.MAX_CONCURRENT_LLM_CALLS)
@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import mimetypes
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Set
+from fastapi import Response
+from backend.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+@dataclass
+class Asset:
+    """One frontend file held in memory with its precompressed variants"""
+    name: str
+    hashed_name: str
+    content_type: str
+    etag: str
+    # encoding ("identity", "gzip", "br") -> body
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+
+
+def _accepted_encodings(header: Optional[str]) -> Set[str]:
+    """Encodings an Accept-Encoding header allows (q=0 excludes)"""
+    accepted = set()
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        match = re.search(r"q=([0-9.]+)", params)
+        if token and (match is None or float(match.group(1)) > 0):
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    """The frontend, content-hashed and precompressed once at startup.
+
+    Every file under the frontend directory is also served under a hashed
+    name (``style.3f2a9c1b.css``) that ``index.html`` is rewritten to use,
+    so those URLs can be cached as immutable. Bodies are kept in memory in
+    identity, gzip and (with the ``brotli`` package) brotli encodings and
+    picked per request from ``Accept-Encoding``; ``index.html`` itself is
+    revalidated by ETag, which makes a repeat page load one 304.
+    """
+
+    INDEX = "index.html"
+
+    def __init__(self, directory: Path, url_prefix: str = "/static"):
+        self.directory = Path(directory)
+        self.url_prefix = url_prefix.rstrip("/")
+        self.assets: Dict[str, Asset] = {}
+        self._by_hashed_name: Dict[str, Asset] = {}
+
+    def build(self):
+        """Hash and compress every file; call again to pick up changes"""
+        assets: Dict[str, Asset] = {}
+        for path in sorted(p for p in self.directory.rglob("*") if p.is_file()):
+            name = path.relative_to(self.directory).as_posix()
+            if name != self.INDEX:
+                assets[name] = self._asset(name, path.read_bytes())
+
+        index_path = self.directory / self.INDEX
+        if index_path.exists():
+            html = index_path.read_text(encoding="utf-8")
+            # Point the page at the hashed URLs so the assets can be cached forever
+            for name, asset in assets.items():
+                html = html.replace(f"{self.url_prefix}/{name}", f"{self.url_prefix}/{asset.hashed_name}")
+            assets[self.INDEX] = self._asset(self.INDEX, html.encode("utf-8"))
+
+        self.assets = assets
+        self._by_hashed_name = {asset.hashed_name: asset for asset in assets.values()}
+        saved = sum(len(a.bodies["identity"]) - min(len(b) for b in a.bodies.values()) for a in assets.values())
+        logger.info(f"Prepared {len(assets)} static assets ({saved} bytes saved by compression)")
+
+    def _asset(self, name: str, body: bytes) -> Asset:
+        digest = hashlib.sha256(body).hexdigest()
+        stem, dot, suffix = name.rpartition(".")
+        hashed_name = f"{stem}.{digest[:8]}.{suffix}" if dot else f"{name}.{digest[:8]}"
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+
+        bodies = {"identity": body}
+        compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(body, quality=11)
+        # Keep an encoding only where it actually saves bytes
+        bodies.update({enc: data for enc, data in compressed.items() if len(data) < len(body)})
+        return Asset(name=name, hashed_name=hashed_name, content_type=content_type,
+                     etag=f'W/"{digest[:16]}"', bodies=bodies)
+
+    def lookup(self, name: str) -> Optional[Asset]:
+        """Asset by hashed or plain name"""
+        return self._by_hashed_name.get(name) or self.assets.get(name)
+
+    def is_hashed(self, name: str) -> bool:
+        return name in self._by_hashed_name and name not in self.assets
+
+    def respond(self, asset: Asset, accept_encoding: Optional[str], if_none_match: Optional[str],
+                immutable: bool) -> Response:
+        headers = {
+            "ETag": asset.etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": (
+                f"public, max-age={settings.STATIC_MAX_AGE_SECONDS}, immutable" if immutable else "no-cache"
+            ),
+        }
+        if if_none_match and asset.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        accepted = _accepted_encodings(accept_encoding)
+        encoding = next(
+            (enc for enc in ("br", "gzip") if enc in asset.bodies and (enc in accepted or "*" in accepted)),
+            "identity"
+        )
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=asset.bodies[encoding], headers=headers, media_type=asset.content_type)
@@ -0,0 +1,336 @@
+import ast
+import asyncio
+import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from backend.config import settings
+from backend.utils.tracing import tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+HTTP_METHODS = {"get", "post", "put", "patch", "delete", "head", "options", "route", "api_route"}
+
+# Issue kinds that mean the file cannot be used as-is and should be repaired
+BLOCKING_KINDS = {"syntax", "parse", "unresolved_import", "duplicate_route"}
+
+IMPORT_ERRORS = {"ImportError", "ModuleNotFoundError", "Exception", "BaseException"}
+
+
+def _issue(filename: str, kind: str, message: str, line: Optional[int] = None) -> Dict[str, Any]:
+    return {"file": filename, "kind": kind, "message": message, "line": line}
+
+
+def _module_name(filename: str) -> Optional[str]:
+    """Dotted module name for a project-relative Python path"""
+    path = PurePosixPath(filename.replace("\\", "/"))
+    if path.suffix != ".py":
+        return None
+    parts = list(path.with_suffix("").parts)
+    if parts and parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts) if parts else None
+
+
+def _route_decorator(node: ast.expr) -> Optional[Tuple[str, str, str]]:
+    """Return (router, method, path) for ``@app.get("/x")``-style decorators"""
+    if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+        return None
+    method = node.func.attr.lower()
+    if method not in HTTP_METHODS or not node.args:
+        return None
+    first = node.args[0]
+    if not isinstance(first, ast.Constant) or not isinstance(first.value, str):
+        return None
+    router = ast.unparse(node.func.value)
+    if method in ("route", "api_route"):
+        methods = "GET"
+        for keyword in node.keywords:
+            if keyword.arg == "methods" and isinstance(keyword.value, (ast.List, ast.Tuple)):
+                methods = ",".join(
+                    sorted(str(e.value).upper() for e in keyword.value.elts if isinstance(e, ast.Constant))
+                )
+        return router, methods, first.value
+    return router, method.upper(), first.value
+
+
+def _catches_import_error(handler: ast.ExceptHandler) -> bool:
+    if handler.type is None:
+        return True
+    types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+    return any(ast.unparse(t).split(".")[-1] in IMPORT_ERRORS for t in types)
+
+
+def _optional_imports(tree: ast.AST) -> set:
+    """Imports inside a ``try`` whose handlers catch ImportError: optional by design"""
+    guarded = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Try, getattr(ast, "TryStar", ast.Try))) and any(
+            _catches_import_error(h) for h in node.handlers
+        ):
+            for statement in node.body:
+                for child in ast.walk(statement):
+                    if isinstance(child, (ast.Import, ast.ImportFrom)):
+                        guarded.add(id(child))
+    return guarded
+
+
+def analyze_file(filename: str, content: str) -> Dict[str, Any]:
+    """Parse a single file and collect what the cross-file checks need.
+
+    Runs in a worker process, so it must stay a plain top-level function
+    taking and returning picklable data.
+    """
+    result: Dict[str, Any] = {"file": filename, "issues": [], "imports": [], "definitions": None, "routes": [],
+                              "router_sources": {}}
+    suffix = PurePosixPath(filename).suffix.lower()
+
+    if suffix == ".py":
+        try:
+            tree = ast.parse(content, filename=filename)
+        except SyntaxError as e:
+            result["issues"].append(_issue(filename, "syntax", e.msg, e.lineno))
+            return result
+
+        definitions = set()
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                definitions.add(node.name)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    for name in ast.walk(target):
+                        if isinstance(name, ast.Name):
+                            definitions.add(name.id)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                for alias in node.names:
+                    definitions.add((alias.asname or alias.name).split(".")[0])
+        result["definitions"] = sorted(definitions)
+
+        optional = _optional_imports(tree)
+        for node in ast.walk(tree):
+            if id(node) in optional:
+                continue
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    result["imports"].append({"module": alias.name, "level": 0, "names": [], "line": node.lineno})
+            elif isinstance(node, ast.ImportFrom):
+                result["imports"].append({
+                    "module": node.module or "",
+                    "level": node.level,
+                    "names": [a.name for a in node.names if a.name != "*"],
+                    "line": node.lineno,
+                })
+                if node in tree.body:
+                    # Where imported routers come from, so routes key on the defining module
+                    for alias in node.names:
+                        result["router_sources"][alias.asname or alias.name] = {
+                            "module": node.module or "", "level": node.level, "name": alias.name
+                        }
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for decorator in node.decorator_list:
+                    route = _route_decorator(decorator)
+                    if route:
+                        result["routes"].append({
+                            "router": route[0], "method": route[1], "path": route[2], "line": node.lineno
+                        })
+
+    elif suffix == ".json":
+        try:
+            json.loads(content)
+        except json.JSONDecodeError as e:
+            result["issues"].append(_issue(filename, "parse", e.msg, e.lineno))
+
+    elif suffix in (".yaml", ".yml") and yaml is not None:
+        try:
+            yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            mark = getattr(e, "problem_mark", None)
+            result["issues"].append(_issue(filename, "parse", str(e).splitlines()[0], mark.line + 1 if mark else None))
+
+    elif suffix == ".toml" and tomllib is not None:
+        try:
+            tomllib.loads(content)
+        except tomllib.TOMLDecodeError as e:
+            match = re.search(r"line (\d+)", str(e))
+            result["issues"].append(_issue(filename, "parse", str(e), int(match.group(1)) if match else None))
+
+    return result
+
+
+def _resolve_relative(importer: str, module: str, level: int) -> str:
+    package = (_module_name(importer) or "").split(".")
+    # A module's own name is not part of its package; __init__ already dropped it
+    if not importer.replace("\\", "/").endswith("__init__.py"):
+        package = package[:-1]
+    base = package[:len(package) - (level - 1)] if level > 1 else package
+    return ".".join([p for p in base if p] + ([module] if module else []))
+
+
+def _router_owner(analysis: Dict[str, Any], router: str) -> Tuple[str, str]:
+    """(module, name) of the object a route is registered on.
+
+    Each file's own ``app`` is a different application; one imported from
+    another project module is that module's.
+    """
+    head, _, rest = router.partition(".")
+    source = analysis.get("router_sources", {}).get(head)
+    if source is None:
+        return _module_name(analysis["file"]) or analysis["file"], router
+    module = source["module"]
+    if source["level"]:
+        module = _resolve_relative(analysis["file"], module, source["level"])
+    return module, source["name"] + ("." + rest if rest else "")
+
+
+def check_project(analyses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Cross-file checks: unresolved in-project imports and duplicate routes"""
+    issues: List[Dict[str, Any]] = []
+    modules = {}
+    for analysis in analyses:
+        name = _module_name(analysis["file"])
+        if name:
+            modules[name] = analysis
+    packages = {m.split(".")[0] for m in modules}
+    stdlib = getattr(sys, "stdlib_module_names", set())
+
+    for analysis in analyses:
+        for imp in analysis["imports"]:
+            if imp["level"]:
+                target = _resolve_relative(analysis["file"], imp["module"], imp["level"])
+            else:
+                target = imp["module"]
+                top = target.split(".")[0]
+                # Only imports that point into the project can be checked
+                if top not in packages or top in stdlib:
+                    continue
+
+            if target in modules:
+                if modules[target]["definitions"] is None:
+                    # Target failed to parse; that file carries the error
+                    continue
+                defined = set(modules[target]["definitions"])
+                for name in imp["names"]:
+                    if name not in defined and f"{target}.{name}" not in modules:
+                        issues.append(_issue(
+                            analysis["file"], "unresolved_import",
+                            f"'{name}' is not defined in project module '{target}'", imp["line"]
+                        ))
+            elif any(m.startswith(target + ".") for m in modules):
+                # Namespace package (no __init__.py): names must be submodules
+                for name in imp["names"]:
+                    if f"{target}.{name}" not in modules:
+                        issues.append(_issue(
+                            analysis["file"], "unresolved_import",
+                            f"Project package '{target}' has no module '{name}'", imp["line"]
+                        ))
+            else:
+                issues.append(_issue(
+                    analysis["file"], "unresolved_import",
+                    f"Project module '{target or '.'}' does not exist", imp["line"]
+                ))
+
+    seen: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+    for analysis in analyses:
+        for route in analysis["routes"]:
+            key = (*_router_owner(analysis, route["router"]), route["method"], route["path"])
+            if key in seen:
+                first = seen[key]
+                issues.append(_issue(
+                    analysis["file"], "duplicate_route",
+                    f"{route['method']} {route['path']} on '{route['router']}' is already defined "
+                    f"in {first['file']}:{first['line']}", route["line"]
+                ))
+            else:
+                seen[key] = {"file": analysis["file"], "line": route["line"]}
+
+    return issues
+
+
+class StaticValidator:
+    """Cheap local checks run before the LLM-based test phases.
+
+    Parsing happens in a process pool so large projects do not hold the
+    event loop (or the GIL) while hundreds of files are parsed.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def _pool(cls) -> ProcessPoolExecutor:
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(max_workers=settings.VALIDATION_WORKERS or None)
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        if cls._executor is not None:
+            cls._executor.shutdown(cancel_futures=True)
+            cls._executor = None
+
+    async def validate(
+        self,
+        files: Mapping[str, str],
+        known: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Validate a set of files and return a report grouped by file.
+
+        ``known`` maps filenames to analyses (the report's ``analyses``) from
+        an earlier call whose content has not changed since; only the other
+        files are parsed, the cross-file checks still cover all of them.
+        """
+        known = {name: analysis for name, analysis in (known or {}).items() if name in files}
+        # Only the files to parse are read: ``files`` may load content lazily,
+        # from disk, so that happens off the event loop
+        items = await asyncio.to_thread(lambda: [(name, files[name]) for name in files if name not in known])
+        items = [(name, content) for name, content in items if isinstance(content, str)]
+        loop = asyncio.get_running_loop()
+
+        with tracer.span("validation.static", {"validation.files": len(files), "validation.cache_hits": len(known)}):
+            try:
+                analyses = await asyncio.gather(*[
+                    loop.run_in_executor(self._pool(), analyze_file, name, content)
+                    for name, content in items
+                ])
+            except BrokenProcessPool:
+                logger.warning("Validation pool broke, validating in-process")
+                StaticValidator._executor = None
+                analyses = [analyze_file(name, content) for name, content in items]
+        analyses = list(known.values()) + list(analyses)
+
+        issues = [issue for analysis in analyses for issue in analysis["issues"]]
+        issues.extend(check_project(analyses))
+
+        by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for issue in issues:
+            by_file.setdefault(issue["file"], []).append(issue)
+
+        return {
+            "files_checked": len(analyses),
+            "files_parsed": len(items),
+            "issue_count": len(issues),
+            "issues": issues,
+            "files_needing_repair": sorted(
+                name for name, file_issues in by_file.items()
+                if any(i["kind"] in BLOCKING_KINDS for i in file_issues)
+            ),
+            "by_file": by_file,
+            "analyses": {analysis["file"]: analysis for analysis in analyses},
+        }
@@ -0,0 +1,159 @@
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from backend.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+DEFAULT_PARAMS = {
+    "title": "Generated Project",
+    "description": "",
+    "api_port": 8000,
+}
+
+
+@dataclass
+class TemplateSpec:
+    name: str
+    version: str
+    output: str
+    path: Path
+    origin: str  # "builtin" or "override"
+    project_types: List[str] = field(default_factory=list)  # empty = any
+    stack: List[str] = field(default_factory=list)  # all must be in the tech stack
+    # "owned": the template is authoritative and the LLM is never asked for it
+    # "base": used only when the LLM does not produce the file itself
+    mode: str = "owned"
+
+    @property
+    def version_key(self) -> Tuple[int, ...]:
+        return tuple(int(p) for p in re.findall(r"\d+", self.version))
+
+    @property
+    def specificity(self) -> int:
+        return int(bool(self.project_types)) + len(self.stack)
+
+    def matches(self, project_type: Optional[str], tech_stack: Iterable[str]) -> bool:
+        if self.project_types and project_type not in self.project_types:
+            return False
+        stack = {s.lower() for s in tech_stack}
+        return all(s.lower() in stack for s in self.stack)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "output": self.output,
+            "mode": self.mode,
+            "origin": self.origin,
+        }
+
+
+class TemplateRegistry:
+    """Versioned boilerplate templates keyed by project type and tech stack.
+
+    Built-in templates live in ``backend/templates`` and are listed in its
+    ``manifest.json``. A manifest in ``settings.TEMPLATE_OVERRIDE_DIR`` can
+    replace a built-in template by name, add new ones, or disable one with
+    ``"disabled": true``; relative ``source`` paths resolve against the
+    manifest that declares them.
+    """
+
+    def __init__(self, builtin_dir: Path = BUILTIN_DIR, override_dir: Optional[str] = None):
+        self.builtin_dir = Path(builtin_dir)
+        self.override_dir = Path(override_dir or settings.TEMPLATE_OVERRIDE_DIR)
+        self._specs: Optional[Dict[str, TemplateSpec]] = None
+        self._lock = threading.Lock()
+
+    def _read_manifest(self, directory: Path, origin: str) -> List[Dict[str, Any]]:
+        manifest = directory / "manifest.json"
+        if not manifest.exists():
+            return []
+        try:
+            entries = json.loads(manifest.read_text(encoding="utf-8")).get("templates", [])
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable template manifest {manifest}: {str(e)}")
+            return []
+        for entry in entries:
+            entry["_dir"] = directory
+            entry["_origin"] = origin
+        return entries
+
+    def load(self) -> Dict[str, TemplateSpec]:
+        """Read (once) and return all enabled templates by name"""
+        with self._lock:
+            if self._specs is not None:
+                return self._specs
+            entries: Dict[str, Dict[str, Any]] = {}
+            for entry in self._read_manifest(self.builtin_dir, "builtin"):
+                entries[entry["name"]] = entry
+            for entry in self._read_manifest(self.override_dir, "override"):
+                entries[entry["name"]] = entry
+
+            specs = {}
+            for name, entry in entries.items():
+                if entry.get("disabled"):
+                    continue
+                specs[name] = TemplateSpec(
+                    name=name,
+                    version=str(entry.get("version", "0")),
+                    output=entry["output"],
+                    path=entry["_dir"] / entry["source"],
+                    origin=entry["_origin"],
+                    project_types=list(entry.get("project_types", [])),
+                    stack=list(entry.get("stack", [])),
+                    mode=entry.get("mode", "owned"),
+                )
+            self._specs = specs
+            logger.info(f"Loaded {len(specs)} project templates")
+            return specs
+
+    def get(self, name: str) -> Optional[TemplateSpec]:
+        """An enabled template by name; None if unknown or disabled by an override"""
+        return self.load().get(name)
+
+    def reload(self):
+        with self._lock:
+            self._specs = None
+        self.load()
+
+    def select(self, project_type: Optional[str], tech_stack: Iterable[str]) -> Dict[str, TemplateSpec]:
+        """Pick the best template for every output file that has one.
+
+        Overrides win over built-ins, then the more specific match, then the
+        higher version.
+        """
+        tech_stack = list(tech_stack)
+        chosen: Dict[str, TemplateSpec] = {}
+        for spec in self.load().values():
+            if not spec.matches(project_type, tech_stack):
+                continue
+            current = chosen.get(spec.output)
+            if current is None or self._rank(spec) > self._rank(current):
+                chosen[spec.output] = spec
+        return chosen
+
+    def _rank(self, spec: TemplateSpec) -> Tuple:
+        return (spec.origin == "override", spec.specificity, spec.version_key)
+
+    def render(self, spec, params: Optional[Dict[str, Any]] = None) -> str:
+        """Fill a template (given as spec or name); unknown placeholders are kept"""
+        if isinstance(spec, str):
+            spec = self.load()[spec]
+        values = {**DEFAULT_PARAMS, **(params or {})}
+        text = spec.path.read_text(encoding="utf-8")
+        return PLACEHOLDER.sub(
+            lambda m: str(values[m.group(1)]) if m.group(1) in values else m.group(0), text
+        )
+
+
+# Shared by all agents and the crew manager; manifests are read on first use
+template_registry = TemplateRegistry()
@@ -0,0 +1,113 @@
+import html
+from typing import Any, Dict, List, Optional, Set
+
+# Bar colours by the first segment of the span name
+COLORS = {
+    "project": "#6b7280",
+    "phase": "#4f46e5",
+    "step": "#0891b2",
+    "agent": "#059669",
+    "llm": "#d97706",
+    "file": "#9333ea",
+    "validation": "#db2777",
+    "package": "#64748b",
+}
+
+# Attribute shown next to the span name, first one present
+LABELS = ("phase", "step", "agent", "gen_ai.request.model", "file.path", "server.address")
+
+
+def select_trace(spans: List[Dict[str, Any]], trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Spans of one trace; the most recently started run by default"""
+    if trace_id is None and spans:
+        trace_id = max(spans, key=lambda s: s["start_ns"] if s["parent_id"] is None else 0)["trace_id"]
+    return [s for s in spans if s["trace_id"] == trace_id]
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> Set[str]:
+    """Span ids on the critical path of a trace.
+
+    Walks back from the end of each span: the child that finished last
+    bounded it, then whichever child finished last before that one
+    started, and so on; the walk repeats inside every chosen child.
+    """
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    ids = {s["span_id"] for s in spans}
+    for span in spans:
+        parent = span["parent_id"] if span["parent_id"] in ids else None
+        children.setdefault(parent, []).append(span)
+
+    path: Set[str] = set()
+    stack = list(children.get(None, []))
+    while stack:
+        span = stack.pop()
+        path.add(span["span_id"])
+        horizon = span["end_ns"]
+        for child in sorted(children.get(span["span_id"], []), key=lambda s: s["end_ns"], reverse=True):
+            if child["end_ns"] <= horizon:
+                stack.append(child)
+                horizon = child["start_ns"]
+    return path
+
+
+def _ordered(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Depth-first order with a ``depth`` for indentation"""
+    ids = {s["span_id"] for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span in spans:
+        children.setdefault(span["parent_id"] if span["parent_id"] in ids else None, []).append(span)
+    ordered = []
+    stack = [(span, 0) for span in reversed(children.get(None, []))]
+    while stack:
+        span, depth = stack.pop()
+        ordered.append({**span, "depth": depth})
+        stack.extend((child, depth + 1) for child in reversed(children.get(span["span_id"], [])))
+    return ordered
+
+
+def render_timeline(project_id: str, spans: List[Dict[str, Any]]) -> str:
+    """Waterfall of one trace as a self-contained HTML page"""
+    if not spans:
+        return f"<p>No spans recorded for {html.escape(project_id)}.</p>"
+    start = min(s["start_ns"] for s in spans)
+    total = max(max(s["end_ns"] for s in spans) - start, 1)
+    on_path = critical_path(spans)
+
+    rows = []
+    for span in _ordered(spans):
+        left = (span["start_ns"] - start) / total * 100
+        width = max((span["end_ns"] - span["start_ns"]) / total * 100, 0.15)
+        seconds = (span["end_ns"] - span["start_ns"]) / 1e9
+        color = COLORS.get(span["name"].split(".", 1)[0].split(":", 1)[0], "#94a3b8")
+        details = "\n".join(f"{k}: {v}" for k, v in span["attributes"].items())
+        if span["status_message"]:
+            details += f"\nerror: {span['status_message']}"
+        classes = " ".join(c for c in ("crit" if span["span_id"] in on_path else "", "err" if span["error"] else "") if c)
+        label = next((span["attributes"][k] for k in LABELS if span["attributes"].get(k)), "")
+        rows.append(
+            f'<div class="row {classes}" title="{html.escape(details)}">'
+            f'<div class="name" style="padding-left:{span["depth"] * 14}px">{html.escape(span["name"])}'
+            f' <span class="label">{html.escape(str(label))}</span></div>'
+            f'<div class="lane"><div class="bar" style="left:{left:.3f}%;width:{width:.3f}%;background:{color}"></div></div>'
+            f'<div class="dur">{seconds:.2f}s</div></div>'
+        )
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Trace {html.escape(project_id)}</title>
+<style>
+body {{ font: 13px system-ui, sans-serif; margin: 16px; color: #111827; }}
+.row {{ display: flex; align-items: center; height: 20px; border-bottom: 1px solid #f3f4f6; }}
+.row:hover {{ background: #f9fafb; }}
+.name {{ width: 34%; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }}
+.label {{ color: #6b7280; }}
+.lane {{ position: relative; flex: 1; height: 12px; }}
+.bar {{ position: absolute; height: 100%; border-radius: 2px; opacity: .45; }}
+.crit .bar {{ opacity: 1; }}
+.crit .name {{ font-weight: 600; }}
+.err .name {{ color: #dc2626; }}
+.dur {{ width: 70px; text-align: right; font-variant-numeric: tabular-nums; }}
+</style></head><body>
+<h3>Trace of project {html.escape(project_id)} &middot; {total / 1e9:.1f}s &middot; {len(spans)} spans</h3>
+<p>Bold, solid bars are the critical path; hover a row for its attributes.</p>
+{"".join(rows)}
+</body></html>"""
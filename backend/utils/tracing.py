@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from backend.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+SERVICE_NAME = "ai-project-manager"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    project_id: str
+    parent_id: Optional[str] = None
+    kind: int = KIND_INTERNAL
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: int = STATUS_UNSET
+    status_message: str = ""
+    # Root span only: the phase span currently open under it
+    phase: Optional["Span"] = field(default=None, repr=False)
+
+    def set(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def update(self, attributes: Dict[str, Any]):
+        for key, value in attributes.items():
+            self.set(key, value)
+
+    def record_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"[:500]
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            tracer.export(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            # OTLP/JSON encodes 64-bit integers as strings
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status, **({"message": self.status_message} if self.status_message else {})},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in outside a traced run, so call sites need no checks"""
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def update(self, attributes: Dict[str, Any]):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def attribute_value(value: Dict[str, Any]) -> Any:
+    """Decode an OTLP/JSON ``AnyValue``"""
+    if "intValue" in value:
+        return int(value["intValue"])
+    for key in ("stringValue", "boolValue", "doubleValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Nested spans for pipeline runs: project → phase → step → agent task → LLM call.
+
+    The current span travels in a ``ContextVar``, so spans opened in worker
+    threads (crew kickoffs) and in tasks the LLM layer schedules on the
+    loop nest under the step that caused them. Every finished span is
+    buffered and appended off the event loop (in a worker thread) to
+    ``<project_id>.trace.jsonl`` in GENERATED_DIR, one OTLP/JSON
+    ``ExportTraceServiceRequest`` per line (what the OpenTelemetry
+    Collector's file exporter writes), so the file can be replayed into any
+    OTLP backend; ``/project/{id}/trace`` renders it as a timeline. Outside
+    a run there is no current span and nothing is recorded.
+    """
+
+    def __init__(self):
+        self.base_path = Path(settings.GENERATED_DIR)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Encoded spans not written yet, per project
+        self._pending: Dict[str, List[str]] = {}
+        self._flush_scheduled = False
+
+    def path(self, project_id: str) -> Path:
+        return self.base_path / f"{project_id}.trace.jsonl"
+
+    # ------------------------------------------------------------------
+    # Spans
+    # ------------------------------------------------------------------
+    def start_trace(self, project_id: str, name: str, attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        """Open the root span of a run and make it current"""
+        if not settings.TRACING_ENABLED:
+            return None
+        root = Span(name=name, trace_id=os.urandom(16).hex(), span_id=os.urandom(8).hex(), project_id=project_id)
+        root.update(attributes or {})
+        root.set("project.id", project_id)
+        current_span.set(root)
+        return root
+
+    def end_trace(self, root: Optional[Span], status: Optional[str] = None):
+        """Close the run's last phase and its root span.
+
+        Without an explicit ``status`` the run counts as failed when an
+        error was recorded on the root or the phase it ended in.
+        """
+        if root is None:
+            return
+        failed = root.status == STATUS_ERROR
+        if root.phase is not None:
+            failed = failed or root.phase.status == STATUS_ERROR
+            root.phase.end()
+            root.phase = None
+        if status is None:
+            status = "failed" if failed else "completed"
+        if failed:
+            root.status = STATUS_ERROR
+        root.set("project.status", status)
+        root.end()
+        current_span.set(None)
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                   kind: int = KIND_INTERNAL, parent: Optional[Span] = None) -> Optional[Span]:
+        parent = parent or current_span.get()
+        if parent is None:
+            return None
+        span = Span(
+            name=name, trace_id=parent.trace_id, span_id=os.urandom(8).hex(),
+            project_id=parent.project_id, parent_id=parent.span_id, kind=kind
+        )
+        span.update(attributes or {})
+        return span
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+             kind: int = KIND_INTERNAL) -> Iterator[Any]:
+        """A child of the current span for the duration of the block"""
+        span = self.start_span(name, attributes, kind)
+        if span is None:
+            yield NOOP_SPAN
+            return
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+    def phase(self, name: str, root: Optional[Span]):
+        """End the run's open phase span and start the next one.
+
+        Phases run back to back in the pipeline's own task, so a marker
+        keeps that code flat where a ``with`` block per phase would not.
+        """
+        if root is None:
+            return
+        if root.phase is not None:
+            root.phase.end()
+        root.phase = self.start_span("phase", {"phase": name}, parent=root)
+        current_span.set(root.phase)
+
+    def current(self) -> Any:
+        return current_span.get() or NOOP_SPAN
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    def export(self, span: Span):
+        """Buffer a finished span; a flush in a worker thread writes it.
+
+        Spans end on the event loop for every LLM call and step, so the
+        file write must not happen there. Off the loop (crew threads) the
+        span is written right away unless a flush is already scheduled.
+        """
+        line = json.dumps({"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp()]}],
+        }]})
+        with self._lock:
+            self._pending.setdefault(span.project_id, []).append(line)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        loop.run_in_executor(None, self.flush)
+
+    def flush(self):
+        """Append the buffered spans to their trace files (blocking)"""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._flush_scheduled = False
+            for project_id, lines in pending.items():
+                try:
+                    with open(self.path(project_id), "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                except OSError as e:
+                    logger.warning(f"Could not export {len(lines)} spans of {project_id}: {str(e)}")
+
+    def load(self, project_id: str) -> List[Dict[str, Any]]:
+        """Spans recorded for a project, decoded, in start order"""
+        spans = []
+        # Serialised with flushes, so a span is read from the file or the buffer, never both
+        with self._write_lock:
+            try:
+                with open(self.path(project_id), "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                lines = []
+            with self._lock:
+                lines += self._pending.get(project_id, [])
+        for line in lines:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut off by a crash
+            for resource in request.get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for span in scope.get("spans", []):
+                        spans.append({
+                            "trace_id": span["traceId"],
+                            "span_id": span["spanId"],
+                            "parent_id": span.get("parentSpanId"),
+                            "name": span["name"],
+                            "kind": span.get("kind", KIND_INTERNAL),
+                            "start_ns": int(span["startTimeUnixNano"]),
+                            "end_ns": int(span["endTimeUnixNano"]),
+                            "attributes": {a["key"]: attribute_value(a["value"]) for a in span.get("attributes", [])},
+                            "error": span.get("status", {}).get("code") == STATUS_ERROR,
+                            "status_message": span.get("status", {}).get("message", ""),
+                        })
+        spans.sort(key=lambda s: s["start_ns"])
+        return spans
+
+
+tracer = Tracer()
@@ -0,0 +1,327 @@
+"""
+Load test: mixed API traffic against a locally started app.
+
+Starts ``stub_ollama.py`` as the LLM server and the app under uvicorn with
+a scratch GENERATED_DIR, then runs ``--users`` concurrent clients for
+``--duration`` seconds. Each client loops over a weighted mix of project
+submissions, status polls, listings and downloads of finished projects.
+Reported: throughput and p50/p95/p99 latency per endpoint, event-loop lag
+(a dedicated /health prober whose latency is the time the loop took to get
+to it), and the server's resident memory growth. Thresholds turn the run
+into a regression gate that exits non-zero when one is exceeded:
+
+    python benchmarks/load_test.py --users 20 --duration 60
+    python benchmarks/load_test.py --users 20 --duration 60 \\
+        --max-p95 status=0.2 --max-p95 download=0.5 --max-lag-p99 0.1 --max-error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+STUB = Path(__file__).resolve().parent / "stub_ollama.py"
+
+DEFAULT_MIX = "submit=0.3,status=12,list=3,download=4"
+# Not JSON, so every agent takes its fallback path and runs complete
+STUB_ANSWER = "Done."
+PROJECT_TYPES = ["web_app", "data_analysis", "ai_ml", "full_stack"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, proc: subprocess.Popen, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{proc.args[1]} exited with code {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} did not answer within {timeout}s")
+
+
+def _stop(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size from /proc (Linux); None elsewhere"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class LoadTest:
+    def __init__(self, base_url: str, args):
+        self.base_url = base_url
+        self.args = args
+        self.mix = [(name, float(weight)) for name, weight in
+                    (item.split("=") for item in args.mix.split(","))]
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.lag: List[float] = []
+        self.projects: List[str] = []
+        self.completed: set = set()
+        self.rng = random.Random(args.seed)
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.latencies[endpoint].append(time.perf_counter() - started)
+            self.statuses[endpoint][type(e).__name__] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        self.statuses[endpoint][response.status_code] += 1
+        return response
+
+    async def submit(self, client: httpx.AsyncClient):
+        n = len(self.projects) + 1
+        body = {
+            "title": f"Load test project {n}",
+            "description": "A small service generated under load",
+            "project_type": self.rng.choice(PROJECT_TYPES),
+            "requirements": ["REST API", "persistence"],
+        }
+        response = await self.request(client, "submit", "POST", "/assign_project", json=body)
+        if response is not None and response.status_code == 200:
+            self.projects.append(response.json()["project_id"])
+
+    async def status(self, client: httpx.AsyncClient):
+        if not self.projects:
+            return await self.listing(client)
+        project_id = self.rng.choice(self.projects)
+        response = await self.request(client, "status", "GET", f"/project/{project_id}/status")
+        if response is not None and response.status_code == 200 and response.json().get("status") == "completed":
+            self.completed.add(project_id)
+
+    async def listing(self, client: httpx.AsyncClient):
+        await self.request(client, "list", "GET", "/projects")
+
+    async def download(self, client: httpx.AsyncClient):
+        if not self.completed:
+            return await self.status(client)
+        project_id = self.rng.choice(sorted(self.completed))
+        await self.request(client, "download", "GET", f"/download/{project_id}")
+
+    async def user(self, deadline: float):
+        actions = {"submit": self.submit, "status": self.status, "list": self.listing, "download": self.download}
+        names, weights = zip(*self.mix)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.args.timeout) as client:
+            while time.monotonic() < deadline:
+                await actions[self.rng.choices(names, weights)[0]](client)
+                await asyncio.sleep(self.rng.expovariate(1 / self.args.think) if self.args.think else 0)
+
+    async def lag_probe(self, deadline: float):
+        # Its own connection, at a low fixed rate: /health does no work, so
+        # its latency is how long the event loop took to get to the request
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.args.timeout) as client:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    await client.get("/health")
+                    self.lag.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.1)
+
+    async def run(self, server_pid: int) -> Dict:
+        memory = [rss_mb(server_pid)]
+        deadline = time.monotonic() + self.args.duration
+        started = time.perf_counter()
+
+        async def sample_memory():
+            while time.monotonic() < deadline:
+                await asyncio.sleep(1)
+                memory.append(rss_mb(server_pid))
+
+        await asyncio.gather(
+            *[self.user(deadline) for _ in range(self.args.users)],
+            self.lag_probe(deadline),
+            sample_memory(),
+        )
+        elapsed = time.perf_counter() - started
+        memory.append(rss_mb(server_pid))
+        return self.report(elapsed, [m for m in memory if m is not None])
+
+    def report(self, elapsed: float, memory: List[float]) -> Dict:
+        endpoints = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            statuses = self.statuses[endpoint]
+            # 429 is admission control doing its job, 404 a download racing the GC
+            errors = sum(n for code, n in statuses.items() if not isinstance(code, int) or code >= 500)
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+                "statuses": {str(code): n for code, n in sorted(statuses.items(), key=str)},
+            }
+        total = sum(len(s) for s in self.latencies.values())
+        errors = sum(e["error_rate"] * e["requests"] for e in endpoints.values())
+        return {
+            "duration_seconds": round(elapsed, 1),
+            "users": self.args.users,
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "projects_submitted": len(self.projects),
+            "projects_completed": len(self.completed),
+            "endpoints": endpoints,
+            "loop_lag": {
+                "samples": len(self.lag),
+                "p50": percentile(self.lag, 50),
+                "p99": percentile(self.lag, 99),
+                "max": max(self.lag, default=0.0),
+            },
+            "memory_mb": {
+                "start": round(memory[0], 1) if memory else None,
+                "peak": round(max(memory), 1) if memory else None,
+                "end": round(memory[-1], 1) if memory else None,
+                "growth": round(memory[-1] - memory[0], 1) if memory else None,
+            },
+        }
+
+
+def check(results: Dict, args) -> List[str]:
+    """Threshold violations, empty when the run passes"""
+    failures = []
+    for item in args.max_p95:
+        endpoint, limit = item.split("=")
+        p95 = results["endpoints"].get(endpoint, {}).get("p95", 0.0)
+        if p95 > float(limit):
+            failures.append(f"{endpoint} p95 {p95:.3f}s > {limit}s")
+    if args.max_error_rate is not None and results["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {results['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    if args.max_lag_p99 is not None and results["loop_lag"]["p99"] > args.max_lag_p99:
+        failures.append(f"loop lag p99 {results['loop_lag']['p99']:.3f}s > {args.max_lag_p99}s")
+    growth = results["memory_mb"]["growth"]
+    if args.max_rss_growth_mb is not None and growth is not None and growth > args.max_rss_growth_mb:
+        failures.append(f"memory growth {growth:.0f} MB > {args.max_rss_growth_mb} MB")
+    return failures
+
+
+def print_results(results: Dict):
+    print(
+        f"\n{results['requests']} requests in {results['duration_seconds']}s from {results['users']} users "
+        f"({results['throughput_rps']} req/s), {results['projects_submitted']} projects submitted, "
+        f"{results['projects_completed']} completed"
+    )
+    print(f"\n  {'endpoint':<10} {'req':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}  statuses")
+    for endpoint, e in results["endpoints"].items():
+        statuses = " ".join(f"{code}:{n}" for code, n in e["statuses"].items())
+        print(
+            f"  {endpoint:<10} {e['requests']:>6} {e['throughput_rps']:>7} "
+            f"{e['p50'] * 1000:>6.0f}ms {e['p95'] * 1000:>6.0f}ms {e['p99'] * 1000:>6.0f}ms "
+            f"{e['error_rate']:>7.2%}  {statuses}"
+        )
+    lag = results["loop_lag"]
+    print(f"\n  loop lag   p50 {lag['p50'] * 1000:.0f}ms  p99 {lag['p99'] * 1000:.0f}ms  max {lag['max'] * 1000:.0f}ms")
+    memory = results["memory_mb"]
+    if memory["start"] is not None:
+        print(f"  memory     {memory['start']} MB -> {memory['end']} MB (peak {memory['peak']} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of traffic")
+    parser.add_argument("--think", type=float, default=0.2, help="mean seconds between a client's requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="relative weights of submit,status,list,download")
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="stub seconds per completion")
+    parser.add_argument("--timeout", type=float, default=30, help="client timeout per request")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra app setting")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    gate = parser.add_argument_group("pass/fail thresholds")
+    gate.add_argument("--max-p95", action="append", default=[], metavar="ENDPOINT=SECONDS")
+    gate.add_argument("--max-error-rate", type=float, help="fraction of 5xx / transport errors")
+    gate.add_argument("--max-lag-p99", type=float, help="seconds")
+    gate.add_argument("--max-rss-growth-mb", type=float)
+    args = parser.parse_args()
+
+    stub_port, app_port = _free_port(), _free_port()
+    with tempfile.TemporaryDirectory(prefix="apm-load-") as generated:
+        env = dict(os.environ)
+        env.update({
+            "OLLAMA_BASE_URL": f"http://127.0.0.1:{stub_port}",
+            "GENERATED_DIR": generated,
+            "GC_ENABLED": "false",
+            "CREWAI_TRACING_ENABLED": "false",
+        })
+        env.update(item.split("=", 1) for item in args.env)
+        stub = subprocess.Popen(
+            [sys.executable, str(STUB), "--port", str(stub_port), "--delay", str(args.llm_delay),
+             "--answer", STUB_ANSWER],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        app = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(app_port), "--log-level", "warning"],
+            cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            _wait_for(f"http://127.0.0.1:{stub_port}/api/tags", stub)
+            _wait_for(f"http://127.0.0.1:{app_port}/health", app)
+            test = LoadTest(f"http://127.0.0.1:{app_port}", args)
+            results = asyncio.run(test.run(app.pid))
+        finally:
+            _stop(app)
+            _stop(stub)
+
+    print_results(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+    failures = check(results, args)
+    if failures:
+        print("\nFAIL")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    thresholds = (args.max_error_rate, args.max_lag_p99, args.max_rss_growth_mb)
+    if args.max_p95 or any(limit is not None for limit in thresholds):
+        print("\nPASS")
+
+
+if __name__ == "__main__":
+    main()
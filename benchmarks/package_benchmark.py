@@ -0,0 +1,103 @@
+"""
+Package benchmark: build time, size and validation time per archive format.
+
+Packages a project tree with every available format of ``ProjectPackager``.
+Without ``--project`` a synthetic project of generated-looking sources is
+written to a temp dir first (``--files`` files of about ``--file-kb`` KB):
+
+    python benchmarks/package_benchmark.py --files 400 --file-kb 12 --runs 3
+    python benchmarks/package_benchmark.py --project generated/<project_id>
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from backend.utils.project_packager import ProjectPackager  # noqa: E402
+
+WORDS = (
+    "def class return self import from async await user project task response "
+    "request model field value config logger error status result items"
+).split()
+
+
+def write_synthetic_project(root: Path, files: int, file_kb: int, seed: int = 7):
+    """Source-like files: repetitive across files, like generated code is"""
+    rng = random.Random(seed)
+    for i in range(files):
+        path = root / f"pkg{i % 12}" / f"module_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = []
+        while sum(len(line) for line in lines) < file_kb * 1024:
+            indent = "    " * rng.randint(0, 3)
+            lines.append(indent + " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 10))) + "\n")
+        path.write_text("".join(lines))
+
+
+def tree_bytes(root: Path) -> int:
+    return sum(p.stat().st_size for p in root.rglob("*") if p.is_file())
+
+
+def benchmark(project: Path, runs: int):
+    work = Path(tempfile.mkdtemp(prefix="apm-package-"))
+    try:
+        shutil.copytree(project, work / "bench")
+        packager = ProjectPackager()
+        packager.base_path = work
+        results = {}
+        for name in packager.available_formats():
+            builds, checks = [], []
+            for _ in range(runs):
+                started = time.perf_counter()
+                path = packager.create_package("bench", format_name=name)
+                builds.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                if not packager.validate_package(path):
+                    raise RuntimeError(f"{name} package failed validation")
+                checks.append(time.perf_counter() - started)
+            results[name] = {
+                "build": statistics.median(builds),
+                "validate": statistics.median(checks),
+                "size": path.stat().st_size,
+            }
+        return results
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--project", type=Path, help="project tree to package (default: synthetic)")
+    parser.add_argument("--files", type=int, default=300, help="files in the synthetic project")
+    parser.add_argument("--file-kb", type=int, default=8, help="approximate size of each synthetic file")
+    parser.add_argument("--runs", type=int, default=3, help="builds per format (median reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="apm-project-") as tmp:
+        project = args.project
+        if project is None:
+            project = Path(tmp)
+            write_synthetic_project(project, args.files, args.file_kb)
+        raw = tree_bytes(project)
+        files = sum(1 for p in project.rglob("*") if p.is_file())
+        print(f"project: {files} files, {raw / 1024:.0f} KB, {os.cpu_count()} CPUs")
+        results = benchmark(project, args.runs)
+
+    print(f"\n  {'format':<10} {'build':>9} {'validate':>9} {'size KB':>9} {'ratio':>7}")
+    for name, r in sorted(results.items(), key=lambda item: item[1]["size"]):
+        print(
+            f"  {name:<10} {r['build'] * 1000:>7.0f}ms {r['validate'] * 1000:>7.0f}ms "
+            f"{r['size'] / 1024:>9.0f} {raw / r['size']:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Prompt cache benchmark: Ollama prompt evaluation with and without prefix reuse.
+
+Records the chat messages the real agents send (a junior developer pool
+implementing modules, the senior developer delegating tasks) by running
+them against a recording LLM, then replays each sequence against Ollama
+with ``num_predict`` 1, twice: in order, so each prompt can reuse the KV
+cache of the one before it, and cold, with the cache flushed before every
+call. Ollama reports only the tokens it actually evaluated, so the gap is
+what prefix reuse saves. ``--compare <git-rev>`` records and replays the
+prompts of that revision too (exported with ``git archive``):
+
+    python benchmarks/prompt_cache_benchmark.py --compare HEAD~1
+    python benchmarks/prompt_cache_benchmark.py --stub --compare HEAD~1
+
+``--stub`` replays against ``stub_ollama.py`` with its simulated KV cache
+instead of a real server: it checks the harness and the prompt layout, it
+does not measure a model.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+STUB = Path(__file__).resolve().parent / "stub_ollama.py"
+sys.path.insert(0, str(REPO_DIR))
+
+from backend.config import settings  # noqa: E402
+from backend.utils.ollama_client import OllamaClient  # noqa: E402
+
+SUBTASKS = [
+    ("auth.py", "User registration and login with salted password hashes and session tokens"),
+    ("todos.py", "CRUD endpoints for todo items with due dates, priorities and tags"),
+    ("search.py", "Full-text search over todo titles and notes with pagination"),
+    ("notifications.py", "Email reminders for items due within the next 24 hours"),
+    ("export.py", "Export a user's todo list as CSV and JSON"),
+    ("sharing.py", "Share a list with other users with read or write permission"),
+    ("stats.py", "Completion statistics per week and per tag"),
+    ("settings_api.py", "Per-user settings: time zone, theme and default list"),
+]
+
+TASKS = [
+    ("Authentication", "Sign-up, login, logout and password reset"),
+    ("Todo management", "Create, edit, complete and delete todo items"),
+    ("Search", "Search todos by text, tag and due date"),
+    ("Reminders", "Notify users about items that are due soon"),
+]
+
+# Runs inside the tree being measured: record what its agents send
+RECORDER = """
+import asyncio, json, sys
+from backend.utils import llm_factory
+from backend.models import Task
+captured = {"modules": [], "delegation": []}
+workload = "modules"
+
+async def record(self, messages, options, *args):
+    # crewai reuses the list between calls of an agent
+    captured[workload].append([dict(m) for m in messages])
+    return "Thought: done\\nFinal Answer: done"
+
+llm_factory.LocalLLM._scheduled_chat = record
+from backend.agents.junior_developer_agent import JuniorDeveloperAgent
+from backend.agents.senior_developer_agent import SeniorDeveloperAgent
+
+spec = json.loads(sys.argv[1])
+pool = [JuniorDeveloperAgent(i + 1) for i in range(spec["pool"])]
+
+async def main():
+    global workload
+    for i, (file, description) in enumerate(spec["subtasks"]):
+        await pool[i % len(pool)].implement_module({"file": file, "description": description})
+    workload = "delegation"
+    tasks = [
+        Task(id=f"task_{i}", title=title, description=description, assigned_to="junior_dev")
+        for i, (title, description) in enumerate(spec["tasks"])
+    ]
+    await SeniorDeveloperAgent().delegate_subtasks(tasks)
+
+asyncio.run(main())
+with open(spec["output"], "w") as f:
+    json.dump(captured, f)
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def record_prompts(app_dir: Path, pool: int, rounds: int) -> Dict[str, List[List[Dict[str, str]]]]:
+    """The messages the agents of ``app_dir`` send, per workload"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as out:
+        output = out.name
+    spec = {"pool": pool, "subtasks": SUBTASKS * rounds, "tasks": TASKS * rounds, "output": output}
+    env = {**os.environ, "CREWAI_TRACING_ENABLED": "false", "GC_ENABLED": "false"}
+    try:
+        subprocess.run(
+            [sys.executable, "-c", RECORDER, json.dumps(spec)],
+            cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
+        )
+        with open(output) as f:
+            return json.load(f)
+    finally:
+        os.unlink(output)
+
+
+async def replay(client: OllamaClient, model: str, prompts: List[List[Dict[str, str]]], cold: bool) -> Dict[str, Any]:
+    options = {"num_ctx": 2048, "num_batch": 128, "temperature": 0.7, "num_predict": 1}
+    evaluated, durations = [], []
+    for messages in prompts:
+        if cold:
+            # An unrelated prompt takes over the cache, as another project's call would
+            await client.chat(model, [{"role": "user", "content": f"flush {time.time_ns()}"}], options)
+        response = await client.chat(model, messages, options)
+        evaluated.append(response.get("prompt_eval_count", 0))
+        durations.append(response.get("prompt_eval_duration", 0) / 1e6)
+    return {
+        "calls": len(prompts),
+        "tokens_evaluated": sum(evaluated),
+        "prompt_eval_ms": sum(durations),
+        "median_ms": statistics.median(durations) if durations else 0.0,
+    }
+
+
+async def benchmark(app_dir: Path, client: OllamaClient, args) -> Dict[str, Dict[str, Any]]:
+    recorded = record_prompts(app_dir, args.pool, args.rounds)
+    models = {
+        "modules": settings.MODELS[settings.AGENT_MODELS["junior_developer"]],
+        "delegation": settings.MODELS[settings.AGENT_MODELS["senior_developer"]],
+    }
+    results = {}
+    for workload, prompts in recorded.items():
+        model = models[workload]
+        await client.load(model)
+        results[workload] = {
+            "cold": await replay(client, model, prompts, cold=True),
+            "reused": await replay(client, model, prompts, cold=False),
+        }
+    return results
+
+
+def export_revision(rev: str, target: Path):
+    archive = subprocess.run(
+        ["git", "archive", rev], cwd=REPO_DIR, capture_output=True, check=True
+    )
+    subprocess.run(["tar", "-x", "-C", str(target)], input=archive.stdout, check=True)
+
+
+def print_results(label: str, results: Dict[str, Dict[str, Any]]):
+    print(f"\n{label}")
+    print(f"  {'workload':<12} {'replay':<7} {'calls':>5} {'tokens':>8} {'eval ms':>9} {'median':>8}")
+    for workload, runs in results.items():
+        for replay_kind, stats in runs.items():
+            print(
+                f"  {workload:<12} {replay_kind:<7} {stats['calls']:>5} {stats['tokens_evaluated']:>8} "
+                f"{stats['prompt_eval_ms']:>9.0f} {stats['median_ms']:>8.1f}"
+            )
+        cold, reused = runs["cold"]["prompt_eval_ms"], runs["reused"]["prompt_eval_ms"]
+        if cold:
+            print(f"  {'':<12} prefix reuse saves {1 - reused / cold:.0%} of prompt evaluation time")
+
+
+def start_stub(port: int, prompt_eval_ms: float) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, str(STUB), "--port", str(port), "--delay", "0",
+         "--prompt-eval-ms", str(prompt_eval_ms)]
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"stub on port {port} did not start")
+
+
+async def run(args):
+    stub = None
+    base_url = args.base_url
+    if args.stub:
+        port = _free_port()
+        stub = start_stub(port, args.stub_prompt_eval_ms)
+        base_url = f"http://127.0.0.1:{port}"
+    client = OllamaClient(base_url=base_url)
+    try:
+        current = await benchmark(REPO_DIR, client, args)
+        print_results("working tree", current)
+        if args.compare:
+            with tempfile.TemporaryDirectory(prefix="apm-prompts-") as tmp:
+                export_revision(args.compare, Path(tmp))
+                baseline = await benchmark(Path(tmp), client, args)
+            print_results(args.compare, baseline)
+
+            print("\nprompt evaluation in order (reused), against the revision")
+            for workload in current:
+                before = baseline[workload]["reused"]["prompt_eval_ms"]
+                after = current[workload]["reused"]["prompt_eval_ms"]
+                if after:
+                    print(f"  {workload:<12} {before / after:.1f}x ({before:.0f} ms -> {after:.0f} ms)")
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default=settings.OLLAMA_BASE_URL, help="Ollama server to replay against")
+    parser.add_argument("--pool", type=int, default=3, help="junior developers taking turns")
+    parser.add_argument("--rounds", type=int, default=1, help="repeat the sample subtasks this often")
+    parser.add_argument("--compare", metavar="REV", help="git revision to compare against")
+    parser.add_argument("--stub", action="store_true", help="replay against stub_ollama.py's simulated cache")
+    parser.add_argument("--stub-prompt-eval-ms", type=float, default=0.5, help="stub cost per uncached token")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
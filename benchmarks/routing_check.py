@@ -0,0 +1,134 @@
+"""
+Routing check: spreads LLM calls over several stand-in Ollama servers.
+
+Starts ``stub_ollama.py`` servers on free ports and drives concurrent calls
+through ``BackendRegistry`` in three rounds: all backends up (calls split by
+outstanding requests, models only go where they are pulled), one backend
+killed mid-way (it is ejected and its calls retried elsewhere), and the
+backend restarted (the health check re-admits it):
+
+    python benchmarks/routing_check.py --calls 40 --delay 0.2
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+STUB = Path(__file__).resolve().parent / "stub_ollama.py"
+
+# Eject quickly and re-admit on the first healthy probe, so the run is short
+os.environ.setdefault("BACKEND_EJECT_FAILURES", "2")
+os.environ.setdefault("BACKEND_READMIT_SECONDS", "1")
+sys.path.insert(0, str(REPO_DIR))
+
+from backend.utils.backend_registry import BackendRegistry  # noqa: E402
+
+GENERAL_MODEL = "mistral:7b-instruct"
+CODE_MODEL = "starcoder2:7b"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub(port: int, models: str, delay: float) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, str(STUB), "--port", str(port), "--models", models, "--delay", str(delay)]
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"stub on port {port} did not start")
+
+
+def stop_stub(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+async def call(registry: BackendRegistry, model: str, served: Counter, retries: int = 3):
+    """One chat call, retried on connection errors like LocalLLM does"""
+    for attempt in range(retries + 1):
+        try:
+            async with registry.route(model) as backend:
+                await backend.client.chat(model, [{"role": "user", "content": "ping"}])
+                served[backend.url] += 1
+                return
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+
+
+async def run_round(registry: BackendRegistry, calls: int, during=None) -> Counter:
+    served: Counter = Counter()
+    work = [call(registry, CODE_MODEL if i % 4 == 0 else GENERAL_MODEL, served) for i in range(calls)]
+    if during is not None:
+        work.append(during())
+    await asyncio.gather(*work)
+    return served
+
+
+def report(label: str, served: Counter, registry: BackendRegistry, names):
+    print(f"\n{label}")
+    for backend in registry.backends:
+        state = "healthy" if backend.healthy else "ejected"
+        print(
+            f"  {names[backend.url]:<10} {served[backend.url]:>4} calls  {state:<8} "
+            f"failures {backend.failures_total}  loaded {sorted(backend.loaded)}"
+        )
+
+
+async def main_async(args):
+    ports = [_free_port() for _ in range(3)]
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+    models = [GENERAL_MODEL, GENERAL_MODEL, f"{GENERAL_MODEL},{CODE_MODEL}"]
+    names = dict(zip(urls, ["general-a", "general-b", "code"]))
+    stubs = [start_stub(port, m, args.delay) for port, m in zip(ports, models)]
+    registry = BackendRegistry(urls)
+    try:
+        await registry.check()
+        report("all backends up", await run_round(registry, args.calls), registry, names)
+
+        async def kill_b():
+            await asyncio.sleep(args.delay)
+            stop_stub(stubs[1])
+
+        report("general-b killed mid-round", await run_round(registry, args.calls, kill_b), registry, names)
+
+        stubs[1] = start_stub(ports[1], models[1], args.delay)
+        await asyncio.sleep(1.1)
+        await registry.check()
+        report("general-b restarted", await run_round(registry, args.calls), registry, names)
+    finally:
+        for proc in stubs:
+            stop_stub(proc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=40, help="calls per round")
+    parser.add_argument("--delay", type=float, default=0.2, help="stub seconds per completion")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Startup benchmark: import time of ``main`` and time to the first /health.
+
+Each sample runs in a fresh interpreter. Pass ``--compare <git-rev>`` to
+measure that revision too (exported to a temp dir with ``git archive``), so
+before/after numbers come from the same machine and run:
+
+    python benchmarks/startup_benchmark.py --runs 5 --compare HEAD~1
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("CREWAI_TRACING_ENABLED", "false")
+    env.setdefault("GC_ENABLED", "false")
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(app_dir: Path) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=app_dir, env=_env(), capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_health(app_dir: Path, timeout: float = 120.0) -> float:
+    """Seconds from process spawn until GET /health returns 200"""
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/health"
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.02)
+        raise TimeoutError(f"/health did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _summary(samples):
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def benchmark(app_dir: Path, runs: int):
+    imports = [measure_import(app_dir) for _ in range(runs)]
+    health = [measure_first_health(app_dir) for _ in range(runs)]
+    return {"import_main": _summary(imports), "first_health": _summary(health)}
+
+
+def export_revision(rev: str, target: Path):
+    archive = subprocess.run(
+        ["git", "archive", rev], cwd=REPO_DIR, capture_output=True, check=True
+    )
+    subprocess.run(["tar", "-x", "-C", str(target)], input=archive.stdout, check=True)
+
+
+def print_results(label: str, results):
+    print(f"\n{label}")
+    for metric, stats in results.items():
+        print(
+            f"  {metric:<14} min {stats['min']:.3f}s  "
+            f"median {stats['median']:.3f}s  max {stats['max']:.3f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="samples per measurement")
+    parser.add_argument("--compare", metavar="REV", help="git revision to compare against")
+    args = parser.parse_args()
+
+    current = benchmark(REPO_DIR, args.runs)
+    print_results("working tree", current)
+
+    if args.compare:
+        with tempfile.TemporaryDirectory(prefix="apm-startup-") as tmp:
+            export_revision(args.compare, Path(tmp))
+            baseline = benchmark(Path(tmp), args.runs)
+        print_results(args.compare, baseline)
+
+        print("\nspeed-up (median)")
+        for metric in current:
+            before = baseline[metric]["median"]
+            after = current[metric]["median"]
+            print(f"  {metric:<14} {before / after:.1f}x ({before:.3f}s -> {after:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Stand-in Ollama server for exercising the backend without GPUs.
+
+Serves just the endpoints the backend uses (``/api/tags``, ``/api/ps``,
+``/api/generate`` for loads and streaming ``/api/chat``) with configurable
+latency, so routing, warm-up and timeouts can be tried locally:
+
+    python benchmarks/stub_ollama.py --port 11501 --delay 0.5 --models mistral:7b-instruct
+
+With ``--prompt-eval-ms`` prompt evaluation takes that long per token
+(about 4 characters), except for the prefix a prompt shares with the
+previous one for the same model, like Ollama's KV cache reuse.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_MODELS = "mistral:7b-instruct,starcoder2:7b,codellama:7b"
+
+
+def make_handler(models, delay: float, load_delay: float, answer: str, prompt_eval_ms: float = 0.0):
+    loaded = {}
+    # Last prompt evaluated per model: the simulated KV cache
+    last_prompt = {}
+    cache_lock = threading.Lock()
+
+    def prompt_eval(model, messages):
+        """(evaluated tokens, duration in ns) for a chat, reusing the cached prefix"""
+        prompt = "".join(f"<|{m.get('role')}|>{m.get('content') or ''}" for m in messages)
+        if not prompt_eval_ms:
+            return 100, 50_000_000
+        with cache_lock:
+            shared = len(os.path.commonprefix([last_prompt.get(model, ""), prompt]))
+            last_prompt[model] = prompt
+        tokens = max(1, (len(prompt) - shared) // 4)
+        return tokens, int(tokens * prompt_eval_ms * 1e6)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _model(self, body):
+            model = body.get("model", "")
+            name = model if ":" in model else f"{model}:latest"
+            if name not in models:
+                self.send_response(404)
+                self.end_headers()
+                return None
+            return name
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                return self._send({"models": [{"name": m} for m in models]})
+            if self.path == "/api/ps":
+                return self._send({"models": [
+                    {"name": m, "expires_at": keep_alive} for m, keep_alive in loaded.items()
+                ]})
+            self.send_response(404)
+            self.end_headers()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            model = self._model(body)
+            if model is None:
+                return
+            load_ns = 0
+            if model not in loaded:
+                time.sleep(load_delay)
+                load_ns = int(load_delay * 1e9)
+            loaded[model] = body.get("keep_alive")
+            if self.path == "/api/generate":
+                return self._send({"model": model, "done": True, "load_duration": load_ns})
+
+            prompt_tokens, prompt_ns = prompt_eval(model, body.get("messages") or [])
+            time.sleep(delay + (prompt_ns / 1e9 if prompt_eval_ms else 0))
+            content = f"Thought: done\nFinal Answer: {answer}"
+            stats = {
+                "done": True,
+                "load_duration": load_ns,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": prompt_ns,
+                "eval_count": len(content) // 4,
+                "eval_duration": int(delay * 1e9) or 1,
+            }
+            if not body.get("stream"):
+                return self._send({"model": model, "message": {"role": "assistant", "content": content}, **stats})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            try:
+                for i in range(0, len(content), 16):
+                    chunk = {"message": {"role": "assistant", "content": content[i:i + 16]}, "done": False}
+                    self.wfile.write((json.dumps(chunk) + "\n").encode())
+                    self.wfile.flush()
+                final = {"message": {"role": "assistant", "content": ""}, **stats}
+                self.wfile.write((json.dumps(final) + "\n").encode())
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client cancelled, e.g. the losing side of a hedged request
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds per chat completion")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="seconds for a cold model load")
+    parser.add_argument("--models", default=DEFAULT_MODELS, help="comma-separated models served")
+    parser.add_argument("--answer", default='{"ok": true}', help="final answer text returned by chat")
+    parser.add_argument("--prompt-eval-ms", type=float, default=0.0,
+                        help="milliseconds per uncached prompt token (0: fixed prompt stats)")
+    args = parser.parse_args()
+
+    models = [m if ":" in m else f"{m}:latest" for m in args.models.split(",") if m]
+    handler = make_handler(models, args.delay, args.load_delay, args.answer, args.prompt_eval_ms)
+    ThreadingHTTPServer((args.host, args.port), handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,33 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from backend.models import ProjectRequest, ProjectResponse
 from backend.crew.crew_manager import CrewManager
 from backend.config import settings
+from backend.utils.garbage_collector import GarbageCollector, running_filter
+from backend.utils.admission import AdmissionController, AdmissionRejected
+from backend.utils.scheduler import llm_scheduler
+from backend.utils.agent_pool import pool_autoscaler
+from backend.utils.latency import llm_latency, llm_queue_delay
+from backend.utils.adaptive_timeouts import adaptive_timeouts
+from backend.utils.backend_registry import backend_registry
+from backend.utils.hedging import request_hedger
+from backend.utils.model_cascade import model_cascade
+from backend.utils.module_index import module_index
+from backend.utils.model_residency import ModelResidencyManager
+from backend.utils.static_validator import StaticValidator
+from backend.utils.sandbox_runner import SandboxTestRunner
+from backend.utils.static_assets import StaticAssets
+from backend.utils.profiler import run_profiler
+from backend.utils.loop_monitor import loop_monitor
+from backend.utils.tracing import tracer
+from backend.utils.trace_viewer import critical_path, render_timeline, select_trace
 from pathlib import Path
+from datetime import datetime
+from typing import Optional
+import asyncio
 import logging
+import uuid
 import uvicorn
 
 # Logging setup
@@ -35,19 +56,88 @@ app.add_middleware(
 BASE_DIR = Path(__file__).resolve().parent
 FRONTEND_DIR = BASE_DIR / "backend" / "frontend"
 
-# ✅ Mount static files properly
-app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
+# Frontend files are hashed and precompressed once at startup and served from memory
+static_assets = StaticAssets(FRONTEND_DIR)
 
 
-# ✅ Serve index.html manually
-@app.get("/", response_class=HTMLResponse)
-async def serve_index():
-    return (FRONTEND_DIR / "index.html").read_text(encoding="utf-8")
+@app.get("/")
+async def serve_index(request: Request):
+    asset = static_assets.lookup(StaticAssets.INDEX)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Frontend not found")
+    return static_assets.respond(
+        asset, request.headers.get("accept-encoding"), request.headers.get("if-none-match"), immutable=False
+    )
+
+
+@app.get("/static/{name:path}")
+async def serve_static(name: str, request: Request):
+    asset = static_assets.lookup(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Static file not found")
+    return static_assets.respond(
+        asset, request.headers.get("accept-encoding"), request.headers.get("if-none-match"),
+        immutable=static_assets.is_hashed(name)
+    )
 
 
 # === Crew Manager setup ===
 crew_manager = CrewManager()
 active_projects = {}
+project_tasks = {}
+
+# === Retention / disk quota ===
+garbage_collector = GarbageCollector(is_running=running_filter(crew_manager.running_projects))
+
+# === Admission control ===
+admission_controller = AdmissionController()
+
+# === Model warm-up / residency ===
+model_residency = ModelResidencyManager(
+    pending_work=lambda: admission_controller.running + admission_controller.queued
+)
+
+# === Warm test interpreters, started in the background ===
+test_pool_start: Optional[asyncio.Task] = None
+
+
+async def _start_test_pool(test_pool):
+    try:
+        await asyncio.to_thread(test_pool.start)
+    except Exception as e:
+        logger.error(f"Could not start the warm test pool: {str(e)}")
+
+
+@app.on_event("startup")
+async def start_background_services():
+    global test_pool_start
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    await asyncio.to_thread(static_assets.build)
+    if settings.GC_ENABLED:
+        garbage_collector.start()
+    if settings.AGENT_POOL_AUTOSCALE:
+        pool_autoscaler.start()
+    backend_registry.start()
+    model_residency.start()
+    test_pool = SandboxTestRunner.pool() if settings.TEST_RUNNER_ENABLED else None
+    if test_pool is not None:
+        test_pool_start = asyncio.create_task(_start_test_pool(test_pool))
+
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await garbage_collector.stop()
+    await pool_autoscaler.stop()
+    await model_residency.stop()
+    await backend_registry.stop()
+    await loop_monitor.stop()
+    StaticValidator.shutdown()
+    if test_pool_start is not None:
+        # Its thread cannot be interrupted; let it finish so no worker outlives the pool
+        await test_pool_start
+    await asyncio.to_thread(SandboxTestRunner.shutdown)
+
 
 @app.get("/info")
 async def root():
@@ -56,27 +146,172 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
             "assign_project": "/assign_project",
             "project_status": "/project/{project_id}/status",
-            "download": "/download/{project_id}"
+            "revise_project": "/project/{project_id}/revise",
+            "download": "/download/{project_id}?format={zip,zip-store,tar.gz,tar.zst}",
+            "metrics": "/metrics",
+            "trace": "/project/{project_id}/trace?format={html,json}",
+            "profile": "/admin/profile/{project_id}?format={folded,summary}"
         }
     }
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the API process is up (see /ready for the LLM backend)"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    # The background probe keeps this current; polling must not hit every backend
+    state = model_residency.readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+def _client_key(request: Request) -> str:
+    return request.headers.get(settings.CLIENT_KEY_HEADER) or (request.client.host if request.client else "anonymous")
+
+def _admit(project_request: ProjectRequest, client_key: str):
+    try:
+        return admission_controller.admit(
+            client_key=client_key,
+            weight=settings.PRIORITY_WEIGHTS.get(project_request.priority.value, 1),
+            cost=settings.PROJECT_TYPE_COSTS.get(project_request.project_type.value, 1)
+        )
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected project submission: {e.reason}")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server is busy: {e.reason}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+def _profile_requested(request: Request) -> bool:
+    return request.headers.get(settings.PROFILE_HEADER, "").strip().lower() in ("1", "true", "yes", "on")
+
 @app.post("/assign_project", response_model=ProjectResponse)
-async def assign_project(project_request: ProjectRequest, background_tasks: BackgroundTasks):
+async def assign_project(project_request: ProjectRequest, background_tasks: BackgroundTasks, request: Request):
     if not project_request.title or not project_request.description:
         raise HTTPException(status_code=400, detail="Project title and description are required")
+    client_key = _client_key(request)
+    ticket = _admit(project_request, client_key)
+
+    project_id = str(uuid.uuid4())
+    response = ProjectResponse(
+        project_id=project_id,
+        status="in_progress",
+        message="Project generation started",
+        download_url=f"/download/{project_id}",
+        created_at=datetime.now()
+    )
+    active_projects[project_id] = response
+    _start_run(project_id, ticket, run_project(
+        project_id, project_request, client_key, ticket, profile=_profile_requested(request)
+    ))
+    return response
+
+@app.post("/project/{project_id}/revise", response_model=ProjectResponse)
+async def revise_project(project_id: str, project_request: ProjectRequest, request: Request):
+    """Regenerate only what the changed request affects (see CrewManager.revise_project)"""
+    if not project_request.title or not project_request.description:
+        raise HTTPException(status_code=400, detail="Project title and description are required")
+    if not crew_manager.project_state.exists(project_id):
+        raise HTTPException(status_code=404, detail="No completed project to revise")
+    task = project_tasks.get(project_id)
+    if project_id in crew_manager.running_projects or (task is not None and not task.done()):
+        raise HTTPException(status_code=409, detail="Project is still being generated")
+    client_key = _client_key(request)
+    ticket = _admit(project_request, client_key)
+
+    response = ProjectResponse(
+        project_id=project_id,
+        status="in_progress",
+        message="Project revision started",
+        download_url=f"/download/{project_id}",
+        created_at=datetime.now()
+    )
+    active_projects[project_id] = response
+    _start_run(project_id, ticket, run_project(
+        project_id, project_request, client_key, ticket, revise=True, profile=_profile_requested(request)
+    ))
+    return response
+
+def _start_run(project_id: str, ticket, coro):
+    """Run ``coro`` (a ``run_project``) as the project's background task"""
+    task = asyncio.create_task(coro)
+    project_tasks[project_id] = task
+    created_at = active_projects[project_id].created_at
+
+    def finished(task: asyncio.Task):
+        # Cancelled before its first step, run_project's own cleanup never ran
+        ticket.discard()
+        if project_tasks.get(project_id) is task:
+            project_tasks.pop(project_id)
+        if task.cancelled() and active_projects[project_id].status == "in_progress":
+            active_projects[project_id] = ProjectResponse(
+                project_id=project_id,
+                status="cancelled",
+                message="Project generation was cancelled",
+                created_at=created_at
+            )
+
+    task.add_done_callback(finished)
+
+async def run_project(project_id: str, project_request: ProjectRequest, client_key: str, ticket,
+                      revise: bool = False, profile: bool = False):
+    """Background pipeline run; holds its admission slot for the whole run"""
+    created_at = active_projects[project_id].created_at
     try:
-        response = await crew_manager.execute_project(project_request)
-        active_projects[response.project_id] = response
-        return response
+        async with ticket:
+            if revise:
+                result = await crew_manager.revise_project(
+                    project_id, project_request, client_key=client_key, profile=profile
+                )
+            else:
+                result = await crew_manager.execute_project(
+                    project_request, client_key=client_key, project_id=project_id, profile=profile
+                )
+        active_projects[project_id] = result.model_copy(update={"created_at": created_at})
+    except asyncio.CancelledError:
+        active_projects[project_id] = ProjectResponse(
+            project_id=project_id,
+            status="cancelled",
+            message="Project generation was cancelled",
+            created_at=created_at
+        )
     except Exception as e:
-        logger.error(f"Failed to assign project: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to assign project: {str(e)}")
+        logger.error(f"Failed to run project {project_id}: {str(e)}")
+        active_projects[project_id] = ProjectResponse(
+            project_id=project_id,
+            status="failed",
+            message=f"Project generation failed: {str(e)}",
+            created_at=created_at
+        )
+    finally:
+        project_tasks.pop(project_id, None)
+
+@app.delete("/project/{project_id}")
+@app.post("/project/{project_id}/cancel")
+async def cancel_project(project_id: str, cleanup: bool = False):
+    if project_id not in active_projects:
+        raise HTTPException(status_code=404, detail="Project not found")
+    task = project_tasks.get(project_id)
+    if task is None or task.done():
+        raise HTTPException(status_code=409, detail=f"Project is already {active_projects[project_id].status}")
+
+    # Abort LLM requests first so the worker threads unblock, then the pipeline
+    crew_manager.cancel_project(project_id)
+    task.cancel()
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=settings.CANCEL_GRACE_SECONDS)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        pass
+
+    if cleanup:
+        crew_manager.file_manager.delete_project(project_id)
+        crew_manager.project_packager.delete_packages(project_id)
+
+    return active_projects[project_id]
 
 @app.get("/project/{project_id}/status")
 async def get_project_status(project_id: str):
@@ -84,12 +319,59 @@ async def get_project_status(project_id: str):
         raise HTTPException(status_code=404, detail="Project not found")
     return active_projects[project_id]
 
+@app.get("/project/{project_id}/trace")
+async def get_project_trace(project_id: str, format: str = "html", trace_id: Optional[str] = None):
+    """Span timeline of a run (the latest one unless ``trace_id`` is given)"""
+    spans = select_trace(await asyncio.to_thread(tracer.load, project_id), trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="No trace for this project")
+    if format == "json":
+        path = critical_path(spans)
+        return {
+            "project_id": project_id,
+            "trace_id": spans[0]["trace_id"],
+            "spans": [{**span, "critical": span["span_id"] in path} for span in spans],
+        }
+    if format != "html":
+        raise HTTPException(status_code=400, detail="format must be 'html' or 'json'")
+    return HTMLResponse(render_timeline(project_id, spans))
+
 @app.get("/download/{project_id}")
-async def download_project(project_id: str):
-    zip_path = Path(settings.GENERATED_DIR) / f"{project_id}.zip"
-    if not zip_path.exists():
-        raise HTTPException(status_code=404, detail="Project package not found")
-    return FileResponse(path=zip_path, filename=f"project_{project_id}.zip", media_type="application/zip")
+async def download_project(project_id: str, format: Optional[str] = None):
+    packager = crew_manager.project_packager
+    try:
+        fmt = packager.get_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    package_path = packager.package_path(project_id, fmt.name)
+    if project_id in crew_manager.running_projects:
+        # Mid-run (e.g. a revision) the tree is changing: serve only what is built
+        if not package_path.exists():
+            raise HTTPException(status_code=404, detail="Project package not found")
+    else:
+        try:
+            # Formats other than the primary one are built on first download
+            package_path = await asyncio.to_thread(packager.ensure_package, project_id, fmt.name)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Project package not found")
+    garbage_collector.mark_downloaded(package_path)
+    filename = f"project_{project_id}{'.zip' if fmt.media_type == 'application/zip' else fmt.extension}"
+    return FileResponse(path=package_path, filename=filename, media_type=fmt.media_type)
+
+@app.get("/admin/profile/{project_id}")
+async def get_profile(project_id: str, format: str = "folded"):
+    """Sampling profile of the project's last profiled run (collapsed stacks or a summary)"""
+    if format == "summary":
+        summary = await asyncio.to_thread(run_profiler.summary, project_id)
+        if summary is None:
+            raise HTTPException(status_code=404, detail="No profile for this project")
+        return summary
+    if format != "folded":
+        raise HTTPException(status_code=400, detail="format must be 'folded' or 'summary'")
+    path = run_profiler.path(project_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No profile for this project")
+    return FileResponse(path=path, filename=f"profile_{project_id}.folded", media_type="text/plain")
 
 @app.get("/projects")
 async def list_projects():
@@ -104,6 +386,23 @@ async def list_projects():
         ]
     }
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "gc": garbage_collector.metrics,
+        "admission": admission_controller.metrics,
+        "llm_scheduler": llm_scheduler.metrics,
+        "agent_pools": pool_autoscaler.metrics,
+        "llm_latency": llm_latency.metrics,
+        "llm_queue_delay": llm_queue_delay.metrics,
+        "timeouts": adaptive_timeouts.metrics,
+        "backends": backend_registry.metrics,
+        "hedging": request_hedger.metrics,
+        "cascade": model_cascade.metrics,
+        "module_index": module_index.metrics,
+        "event_loop": loop_monitor.metrics
+    }
+
 # === Error Handlers ===
 @app.exception_handler(404)
 async def not_found_handler(request, exc):